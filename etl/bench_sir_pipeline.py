@@ -0,0 +1,363 @@
+# bench_sir_pipeline.py — benchmark do sir_excel_pipeline_v6.py com planilhas sintéticas
+# - Gera planilhas SIR realistas: colunas canônicas das 4 plataformas, variantes por sinônimo,
+#   strings no formato brasileiro ("1.234,5", "12%", "0,34%"), vazios/"-" e colunas de período
+# - Cronometra as funções públicas (canonicalize_columns, clean_numeric_dataframe_one_decimal,
+#   compute_dimensions_raw, normalize_0_100_pos_floor_cap, export_metrics_long) e a CLI completa
+# - --check: casos aleatórios comparando a normalização por matriz/seleção com a referência
+# - Emite JSON comparável entre commits (--out) e compara com um baseline (--compare)
+#
+# Exemplos:
+#   python etl/bench_sir_pipeline.py --sizes 10,1000,100000 --out bench.json
+#   python etl/bench_sir_pipeline.py --sizes 10,1000 --compare bench.json
+#   python etl/bench_sir_pipeline.py --generate 1000 --generate-out /tmp/sir_1k.csv
+#   python etl/bench_sir_pipeline.py --check 2000   # equivalência da normalização (propriedades)
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import sir_excel_pipeline_v6 as sir  # noqa: E402
+
+PIPELINE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sir_excel_pipeline_v6.py")
+DEFAULT_SIZES = [10, 1_000, 100_000, 1_000_000]
+
+# ============================
+# Gerador de planilha sintética
+# ============================
+
+# nome canônico -> variantes aceitas por _SYNONYMS (usadas em metade das plataformas)
+_SYNONYM_VARIANTS = {
+    "fans": "seguidores_{plat}",
+    "posts": "qtd_posts_{plat}",
+    "likes": "curtidas_{plat}",
+    "comments": "comentarios_{plat}",
+    "shares": "compartilhamentos_{plat}",
+    "engagement": "engagement_rate_{plat}",
+    "var_fans": "delta_followers_{plat}",
+    "var_likes": "delta_likes_{plat}",
+    "var_engagement": "delta_eng_{plat}",
+    "presence": "has_{plat}",
+}
+
+def _br_number(values: np.ndarray, decimals: int = 1) -> np.ndarray:
+    """1234.5 -> '1.234,5' (milhar com ponto, decimal com vírgula)."""
+    fmt = f"{{:,.{decimals}f}}"
+    return np.array([fmt.format(v).replace(",", "\x00").replace(".", ",").replace("\x00", ".")
+                     for v in values], dtype=object)
+
+def _br_percent(values: np.ndarray, decimals: int = 2) -> np.ndarray:
+    """0.34 -> '  0,34%' (com espaços à esquerda, como nos exports das ferramentas)."""
+    fmt = f"{{:.{decimals}f}}%"
+    return np.array(["  " + fmt.format(v).replace(".", ",") for v in values], dtype=object)
+
+def _sprinkle_missing(col: np.ndarray, rng: np.random.Generator, frac: float = 0.02) -> np.ndarray:
+    mask = rng.random(len(col)) < frac
+    out = col.astype(object)
+    out[mask] = rng.choice(np.array(["", "-", " "], dtype=object), size=int(mask.sum()))
+    return out
+
+def make_synthetic_sheet(n_entities: int, seed: int = 0, synonyms: bool = True,
+                         br_format: bool = True, periods: bool = True) -> pd.DataFrame:
+    """
+    Planilha bruta com n_entities linhas, como chega dos clientes:
+    - todas as métricas canônicas das plataformas em sir._CANON_PLATFORMS
+    - com `synonyms`, metade das plataformas usa nomes alternativos (seguidores_, curtidas_, ...)
+    - com `br_format`, contagens viram "1.234,5" e percentuais "0,34%"; ~2% de vazios/"-"
+    - com `periods`, colunas period_start/period_end
+    """
+    rng = np.random.default_rng(seed)
+    n = int(n_entities)
+    cols: Dict[str, np.ndarray] = {"perfil" if synonyms else "name": np.array([f"Perfil {i:07d}" for i in range(n)], dtype=object)}
+
+    for i, plat in enumerate(sir._CANON_PLATFORMS):
+        use_syn = synonyms and i % 2 == 1
+
+        def colname(metric: str) -> str:
+            if use_syn and metric in _SYNONYM_VARIANTS:
+                return _SYNONYM_VARIANTS[metric].format(plat=plat)
+            return f"{metric}_{plat}"
+
+        present = (rng.random(n) < 0.85).astype(int)
+        fans = np.round(rng.lognormal(11, 2, n) * present, 1)
+        posts = rng.poisson(25, n) * present
+        likes = np.round(rng.lognormal(8, 2, n) * present)
+        comments = np.round(likes * rng.uniform(0.01, 0.2, n))
+        shares = np.round(likes * rng.uniform(0.01, 0.3, n))
+        engagement = np.round(rng.gamma(1.5, 0.5, n) * present, 2)       # em %
+        var_cols = {m: np.round(rng.normal(0, 40, n), 1) for m in
+                    ["var_fans", "var_likes", "var_comments", "var_shares", "var_engagement"]}
+
+        cols[colname("presence")] = present
+        if br_format:
+            cols[colname("fans")] = _sprinkle_missing(_br_number(fans), rng)
+            cols[colname("posts")] = posts
+            cols[colname("likes")] = _sprinkle_missing(_br_number(likes, 0), rng)
+            cols[colname("comments")] = comments
+            cols[colname("shares")] = _br_number(shares, 0)
+            cols[colname("engagement")] = _sprinkle_missing(_br_percent(engagement), rng)
+            for m, v in var_cols.items():
+                cols[colname(m)] = _br_percent(v, 1)
+        else:
+            cols[colname("fans")] = fans
+            cols[colname("posts")] = posts
+            cols[colname("likes")] = likes
+            cols[colname("comments")] = comments
+            cols[colname("shares")] = shares
+            cols[colname("engagement")] = engagement / 100.0
+            for m, v in var_cols.items():
+                cols[colname(m)] = v / 100.0
+
+    if periods:
+        cols["period_start"] = np.full(n, "2025-08-01", dtype=object)
+        cols["period_end"] = np.full(n, "2025-08-31", dtype=object)
+    return pd.DataFrame(cols)
+
+# ============================
+# Cronômetro
+# ============================
+
+def _time_call(fn: Callable[[], object], repeats: int) -> Dict[str, float]:
+    times = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return {"best_s": min(times), "mean_s": sum(times) / len(times), "repeats": repeats}
+
+def _repeats_for(n: int, base: int) -> int:
+    # tamanhos grandes: menos repetições para o benchmark caber no tempo
+    if n >= 1_000_000:
+        return 1
+    if n >= 100_000:
+        return max(1, min(base, 2))
+    return base
+
+def bench_size(n: int, seed: int, repeats: int, run_cli: bool, tmpdir: str) -> List[Dict]:
+    results = []
+    t = time.perf_counter()
+    raw = make_synthetic_sheet(n, seed=seed)
+    gen_s = time.perf_counter() - t
+    r = _repeats_for(n, repeats)
+    print(f"[bench] n={n}: planilha gerada em {gen_s:.2f}s ({raw.shape[1]} colunas)", file=sys.stderr)
+
+    def record(name: str, fn: Callable[[], object]):
+        res = {"function": name, "rows": n, **_time_call(fn, r)}
+        results.append(res)
+        print(f"[bench]   {name:<40} best={res['best_s']:.4f}s mean={res['mean_s']:.4f}s", file=sys.stderr)
+
+    canon, _, _ = sir.canonicalize_columns(raw)
+    clean = sir.clean_numeric_dataframe_one_decimal(canon)
+    dims = sir.compute_dimensions_raw(clean)
+
+    record("canonicalize_columns", lambda: sir.canonicalize_columns(raw))
+    record("clean_numeric_dataframe_one_decimal", lambda: sir.clean_numeric_dataframe_one_decimal(canon))
+    record("compute_dimensions_raw", lambda: sir.compute_dimensions_raw(clean))
+    record("compute_dimension_arrays", lambda: sir.compute_dimension_arrays(clean))
+    record("compute_dimension_arrays[float32]", lambda: sir.compute_dimension_arrays(clean, np.float32))
+    record("normalize_0_100_pos_floor_cap", lambda: sir.normalize_0_100_pos_floor_cap(dims["pop_final_raw"]))
+    tiers = np.arange(n) % max(1, n // 100)  # ~100 linhas por grupo
+    record("normalize_0_100_pos_floor_cap_grouped",
+           lambda: sir.normalize_0_100_pos_floor_cap_grouped(dims["pop_final_raw"], tiers))
+    metrics_csv = os.path.join(tmpdir, f"bench_{n}__MetricsExport.csv")
+    record("export_metrics_long", lambda: sir.export_metrics_long(clean, metrics_csv))
+
+    if run_cli:
+        csv_path = os.path.join(tmpdir, f"bench_{n}.csv")
+        raw.to_csv(csv_path, index=False)
+        out_dir = os.path.join(tmpdir, f"out_{n}")
+        cmd = [sys.executable, PIPELINE_SCRIPT, "--excel", csv_path, "--out-dir", out_dir, "--no-cache"]
+        record("cli_end_to_end", lambda: subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL))
+    return results
+
+# ============================
+# Checagem de propriedades (--check)
+# ============================
+# Casos aleatórios (empates, zeros, negativos, um único positivo, colunas constantes,
+# magnitudes extremas, stats do streaming) comparados bit a bit com a referência abaixo:
+# a implementação de normalize_0_100_pos_floor_cap antes do caminho por seleção/matriz.
+
+def _reference_normalize(vals: np.ndarray, piso: float, cap_min: float, dom: float, stats=None) -> np.ndarray:
+    out = np.zeros_like(vals, dtype=float)
+    mask_pos = vals > 0
+    if not mask_pos.any():
+        return out
+    pos_vals = vals[mask_pos]
+    if stats is not None:
+        min_pos, max_pos, second_pos = stats
+    else:
+        min_pos, max_pos = pos_vals.min(), pos_vals.max()
+        second_pos = np.sort(pos_vals)[-2] if len(pos_vals) > 1 else pos_vals.max()
+    if max_pos <= 0:
+        cap = cap_min
+    else:
+        denom = second_pos if second_pos > 0 else max_pos
+        ratio = max_pos / denom if denom > 0 else 1.0
+        if ratio >= dom:
+            cap = 100.0
+        else:
+            t = max(0.0, min(1.0, (ratio - 1.0) / max(dom - 1.0, 1e-9)))
+            cap = cap_min + t * (100.0 - cap_min)
+    if np.isclose(max_pos, min_pos):
+        out[mask_pos] = 0.5 * (piso + cap)
+        return out
+    escala = (pos_vals - min_pos) / (max_pos - min_pos)
+    out[mask_pos] = piso + escala * (cap - piso)
+    return out
+
+def _random_column(rng: np.random.Generator, n: int) -> np.ndarray:
+    kind = rng.integers(0, 7)
+    if kind == 0:   # inteiros pequenos: muitos empates, zeros e negativos
+        return rng.integers(-3, 6, n).astype(float)
+    if kind == 1:   # constante (positiva, zero ou negativa)
+        return np.full(n, rng.choice([0.0, -1.5, 7.25]))
+    if kind == 2:   # um único positivo
+        col = -rng.random(n)
+        col[rng.integers(0, n)] = rng.random() * 1e3
+        return col
+    if kind == 3:   # líder dominante
+        col = rng.random(n)
+        col[rng.integers(0, n)] = 1e6
+        return col
+    if kind == 4:   # magnitudes extremas
+        return rng.choice([0.0, 1e-12, 1e-6, 1.0, 1e9, 1e15], n) * rng.choice([-1, 1, 1], n)
+    if kind == 5:   # quase iguais (np.isclose decide)
+        return 100.0 + rng.random(n) * 1e-9
+    return rng.gamma(0.5, 100.0, n) * rng.choice([0, 1, 1, 1], n)
+
+def check_normalize(cases: int, seed: int) -> int:
+    """Retorna o nº de divergências entre o caminho por matriz/seleção e a referência."""
+    rng = np.random.default_rng(seed)
+    failures = 0
+    for case in range(cases):
+        n = int(rng.choice([0, 1, 2, 3, int(rng.integers(4, 50)), int(rng.integers(50, 5000))]))
+        m = np.column_stack([_random_column(rng, n) if n else np.zeros(0) for _ in range(4)]) \
+            if n else np.zeros((0, 4))
+        piso, cap_min = float(rng.choice([0.0, 1.0, 5.0])), float(rng.choice([50.0, 98.0, 100.0]))
+        dom = float(rng.choice([1.0, 2.0, 10.0]))
+        stats = None
+        if n and rng.random() < 0.2:  # stats "do streaming" calculados pela própria referência
+            stats = []
+            for j in range(4):
+                pos = m[:, j][m[:, j] > 0]
+                stats.append((pos.min(), pos.max(), np.sort(pos)[-2] if len(pos) > 1 else pos.max())
+                             if len(pos) and rng.random() < 0.7 else None)
+        got = sir.normalize_pos_floor_cap_matrix(m, piso, cap_min, dom, stats)
+        for j in range(4):
+            ref = _reference_normalize(m[:, j], piso, cap_min, dom, stats[j] if stats else None)
+            scalar = sir.normalize_0_100_pos_floor_cap(pd.Series(m[:, j]), piso, cap_min, dom,
+                                                       stats[j] if stats else None).to_numpy()
+            if not (np.array_equal(got[:, j], ref) and np.array_equal(scalar, ref)):
+                failures += 1
+                print(f"[check] caso {case} coluna {j}: divergência (n={n}, piso={piso}, cap_min={cap_min}, "
+                      f"dom={dom})", file=sys.stderr)
+        if n:
+            col = m[:, 0]
+            pos = col[col > 0]
+            want = (np.sort(pos)[-2] if len(pos) > 1 else pos.max()) if len(pos) else 0.0
+            if sir._second_largest(col) != want:
+                failures += 1
+                print(f"[check] caso {case}: _second_largest divergente", file=sys.stderr)
+    return failures
+
+# ============================
+# Comparação entre commits
+# ============================
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current: Dict, baseline_path: str):
+    with open(baseline_path, "r", encoding="utf-8") as fh:
+        base = json.load(fh)
+    idx = {(r["function"], r["rows"]): r for r in base.get("results", [])}
+    print(f"\nComparação com {baseline_path} (commit {base.get('commit')}) — razão = atual / baseline")
+    print(f"{'função':<40} {'linhas':>9} {'baseline':>10} {'atual':>10} {'razão':>7}")
+    for r in current["results"]:
+        b = idx.get((r["function"], r["rows"]))
+        if not b:
+            continue
+        ratio = r["best_s"] / b["best_s"] if b["best_s"] > 0 else float("nan")
+        print(f"{r['function']:<40} {r['rows']:>9} {b['best_s']:>10.4f} {r['best_s']:>10.4f} {ratio:>7.2f}")
+
+# ============================
+# CLI
+# ============================
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Benchmark do SIR v6.1 com planilhas sintéticas")
+    ap.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                    help="Nº de entidades por rodada, separados por vírgula")
+    ap.add_argument("--repeats", type=int, default=3, help="Repetições por função (menos em tamanhos grandes)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--cli-max-rows", type=int, default=100_000,
+                    help="Roda a CLI completa só até este tamanho (0 desativa)")
+    ap.add_argument("--out", default=None, help="Grava os resultados em JSON")
+    ap.add_argument("--compare", default=None, help="JSON de uma rodada anterior para comparar")
+    ap.add_argument("--generate", type=int, default=None,
+                    help="Só gera uma planilha sintética com N entidades (sem benchmark)")
+    ap.add_argument("--generate-out", default=None, help="Destino da planilha gerada (.csv ou .xlsx)")
+    ap.add_argument("--check", type=int, default=None, metavar="N",
+                    help="Só roda N casos aleatórios de equivalência da normalização (sai com 1 se divergir)")
+    return ap.parse_args()
+
+def main():
+    args = parse_args()
+
+    if args.check is not None:
+        failures = check_normalize(args.check, args.seed)
+        print(f"[{'OK' if not failures else 'FALHA'}] Normalização: {args.check} caso(s), {failures} divergência(s)")
+        sys.exit(1 if failures else 0)
+
+    if args.generate is not None:
+        out = args.generate_out or f"sir_synthetic_{args.generate}.csv"
+        df = make_synthetic_sheet(args.generate, seed=args.seed)
+        if out.lower().endswith((".xlsx", ".xls")):
+            df.to_excel(out, index=False)
+        else:
+            df.to_csv(out, index=False)
+        print(f"[OK] Planilha sintética ({len(df)} linhas) salva em: {out}")
+        return
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results: List[Dict] = []
+    with tempfile.TemporaryDirectory(prefix="sir_bench_") as tmpdir:
+        for n in sizes:
+            run_cli = args.cli_max_rows > 0 and n <= args.cli_max_rows
+            results.extend(bench_size(n, args.seed, args.repeats, run_cli, tmpdir))
+
+    report = {
+        "commit": _git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "seed": args.seed,
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, ensure_ascii=False, indent=2)
+        print(f"[OK] Resultados salvos em: {args.out}")
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.compare:
+        compare(report, args.compare)
+
+if __name__ == "__main__":
+    main()
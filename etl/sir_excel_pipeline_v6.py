@@ -4,14 +4,54 @@
 # - Exporta também <basename>__MetricsExport.csv (subset padronizado para aba Metrics)
 # - Mantém toda a lógica de normalização e pesos existente
 # - Aceita sinônimos de colunas e valida presença com logs
+# - Exporta <basename>__Dimensions.npz (matriz *_100); --reweight recalcula só os pesos
+# - Sweep de pesos (--sweep): distribuição de ranks por entidade sob milhares de vetores
+# - Cache content-addressed (hash do input + sheet + pesos/normalização) em <out>/.sir_cache
+# - --sheet all: workbook lido uma vez, cada sheet pontuada em paralelo com saídas próprias
+#   (--excel-engine calamine/auto usa python-calamine; o padrão segue openpyxl)
+# - Batch (--batch <raw_root>): todas as ondas em paralelo, com resumo de tempos/falhas
+# - Modo worker (--serve): jobs JSON por linha no stdin, sem respawn por request
+# - --emit-json: overview/radar/metrics.json prontos para o front (schema do assembleFromSir.ts)
+# - --ranks (implícito em --emit-json): __Ranks.csv/__MetricDeltas.csv/ranks.json com rank,
+#   percentil e delta contra P(n-1) de cada *_100, da nota final e de cada métrica
+# - Séries multi-onda (--series <raw_root>): <client>/series.json incremental, só ondas novas são pontuadas
+# - --watch <raw_root>: polling de data/raw com debounce; repontua só ondas cujo input mudou (fila limitada)
+# - --stream: CSV grande lido em blocos (memória limitada), mesmo resultado da leitura inteira
+# - --format parquet|arrow: Resultado/MetricsExport também em formato colunar (pyarrow opcional)
+# - --group-by <coluna>: normalização dentro de cada grupo (setor, UF, tier...), num passe vetorizado
+# - API em processo: run_pipeline(df | caminho, PipelineConfig(...)) -> Resultado/Metrics em memória
+# - --profile: <basename>__Profile.json com tempo/RSS/formato/cache de cada etapa
+# - Startup enxuto: matplotlib, openpyxl e o pool de processos só carregam quando usados.
+#   Orçamento de cold-start (--timings): planilha pequena (≤ 1k linhas, sem plots/xlsx)
+#   em até _COLD_START_BUDGET_MS de parede, dos quais ~400 ms são numpy + pandas.
+
+import time
+_T_MODULE_START = time.perf_counter()  # referência do relatório --timings
 
 import argparse
+import atexit
+import codecs
+import contextlib
+import csv
+import filecmp
+import hashlib
+import io
+import itertools
+import json
+import math
 import os
 import re
+import shutil
+import sys
+import unicodedata
+from dataclasses import dataclass, field, fields, replace
+from functools import lru_cache
 from typing import Dict, List, Tuple
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+
+_T_IMPORTS_DONE = time.perf_counter()
+_COLD_START_BUDGET_MS = 1500.0
 
 # ============================
 # Helpers de IO e nomes
@@ -107,18 +147,124 @@ def _clean_numeric_series_one_decimal(obj: pd.Series, is_percent: bool = False)
     return s
 
 
-def clean_numeric_dataframe_one_decimal(df: pd.DataFrame) -> pd.DataFrame:
+_THOUSAND_THEN_COMMA = re.compile(r"^\d{1,3}(\.\d{3})+(,\d+)?$")
+_BR_TRANSLATE = str.maketrans({",": ".", "\u00A0": None})
+
+def _br_cell_to_numeric_str(x: str) -> Tuple[str | None, bool]:
+    """
+    Uma célula (já em str) pelas mesmas regras de _clean_numeric_series_one_decimal,
+    na mesma ordem: strip -> detecta/remove '%' -> milhar "1.234,5" -> vírgula
+    decimal + NBSP (translate) -> ""/"-" viram None. Retorna (texto_numérico, tinha_%).
+    """
+    x = x.strip()
+    had_pct = "%" in x
+    if had_pct:
+        x = x.replace("%", "")
+    if _THOUSAND_THEN_COMMA.match(x):
+        x = x.replace(".", "")
+    x = x.translate(_BR_TRANSLATE)
+    return (None if x in ("", "-") else x), had_pct
+
+def _parse_object_columns(arrays: List[np.ndarray]) -> Tuple[List[np.ndarray], List[bool]]:
+    """
+    Converte várias colunas object de uma vez: empilha tudo, fatoriza os textos e
+    aplica _br_cell_to_numeric_str + to_numeric só nos valores distintos.
+    Retorna (valores float por coluna, se a coluna tinha '%' explícito).
+    """
+    lens = [len(a) for a in arrays]
+    flat = pd.Series(np.concatenate(arrays), dtype=object).astype(str).to_numpy()
+    codes, uniques = pd.factorize(flat)
+    parsed = [_br_cell_to_numeric_str(u) for u in uniques]
+    u_vals = pd.to_numeric(pd.Series([p[0] for p in parsed], dtype=object), errors="coerce") \
+        .to_numpy(dtype=float)
+    u_pct = np.fromiter((p[1] for p in parsed), dtype=bool, count=len(parsed))
+
+    values, had_pct = [], []
+    start = 0
+    for n in lens:
+        c = codes[start:start + n]
+        values.append(u_vals[c])
+        had_pct.append(bool(u_pct[c].any()))
+        start += n
+    return values, had_pct
+
+def _finish_numeric_one_decimal(vals: np.ndarray, is_percent: bool, had_pct: bool | None,
+                                divide: bool | None = None) -> np.ndarray:
+    """
+    Parte numérica de _clean_numeric_series_one_decimal: percentuais -> fração, 1 casa.
+    `divide` fixa a decisão do /100 (streaming: decidida com a coluna inteira).
+    """
+    if is_percent and divide is not None:
+        if divide:
+            vals = vals / 100.0
+    elif is_percent:
+        if had_pct:
+            vals = vals / 100.0
+        else:
+            nonnull = vals[~np.isnan(vals)]
+            if nonnull.size:
+                smin, smax = nonnull.min(), nonnull.max()
+                if 0.0 <= smin and smax <= 100.0 and smax > 1.0:
+                    vals = vals / 100.0
+    return np.round(vals, 1)
+
+def clean_numeric_dataframe_one_decimal(df: pd.DataFrame,
+                                        percent_divide: Dict[str, bool] | None = None) -> pd.DataFrame:
     """
     Aplica sanitização numérica nas colunas reconhecidas (regex) ou já numéricas.
     'name' fica intacto. Colunas percentuais são trazidas para 0–1.
+    Todas as colunas texto são convertidas num único passe (valores distintos uma
+    vez só); colunas numéricas que já estão em 1 casa são reaproveitadas sem cópia.
+    Mesmo resultado de aplicar _clean_numeric_series_one_decimal coluna a coluna.
+    `percent_divide` ({coluna: dividir por 100?}) substitui a heurística de
+    percentual, que olha a coluna inteira — usado quando df é só um bloco do arquivo.
     """
-    out = df.copy()
-    for col in out.columns:
+    percent_divide = percent_divide or {}
+    if df.columns.has_duplicates or len(df) == 0:
+        out = df.copy()
+        for col in out.columns:
+            if col == "name":
+                continue
+            needs_numeric = _NUMERIC_COL_REGEX.match(col) or pd.api.types.is_numeric_dtype(out[col])
+            if needs_numeric:
+                out[col] = _clean_numeric_series_one_decimal(out[col], is_percent=_is_percent_col(col))
+        return out
+
+    text_cols, num_cols = [], []
+    for col in df.columns:
         if col == "name":
             continue
-        needs_numeric = _NUMERIC_COL_REGEX.match(col) or pd.api.types.is_numeric_dtype(out[col])
-        if needs_numeric:
-            out[col] = _clean_numeric_series_one_decimal(out[col], is_percent=_is_percent_col(col))
+        s = df[col]
+        is_num = pd.api.types.is_numeric_dtype(s)
+        if not (_NUMERIC_COL_REGEX.match(str(col)) or is_num):
+            continue
+        if s.dtype == object:
+            text_cols.append(col)
+        elif is_num:
+            num_cols.append(col)
+        # demais dtypes (datas, StringDtype, ...) ficam como estão, igual ao original
+
+    new_cols: Dict[str, np.ndarray] = {}
+    if text_cols:
+        values, had_pct = _parse_object_columns([df[c].to_numpy() for c in text_cols])
+        for col, vals, pct in zip(text_cols, values, had_pct):
+            new_cols[col] = _finish_numeric_one_decimal(vals, _is_percent_col(col), pct, percent_divide.get(col))
+    for col in num_cols:
+        s = df[col]
+        # Int64/Float64 (nullable) passam pelo astype(float) como no original: saem float64 com NaN
+        raw = s.to_numpy() if s.dtype == np.float64 else s.astype(float).to_numpy()
+        vals = _finish_numeric_one_decimal(raw, _is_percent_col(col), None, percent_divide.get(col))
+        if s.dtype == np.float64 and np.array_equal(vals, raw, equal_nan=True):
+            continue  # já float64 em 1 casa: mantém a coluna original
+        new_cols[col] = vals
+
+    if not new_cols:
+        return df.copy(deep=False)
+    out = pd.DataFrame(
+        {col: (new_cols[col] if col in new_cols else df[col]) for col in df.columns},
+        index=df.index,
+    )
+    out.attrs = dict(df.attrs)
     return out
 
 def _slugify(s: str) -> str:
@@ -132,9 +278,8 @@ def _derive_basenames(input_path: str, out_dir: str|None) -> Tuple[str, str]:
     - Se out_dir for None: usa data/processed (irmão de data/raw se existir; senão, pasta do input)
     - Nome base: <basename-do-input-sem-ext>__Resultado.csv e __MetricsExport.csv
     """
-    src_dir, src_name = os.path.dirname(os.path.abspath(input_path)), os.path.basename(input_path)
-    base_noext = os.path.splitext(src_name)[0]
-    base_noext = _slugify(base_noext)
+    src_dir = os.path.dirname(os.path.abspath(input_path))
+    result_name, metrics_name = _output_names(input_path)
 
     # destino
     if out_dir:
@@ -146,16 +291,72 @@ def _derive_basenames(input_path: str, out_dir: str|None) -> Tuple[str, str]:
         dest_dir = processed if os.path.isdir(processed) else src_dir
 
     os.makedirs(dest_dir, exist_ok=True)
-    result_csv = os.path.join(dest_dir, f"{base_noext}__Resultado.csv")
-    metrics_csv = os.path.join(dest_dir, f"{base_noext}__MetricsExport.csv")
-    return result_csv, metrics_csv
+    return os.path.join(dest_dir, result_name), os.path.join(dest_dir, metrics_name)
+
+def _output_names(input_path: str) -> Tuple[str, str]:
+    """Só os nomes de arquivo de _derive_basenames: <slug>__Resultado.csv, <slug>__MetricsExport.csv."""
+    base_noext = _slugify(os.path.splitext(os.path.basename(input_path))[0])
+    return f"{base_noext}__Resultado.csv", f"{base_noext}__MetricsExport.csv"
+
+# Escrita atômica: tudo que o runner/dashboard lê é gravado num temporário na mesma
+# pasta e renomeado por cima (os.replace). Leitor concorrente vê o arquivo antigo
+# ou o novo, nunca um pela metade. O temporário mantém a extensão (to_excel/savefig
+# escolhem o formato por ela) e não termina em __Resultado.csv etc.
+_TMP_SEQ = itertools.count()
+
+def _tmp_sibling(path: str) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid()}-{next(_TMP_SEQ)}.tmp{ext}"
+
+@contextlib.contextmanager
+def atomic_output(path: str):
+    """with atomic_output(path) as tmp: grava em tmp; no fim, tmp substitui path (erro: tmp removido)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = _tmp_sibling(path)
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+def _copy_atomic(src: str, dest: str):
+    with atomic_output(dest) as tmp:
+        shutil.copyfile(src, tmp)
+
+_EXCEL_ENGINES = ["auto", "calamine", "openpyxl"]
 
-def _read_table_any(path: str, sheet_name: str|int=0) -> pd.DataFrame:
+def _calamine_available() -> bool:
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return False
+    major, minor = (int(x) for x in pd.__version__.split(".")[:2])
+    return (major, minor) >= (2, 2)  # engine="calamine" entrou no pandas 2.2
+
+def excel_engine(choice: str | None = "openpyxl") -> str | None:
+    """
+    Engine do pd.read_excel para --excel-engine:
+    - "openpyxl" (padrão): leitor padrão do pandas (openpyxl; xlrd para .xls)
+    - "calamine": python-calamine (parse em Rust, bem mais rápido); exige o pacote
+    - "auto": calamine se instalado, senão openpyxl
+    Calamine difere do openpyxl em datas, valores em cache de fórmulas e células vazias:
+    por isso só entra quando pedido, e o engine usado vai para o log e para a chave do cache.
+    """
+    if choice in (None, "openpyxl"):
+        return None
+    if choice == "calamine" and not _calamine_available():
+        raise RuntimeError("--excel-engine calamine requer python-calamine e pandas>=2.2 (pip install python-calamine)")
+    return "calamine" if _calamine_available() else None
+
+def _read_table_any(path: str, sheet_name: str|int|None=0, engine: str|None=None) -> pd.DataFrame:
+    """sheet_name=None lê todas as sheets num parse só (dict nome -> DataFrame)."""
     if not os.path.exists(path):
         raise FileNotFoundError(f"Arquivo não encontrado: {path}")
     ext = os.path.splitext(path)[1].lower()
     if ext in [".xlsx", ".xlsm", ".xls"]:
-        return pd.read_excel(path, sheet_name=sheet_name)
+        return pd.read_excel(path, sheet_name=sheet_name, engine=engine)
     # CSV (tenta encoding/sep comuns)
     try:
         return pd.read_csv(path)
@@ -201,9 +402,11 @@ _SYNONYMS = {
     r"^presence_(PLAT)$": [r"^has_(PLAT)$", r"^(PLAT)_present$"],
 }
 
-def _expand_synonyms() -> List[Tuple[re.Pattern, str]]:
+@lru_cache(maxsize=1)
+def _expand_synonyms() -> Tuple[Tuple[re.Pattern, str], ...]:
     """
-    Retorna lista [(pattern_sinonimo, canonical_dest)]
+    Retorna tupla [(pattern_sinonimo, canonical_dest)], compilada uma única vez
+    por processo (o worker --serve reaproveita entre jobs).
     """
     rules = []
     for canon, synos in _SYNONYMS.items():
@@ -217,21 +420,98 @@ def _expand_synonyms() -> List[Tuple[re.Pattern, str]]:
     rules.append((re.compile(r"^nome$", re.I), "name"))
     rules.append((re.compile(r"^page$", re.I), "name"))
     rules.append((re.compile(r"^account$", re.I), "name"))
-    return rules
+    return tuple(rules)
+
+_REGEX_META = set("\\.^$*+?{}[]|()")
+
+@lru_cache(maxsize=1)
+def _synonym_index() -> Tuple[Dict[str, Tuple[int, str]], Tuple[Tuple[int, re.Pattern, str], ...]]:
+    """
+    Índice pré-compilado das regras de _expand_synonyms():
+    - exatas: nome literal (minúsculo) -> (posição da regra, destino), p/ padrões ^literal$
+    - regex: só as regras com metacaracteres (ex.: alternâncias), na ordem original
+    A posição preserva a regra "primeira que casa vence" do laço original.
+    """
+    exact: Dict[str, Tuple[int, str]] = {}
+    regex = []
+    for i, (pat, dest) in enumerate(_expand_synonyms()):
+        body = pat.pattern
+        if body.startswith("^") and body.endswith("$"):
+            lit = body[1:-1]
+            if not (set(lit) & _REGEX_META) and lit.isascii():
+                exact.setdefault(lit.lower(), (i, dest))
+                continue
+        regex.append((i, pat, dest))
+    return exact, tuple(regex)
+
+def _match_synonym(col) -> str | None:
+    """Destino canônico de uma coluna (ou None), idêntico a testar as regras em ordem."""
+    exact, regex = _synonym_index()
+    if not isinstance(col, str) or not col.isascii():
+        # case folding de re.I fora do ASCII (e erros de tipo) ficam com o regex
+        for pat, dest in _expand_synonyms():
+            if pat.match(col):
+                return dest
+        return None
+    key = col.lower()
+    hit = exact.get(key)
+    if hit is None and key.endswith("\n"):
+        hit = exact.get(key[:-1])  # '$' também casa antes de um '\n' final
+    limit = hit[0] if hit else len(_expand_synonyms())
+    for i, pat, dest in regex:
+        if i >= limit:
+            break
+        if pat.match(col):
+            return dest
+    return hit[1] if hit else None
+
+@lru_cache(maxsize=256)
+def _synonym_colmap(columns: Tuple) -> Tuple[Tuple[str, str], ...]:
+    """Mapeamento de sinônimos memoizado pela assinatura do cabeçalho."""
+    pairs = []
+    for col in columns:
+        dest = _match_synonym(col)
+        if dest is not None:
+            pairs.append((col, dest))
+    return tuple(pairs)
+
+_NEEDED_PREFIXES = [
+    r"^presence_", r"^fans_", r"^posts_", r"^(likes|comments|shares)_",
+    r"^engagement_", r"^var_fans_", r"^var_(likes|comments|shares)_", r"^var_engagement_"
+]
+_NEEDED_PREFIX_RES = [re.compile(p) for p in _NEEDED_PREFIXES]
+
+@lru_cache(maxsize=256)
+def _missing_prefixes(columns: Tuple) -> Tuple[str, ...]:
+    return tuple(
+        pref for pref, rx in zip(_NEEDED_PREFIXES, _NEEDED_PREFIX_RES)
+        if not any(rx.match(c) for c in columns)
+    )
+
+def _header_signature(columns) -> Tuple | None:
+    sig = tuple(columns)
+    try:
+        hash(sig)
+    except TypeError:
+        return None
+    return sig
 
 def canonicalize_columns(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, str], List[str]]:
     """
     Renomeia colunas conhecidas para a forma canônica.
     Retorna: (df_renamed, mapping_aplicado, faltantes_relativos)
+    Cabeçalhos já vistos (mesma assinatura) reaproveitam o mapeamento: O(colunas).
     """
-    colmap = {}
-    rules = _expand_synonyms()
     # 1) aplica sinônimos
-    for col in list(df.columns):
-        for pat, dest in rules:
-            if pat.match(col):
+    sig = _header_signature(df.columns)
+    if sig is not None:
+        colmap = dict(_synonym_colmap(sig))
+    else:
+        colmap = {}
+        for col in list(df.columns):
+            dest = _match_synonym(col)
+            if dest is not None:
                 colmap[col] = dest
-                break
     out = df.rename(columns=colmap)
 
     # 2) garante 'name'
@@ -244,14 +524,12 @@ def canonicalize_columns(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, str]
             out = out.reset_index().rename(columns={"index": "name"})
 
     # 3) checa faltas relevantes (opcional; não bloqueia)
-    needed_prefixes = [
-        r"^presence_", r"^fans_", r"^posts_", r"^(likes|comments|shares)_",
-        r"^engagement_", r"^var_fans_", r"^var_(likes|comments|shares)_", r"^var_engagement_"
-    ]
-    faltas = []
-    for pref in needed_prefixes:
-        if not any(re.match(pref, c) for c in out.columns):
-            faltas.append(pref)
+    out_sig = _header_signature(out.columns)
+    if out_sig is not None:
+        faltas = list(_missing_prefixes(out_sig))
+    else:
+        faltas = [p for p, rx in zip(_NEEDED_PREFIXES, _NEEDED_PREFIX_RES)
+                  if not any(rx.match(c) for c in out.columns)]
 
     return out, colmap, faltas
 
@@ -260,46 +538,109 @@ def canonicalize_columns(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, str]
 # ============================
 
 def _second_largest(arr: np.ndarray) -> float:
+    """2º maior positivo (o máximo quando só há um; 0 sem positivos), por seleção O(n)."""
     positives = arr[arr > 0]
     if len(positives) <= 1:
         return positives.max() if len(positives) == 1 else 0.0
-    top2 = np.sort(positives)[-2:]
-    return top2[0]
-
-def normalize_0_100_pos_floor_cap(
-    x: pd.Series,
-    piso_positivo: float = 1.0,
-    cap_min: float = 98.0,
-    dominance_factor: float = 10.0,
-) -> pd.Series:
-    vals = pd.to_numeric(x, errors="coerce").fillna(0.0).values.astype(float)
+    return np.partition(positives, len(positives) - 2)[-2]
+
+def _dominance_cap(max_pos, second_pos, cap_min: float, dominance_factor: float):
+    """Teto da escala: 100 quando o líder domina (max/2º >= fator), senão entre cap_min e 100."""
+    max_pos, second_pos = np.asarray(max_pos, dtype=float), np.asarray(second_pos, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denom = np.where(second_pos > 0, second_pos, max_pos)
+        ratio = np.where(denom > 0, max_pos / np.where(denom > 0, denom, 1.0), 1.0)
+        t = np.clip((ratio - 1.0) / max(dominance_factor - 1.0, 1e-9), 0.0, 1.0)
+        cap = np.where(ratio >= dominance_factor, 100.0, cap_min + t * (100.0 - cap_min))
+    return np.where(max_pos > 0, cap, cap_min)
+
+def _normalize_pos_floor_cap_array(
+    vals: np.ndarray,
+    piso_positivo: float,
+    cap_min: float,
+    dominance_factor: float,
+    stats: Tuple[float, float, float] | None = None,
+) -> np.ndarray:
+    """Núcleo de normalize_0_100_pos_floor_cap sobre um array float sem NaN."""
     out = np.zeros_like(vals, dtype=float)
     mask_pos = vals > 0
     if not mask_pos.any():
-        return pd.Series(out, index=x.index)
+        return out
 
     pos_vals = vals[mask_pos]
-    min_pos, max_pos = pos_vals.min(), pos_vals.max()
-    second_pos = _second_largest(vals)
-
-    if max_pos <= 0:
-        cap = cap_min
+    if stats is not None:
+        min_pos, max_pos, second_pos = stats
     else:
-        denom = second_pos if second_pos > 0 else max_pos
-        ratio = max_pos / denom if denom > 0 else 1.0
-        if ratio >= dominance_factor:
-            cap = 100.0
-        else:
-            t = max(0.0, min(1.0, (ratio - 1.0) / max(dominance_factor - 1.0, 1e-9)))
-            cap = cap_min + t * (100.0 - cap_min)
+        min_pos, max_pos = pos_vals.min(), pos_vals.max()
+        second_pos = _second_largest(vals)
+
+    cap = float(_dominance_cap(max_pos, second_pos, cap_min, dominance_factor))
 
     if np.isclose(max_pos, min_pos):
         out[mask_pos] = 0.5 * (piso_positivo + cap)
-        return pd.Series(out, index=x.index)
+        return out
 
     escala = (pos_vals - min_pos) / (max_pos - min_pos)
     out[mask_pos] = piso_positivo + escala * (cap - piso_positivo)
-    return pd.Series(out, index=x.index)
+    return out
+
+def normalize_pos_floor_cap_matrix(
+    m: np.ndarray,
+    piso_positivo: float,
+    cap_min: float,
+    dominance_factor: float,
+    stats: List[Tuple[float, float, float] | None] | None = None,
+) -> np.ndarray:
+    """
+    _normalize_pos_floor_cap_array em todas as colunas de uma matriz (linhas × dimensões)
+    de uma vez, sem sort: min/max positivos por redução mascarada e 2º maior por seleção
+    linear (máximo de novo, sem a posição do argmax). `stats`: (min_pos, max_pos, second_pos)
+    ou None por coluna (streaming). Mesmo resultado, bit a bit, de normalizar coluna a coluna.
+    """
+    m = np.asfortranarray(m, dtype=float)
+    n, k = m.shape
+    if not n:
+        return np.zeros((0, k), dtype=float)
+    mask = m > 0
+    npos = np.count_nonzero(mask, axis=0)
+    top = m.argmax(axis=0)
+    max_pos = m[top, np.arange(k)]
+    min_pos = np.min(m, axis=0, where=mask, initial=np.inf)
+    rest = np.ones((n, k), dtype=bool, order="F")
+    rest[top, np.arange(k)] = False
+    second = np.max(m, axis=0, where=rest, initial=-np.inf)
+    second = np.where(npos >= 2, second, np.where(npos == 1, max_pos, 0.0))
+    for j, st in enumerate(stats or []):
+        if st is not None:
+            min_pos[j], max_pos[j], second[j] = st
+
+    cap = _dominance_cap(max_pos, second, cap_min, dominance_factor)
+    close = np.isclose(max_pos, min_pos)
+    span = np.where(close | (npos == 0), 1.0, max_pos - min_pos)
+    # piso + (v - min)/(max - min) * (cap - piso), in-place; não positivos ficam em 0
+    out = np.subtract(m, np.where(npos > 0, min_pos, 0.0), order="F")
+    out /= span
+    out *= cap - piso_positivo
+    out += piso_positivo
+    for j in np.flatnonzero(close):
+        out[:, j] = 0.5 * (piso_positivo + cap[j])
+    np.copyto(out, 0.0, where=~mask)
+    return out
+
+def normalize_0_100_pos_floor_cap(
+    x: pd.Series,
+    piso_positivo: float = 1.0,
+    cap_min: float = 98.0,
+    dominance_factor: float = 10.0,
+    stats: Tuple[float, float, float] | None = None,
+) -> pd.Series:
+    """
+    `stats` = (min_pos, max_pos, second_pos) já conhecidos (ex.: acumulados bloco a
+    bloco no streaming); sem ele são calculados aqui a partir de x.
+    """
+    vals = pd.to_numeric(x, errors="coerce").fillna(0.0).values.astype(float)
+    return pd.Series(_normalize_pos_floor_cap_array(vals, piso_positivo, cap_min, dominance_factor, stats),
+                     index=x.index)
 
 def apply_platform_weights(df: pd.DataFrame, platform_weights: Dict[str, float]) -> pd.DataFrame:
     """
@@ -316,48 +657,243 @@ def apply_platform_weights(df: pd.DataFrame, platform_weights: Dict[str, float])
     return df
 
 
-def _n01_preserva_zero(s: pd.Series) -> pd.Series:
-    s = pd.to_numeric(s, errors="coerce").fillna(0.0).astype(float)
-    smin, smax = s.min(), s.max()
+def _n01_array(vals: np.ndarray, value_range: Tuple[float, float] | None = None) -> np.ndarray:
+    if not vals.size:
+        return np.zeros(0, dtype=float)
+    smin, smax = value_range if value_range is not None else (vals.min(), vals.max())
     if np.isclose(smax, smin):
-        res = pd.Series(np.zeros(len(s), dtype=float), index=s.index)
-        res[s > 0] = 0.5
+        res = np.zeros(len(vals), dtype=float)
+        res[vals > 0] = 0.5
         return res
-    return (s - smin) / (smax - smin)
+    return (vals - smin) / (smax - smin)
 
-def compute_dimensions_raw(df: pd.DataFrame) -> pd.DataFrame:
-    d = df.copy()
-    if "name" not in d.columns:
-        d = d.reset_index().rename(columns={"index": "name"})
+def _n01_preserva_zero(s: pd.Series, value_range: Tuple[float, float] | None = None) -> pd.Series:
+    s = pd.to_numeric(s, errors="coerce").fillna(0.0).astype(float)
+    return pd.Series(_n01_array(s.to_numpy(), value_range), index=s.index)
+
+# Normalização por grupo (--group-by): mesmas regras de _n01_array e
+# _normalize_pos_floor_cap_array aplicadas dentro de cada grupo, sem laço em Python.
+# As linhas são ordenadas por grupo uma vez (GroupLayout); cada estatística por
+# grupo é um ufunc.reduceat sobre os blocos contíguos, e o resultado volta por codes.
+
+class GroupLayout:
+    """Códigos de grupo por linha + ordem estável que deixa cada grupo contíguo."""
+
+    def __init__(self, keys):
+        codes, labels = pd.factorize(pd.Series(keys), use_na_sentinel=False)  # NaN vira um grupo próprio
+        self.codes = codes.astype(np.intp, copy=False)
+        self.labels = labels
+        self.n = len(labels)
+        self.order = np.argsort(self.codes, kind="stable")
+        counts = np.bincount(self.codes, minlength=self.n)
+        self.starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.intp)
+        self.sorted_codes = self.codes[self.order]
+
+    def reduce(self, ufunc, vals: np.ndarray) -> np.ndarray:
+        """ufunc.reduceat por grupo (vals na ordem original das linhas)."""
+        if not self.n:
+            return np.zeros(0, dtype=vals.dtype)
+        return ufunc.reduceat(vals[self.order], self.starts)
+
+def _n01_grouped(vals: np.ndarray, groups: GroupLayout) -> np.ndarray:
+    """_n01_array com min/max de cada grupo."""
+    if not vals.size:
+        return np.zeros(0, dtype=float)
+    smin, smax = groups.reduce(np.minimum, vals)[groups.codes], groups.reduce(np.maximum, vals)[groups.codes]
+    close = np.isclose(smax, smin)
+    res = (vals - smin) / np.where(close, 1.0, smax - smin)
+    res[close] = np.where(vals[close] > 0, 0.5, 0.0)
+    return res
+
+def _positive_stats_grouped(vals: np.ndarray, groups: GroupLayout):
+    """Por grupo: (nº de positivos, min_pos, max_pos, _second_largest) em O(n) após a ordenação por grupo."""
+    sv = vals[groups.order]
+    pos = sv > 0
+    hi = np.where(pos, sv, -np.inf)
+    npos = np.add.reduceat(pos.astype(np.int64), groups.starts)
+    min_pos = np.minimum.reduceat(np.where(pos, sv, np.inf), groups.starts)
+    max_pos = np.maximum.reduceat(hi, groups.starts)
+    # 2º maior: tira uma ocorrência do máximo de cada grupo e toma o máximo de novo
+    at_max = np.flatnonzero(hi == max_pos[groups.sorted_codes])
+    first = at_max[np.r_[True, groups.sorted_codes[at_max[1:]] != groups.sorted_codes[at_max[:-1]]]]
+    hi[first] = -np.inf
+    second = np.maximum.reduceat(hi, groups.starts)
+    second = np.where(npos >= 2, second, np.where(npos == 1, max_pos, 0.0))
+    return npos, min_pos, max_pos, second
+
+def normalize_pos_floor_cap_grouped(vals: np.ndarray, groups: GroupLayout, piso_positivo: float,
+                                    cap_min: float, dominance_factor: float) -> np.ndarray:
+    """_normalize_pos_floor_cap_array aplicada dentro de cada grupo, num passe vetorizado."""
+    out = np.zeros_like(vals, dtype=float)
+    if not vals.size:
+        return out
+    npos, min_pos, max_pos, second_pos = _positive_stats_grouped(vals, groups)
+    has_pos = npos > 0
+    cap = _dominance_cap(max_pos, second_pos, cap_min, dominance_factor)
+    close = np.isclose(max_pos, min_pos)
+    span = np.where(close | ~has_pos, 1.0, max_pos - min_pos)
+
+    mask_pos = vals > 0
+    g = groups.codes[mask_pos]
+    escala = (vals[mask_pos] - min_pos[g]) / span[g]
+    out[mask_pos] = np.where(close[g], 0.5 * (piso_positivo + cap[g]), piso_positivo + escala * (cap[g] - piso_positivo))
+    return out
 
-    d["pop_raw"] = d.filter(regex=r"^fans_").apply(pd.to_numeric, errors="coerce").fillna(0.0).sum(axis=1)
-    var_fans       = d.filter(regex=r"^var_fans_").apply(pd.to_numeric, errors="coerce").fillna(0.0).sum(axis=1)
-    var_reactions  = d.filter(regex=r"^var_(likes|comments|shares)_").apply(pd.to_numeric, errors="coerce").fillna(0.0).sum(axis=1)
-    var_engagement = d.filter(regex=r"^var_engagement_").apply(pd.to_numeric, errors="coerce").fillna(0.0).sum(axis=1)
-
-    vf = _n01_preserva_zero(var_fans)
-    vr = _n01_preserva_zero(var_reactions)
-    ve = _n01_preserva_zero(var_engagement)
-    d["score_crescimento"] = (3*vf + vr + 2*ve) / 8.0
-    max_pop = max(d["pop_raw"].max(), 1.0)
-    d["pop_final_raw"] = 0.9 * d["pop_raw"] + 0.1 * d["score_crescimento"] * max_pop
-
-    d["ativ_raw"] = d.filter(regex=r"^posts_").apply(pd.to_numeric, errors="coerce").fillna(0.0).sum(axis=1)
-
-    eng_cols = [c for c in ["engagement_facebook","engagement_instagram","engagement_twitter","engagement_tiktok"] if c in d.columns]
-    if eng_cols:
-        tmp = d[eng_cols].apply(pd.to_numeric, errors="coerce").fillna(0.0)
-        n_redes = tmp.notna().sum(axis=1).clip(lower=1)
-        d["eng_media"] = tmp.sum(axis=1) / n_redes
+def normalize_0_100_pos_floor_cap_grouped(x: pd.Series, keys, piso_positivo: float = 1.0, cap_min: float = 98.0,
+                                          dominance_factor: float = 10.0) -> pd.Series:
+    """normalize_0_100_pos_floor_cap por grupo (`keys`: rótulo do grupo de cada linha)."""
+    vals = pd.to_numeric(x, errors="coerce").fillna(0.0).values.astype(float)
+    groups = keys if isinstance(keys, GroupLayout) else GroupLayout(keys)
+    return pd.Series(normalize_pos_floor_cap_grouped(vals, groups, piso_positivo, cap_min, dominance_factor),
+                     index=x.index)
+
+def group_layout(df: pd.DataFrame, column: str, renamed: Dict[str, str] | None = None) -> GroupLayout:
+    """GroupLayout da coluna --group-by (aceita o nome original de uma coluna renomeada por sinônimo)."""
+    col = (renamed or {}).get(column, column)
+    if col not in df.columns:
+        raise ValueError(f"--group-by: coluna {column!r} não encontrada na planilha")
+    return GroupLayout(df[col].to_numpy())
+
+def _attach_group(result: pd.DataFrame, groups: GroupLayout, column: str) -> pd.DataFrame:
+    """Resultado com a coluna do grupo logo depois de 'name' (--group-by name não duplica)."""
+    if column not in result.columns:
+        result.insert(1, column, groups.labels.take(groups.codes))
+    return result
+
+# Grupos de colunas por dimensão (mesmos filtros de sempre). A matriz numérica
+# tem uma coluna por coluna usada, convertida uma única vez.
+_DIM_GROUP_RES = {
+    "pop_raw":        re.compile(r"^fans_"),
+    "var_fans":       re.compile(r"^var_fans_"),
+    "var_reactions":  re.compile(r"^var_(likes|comments|shares)_"),
+    "var_engagement": re.compile(r"^var_engagement_"),
+    "ativ_raw":       re.compile(r"^posts_"),
+    "reacts":         re.compile(r"^(likes|comments|shares)_(facebook|instagram|twitter|tiktok)$"),
+    "dif_raw":        re.compile(r"^shares_(facebook|twitter|tiktok)$"),
+}
+_ENG_COLS = ["engagement_facebook", "engagement_instagram", "engagement_twitter", "engagement_tiktok"]
+
+# Somas por linha; as que passam por _n01_array (ou por max) dependem de min/max
+# da coluna inteira e são finalizadas depois (no streaming, com os acumulados).
+_DIM_PARTS = ["pop_raw", "var_fans", "var_reactions", "var_engagement", "ativ_raw", "eng_media", "reacts", "dif_raw"]
+_DIM_PARTS_RANGED = ["pop_raw", "var_fans", "var_reactions", "var_engagement", "reacts"]
+_RAW_DIM_COLS = ["pop_raw", "score_crescimento", "pop_final_raw", "ativ_raw", "eng_media", "eng_raw", "dif_raw"]
+
+def _column_groups_uncached(columns: Tuple) -> Tuple[Tuple[int, ...], Dict[str, Tuple[int, ...]]]:
+    names = [str(c) for c in columns]
+    groups = {g: [i for i, c in enumerate(names) if rx.search(c)] for g, rx in _DIM_GROUP_RES.items()}
+    # engagement na ordem fixa da lista (como d[eng_cols]), não na ordem do arquivo
+    groups["eng"] = [i for c in _ENG_COLS for i, n in enumerate(columns) if n == c]
+    groups["presence"] = [i for i, c in enumerate(names) if c.startswith("presence_")]
+    used = tuple(sorted({i for idx in groups.values() for i in idx}))
+    slot = {pos: j for j, pos in enumerate(used)}
+    return used, {g: tuple(slot[i] for i in idx) for g, idx in groups.items()}
+
+@lru_cache(maxsize=256)
+def _column_groups_cached(columns: Tuple):
+    return _column_groups_uncached(columns)
+
+def dimension_column_groups(columns) -> Tuple[Tuple[int, ...], Dict[str, Tuple[int, ...]]]:
+    """
+    (posições das colunas usadas, {grupo: colunas da matriz}) para um cabeçalho.
+    Cabeçalhos repetidos (mesma assinatura) não reavaliam as regex.
+    """
+    cols = tuple(columns)
+    try:
+        return _column_groups_cached(cols)
+    except TypeError:  # rótulos não-hasheáveis
+        return _column_groups_uncached(cols)
+
+def numeric_matrix(df: pd.DataFrame, positions: Tuple[int, ...], dtype=np.float64) -> np.ndarray:
+    """Matriz (linhas × colunas usadas), Fortran-contígua, convertida uma vez (to_numeric + NaN->0)."""
+    m = np.empty((len(df), len(positions)), dtype=dtype, order="F")
+    dtypes = df.dtypes.to_numpy()
+    # colunas já numéricas (numpy) saem num único to_numpy; o resto passa por to_numeric
+    fast = [j for j, pos in enumerate(positions)
+            if isinstance(dtypes[pos], np.dtype) and dtypes[pos].kind in "biuf"]
+    if fast:
+        m[:, fast] = df.iloc[:, [positions[j] for j in fast]].to_numpy(dtype=float)
+    fast_set = set(fast)
+    for j, pos in enumerate(positions):
+        if j not in fast_set:
+            m[:, j] = pd.to_numeric(df.iloc[:, pos], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    np.nan_to_num(m, copy=False, nan=0.0)
+    return m
+
+def _group_sum(m: np.ndarray, idx: Tuple[int, ...]) -> np.ndarray:
+    """Soma das colunas do grupo, em float64 e na ordem das colunas (= DataFrame.sum(axis=1))."""
+    acc = np.zeros(m.shape[0], dtype=float)
+    for j in idx:
+        acc += m[:, j]
+    return acc
+
+def _dimension_parts(d: pd.DataFrame, dtype=np.float64) -> Dict[str, np.ndarray]:
+    """Parte linha a linha das dimensões (serve igual para um bloco do arquivo) + presença 0–100."""
+    positions, groups = dimension_column_groups(d.columns)
+    m = numeric_matrix(d, positions, dtype)
+    parts = {g: _group_sum(m, groups[g]) for g in _DIM_GROUP_RES}
+    eng = groups["eng"]
+    parts["eng_media"] = _group_sum(m, eng) / max(len(eng), 1) if eng else np.zeros(len(d), dtype=float)
+    pres = groups["presence"]
+    if pres:
+        count_present = np.zeros(len(d), dtype=np.int64)
+        for j in pres:
+            count_present += m[:, j] > 0
+        parts["presenca_100"] = (count_present / len(pres)) * 100.0
+    else:
+        parts["presenca_100"] = np.zeros(len(d), dtype=float)
+    return parts
+
+def _finish_dimension_arrays(parts: Dict[str, np.ndarray],
+                             ranges: Dict[str, Tuple[float, float]] | None = None,
+                             groups: GroupLayout | None = None) -> Dict[str, np.ndarray]:
+    """
+    Combina as somas em pop_final_raw/eng_raw. `ranges` ({parte: (min, max)}) vem do
+    streaming; sem ele min/max saem dos próprios arrays (de cada grupo, com `groups`).
+    """
+    ranges = ranges or {}
+    if groups is not None:
+        n01 = lambda part: _n01_grouped(parts[part], groups)
+    else:
+        n01 = lambda part: _n01_array(parts[part], ranges.get(part))
+    raw = {"pop_raw": parts["pop_raw"]}
+    vf, vr, ve = n01("var_fans"), n01("var_reactions"), n01("var_engagement")
+    raw["score_crescimento"] = (3*vf + vr + 2*ve) / 8.0
+    if groups is not None:
+        max_pop = np.maximum(groups.reduce(np.maximum, raw["pop_raw"]), 1.0)[groups.codes]
     else:
-        d["eng_media"] = 0.0
-    reacts = d.filter(regex=r"^(likes|comments|shares)_(facebook|instagram|twitter|tiktok)$") \
-              .apply(pd.to_numeric, errors="coerce").fillna(0.0).sum(axis=1)
-    reacts_n01 = _n01_preserva_zero(reacts)
-    d["eng_raw"] = d["eng_media"] + 0.1 * reacts_n01
+        pop_max = ranges["pop_raw"][1] if "pop_raw" in ranges else (raw["pop_raw"].max() if len(raw["pop_raw"]) else np.nan)
+        max_pop = max(pop_max, 1.0)
+    raw["pop_final_raw"] = 0.9 * raw["pop_raw"] + 0.1 * raw["score_crescimento"] * max_pop
 
-    d["dif_raw"] = d.filter(regex=r"^shares_(facebook|twitter|tiktok)$").apply(pd.to_numeric, errors="coerce").fillna(0.0).sum(axis=1)
+    raw["ativ_raw"] = parts["ativ_raw"]
+    raw["eng_media"] = parts["eng_media"]
+    reacts_n01 = n01("reacts")
+    raw["eng_raw"] = raw["eng_media"] + 0.1 * reacts_n01
 
+    raw["dif_raw"] = parts["dif_raw"]
+    return raw
+
+def compute_dimension_arrays(df: pd.DataFrame, dtype=np.float64,
+                             groups: GroupLayout | None = None) -> Tuple[pd.Series, Dict[str, np.ndarray]]:
+    """
+    Núcleo de compute_dimensions_raw sem copiar o DataFrame: (name, {dimensão bruta: array}),
+    incluindo presenca_100. dtype=np.float32 guarda a matriz numérica em metade da memória
+    (somas continuam em float64). `groups`: min/max das partes calculados por grupo.
+    """
+    names = df["name"] if "name" in df.columns else pd.Series(df.index, index=df.index, name="name")
+    parts = _dimension_parts(df, dtype)
+    raw = _finish_dimension_arrays(parts, groups=groups)
+    raw["presenca_100"] = parts["presenca_100"]
+    return names, raw
+
+def compute_dimensions_raw(df: pd.DataFrame) -> pd.DataFrame:
+    d = df.copy()
+    if "name" not in d.columns:
+        d = d.reset_index().rename(columns={"index": "name"})
+    raw = _finish_dimension_arrays(_dimension_parts(d))
+    for col in _RAW_DIM_COLS:
+        d[col] = raw[col]
     d.attrs["presence_cols"] = [c for c in d.columns if c.startswith("presence_")]
     return d
 
@@ -370,19 +906,68 @@ def compute_presence_score_0_100(df_with_presence: pd.DataFrame) -> pd.Series:
     count_present = (pres_df > 0).sum(axis=1)
     return (count_present / num_networks) * 100.0
 
-def to_scores_0_100_other_dims(dims_df: pd.DataFrame, piso_positivo: float, cap_min: float, dominance_factor: float) -> pd.DataFrame:
+_SCORE_SOURCES = [("popularidade_100", "pop_final_raw"), ("atividade_100", "ativ_raw"),
+                  ("engajamento_100", "eng_raw"), ("difusao_100", "dif_raw")]
+
+def dimension_scores_0_100(raw: Dict[str, np.ndarray], piso_positivo: float, cap_min: float, dominance_factor: float,
+                           stats: Dict[str, Tuple[float, float, float]] | None = None,
+                           groups: GroupLayout | None = None) -> Dict[str, np.ndarray]:
+    """
+    POP/ATIV/ENG/DIF 0–100 a partir dos arrays brutos (+ presenca_100 repassada).
+    Com `groups`, cada dimensão é normalizada dentro do próprio grupo.
+    """
+    stats = stats or {}
+    out = {"presenca_100": raw["presenca_100"]}
+    if groups is not None:
+        for dst, src in _SCORE_SOURCES:
+            out[dst] = normalize_pos_floor_cap_grouped(np.asarray(raw[src], dtype=float), groups,
+                                                       piso_positivo, cap_min, dominance_factor)
+        return out
+    # as quatro dimensões numa matriz só: um passe de redução/seleção por estatística
+    m = np.empty((len(raw["presenca_100"]), len(_SCORE_SOURCES)), dtype=float, order="F")
+    for j, (_, src) in enumerate(_SCORE_SOURCES):
+        m[:, j] = raw[src]
+    scores = normalize_pos_floor_cap_matrix(m, piso_positivo, cap_min, dominance_factor,
+                                            [stats.get(src) for _, src in _SCORE_SOURCES])
+    for j, (dst, _) in enumerate(_SCORE_SOURCES):
+        out[dst] = scores[:, j]
+    return out
+
+def to_scores_0_100_other_dims(dims_df: pd.DataFrame, piso_positivo: float, cap_min: float, dominance_factor: float,
+                               stats: Dict[str, Tuple[float, float, float]] | None = None) -> pd.DataFrame:
+    """`stats`: {coluna_raw: (min_pos, max_pos, second_pos)} já acumulados (opcional, por coluna)."""
+    stats = stats or {}
     d = dims_df.copy()
-    d["popularidade_100"] = normalize_0_100_pos_floor_cap(d["pop_final_raw"], piso_positivo, cap_min, dominance_factor)
-    d["atividade_100"]    = normalize_0_100_pos_floor_cap(d["ativ_raw"], piso_positivo, cap_min, dominance_factor)
-    d["engajamento_100"]  = normalize_0_100_pos_floor_cap(d["eng_raw"], piso_positivo, cap_min, dominance_factor)
-    d["difusao_100"]      = normalize_0_100_pos_floor_cap(d["dif_raw"], piso_positivo, cap_min, dominance_factor)
+    for dst, src in _SCORE_SOURCES:
+        d[dst] = normalize_0_100_pos_floor_cap(d[src], piso_positivo, cap_min, dominance_factor, stats.get(src))
     return d
 
-def weighted_final_score_0_100(dims_df: pd.DataFrame, w: Dict[str, float]) -> pd.DataFrame:
-    d = dims_df.copy()
+_RESULT_COLS = ["name", "presenca_100", "popularidade_100", "atividade_100", "engajamento_100", "difusao_100", "sir_final_0_100"]
+
+def _normalized_weights(w: Dict[str, float]) -> Dict[str, float]:
     weights = {k: float(v) for k, v in w.items()}
     wsum = sum(weights.values()) or 1.0
     for k in weights: weights[k] /= wsum
+    return weights
+
+def weighted_final_from_arrays(names: pd.Series, dims_100: Dict[str, np.ndarray], w: Dict[str, float]) -> pd.DataFrame:
+    """Resultado final (name + *_100 + sir_final_0_100) montado uma vez a partir dos arrays."""
+    weights = _normalized_weights(w)
+    final = (
+        weights["presenca"]     * dims_100["presenca_100"] +
+        weights["popularidade"] * dims_100["popularidade_100"] +
+        weights["atividade"]    * dims_100["atividade_100"] +
+        weights["engajamento"]  * dims_100["engajamento_100"] +
+        weights["difusao"]      * dims_100["difusao_100"]
+    )
+    data = {"name": names.to_numpy()}
+    data.update({c: dims_100[c] for c in _RESULT_COLS[1:-1]})
+    data["sir_final_0_100"] = final
+    return pd.DataFrame(data, index=names.index, columns=_RESULT_COLS)
+
+def weighted_final_score_0_100(dims_df: pd.DataFrame, w: Dict[str, float]) -> pd.DataFrame:
+    d = dims_df.copy()
+    weights = _normalized_weights(w)
     d["presenca_100"] = d.get("presenca_100", 0.0)
     d["sir_final_0_100"] = (
         weights["presenca"]     * d["presenca_100"] +
@@ -391,13 +976,13 @@ def weighted_final_score_0_100(dims_df: pd.DataFrame, w: Dict[str, float]) -> pd
         weights["engajamento"]  * d["engajamento_100"] +
         weights["difusao"]      * d["difusao_100"]
     )
-    cols = ["name","presenca_100","popularidade_100","atividade_100","engajamento_100","difusao_100","sir_final_0_100"]
+    cols = _RESULT_COLS
     for c in cols:
         if c not in d.columns: d[c] = np.nan
     return d[cols].copy()
 
 # ============================
-# Plots (inalterado)
+# Plots (API orientada a objetos + Agg; sem estado global do pyplot)
 # ============================
 
 def _safe_filename(text: str) -> str:
@@ -405,50 +990,131 @@ def _safe_filename(text: str) -> str:
     out = "".join(("_" if ch in bad else ch) for ch in str(text))
     return out.strip("_")
 
-def plot_bar_sorted(df: pd.DataFrame, value_col: str, name_col: str, out_png: str,
-                    width_in: float = 12.0, height_in: float = 6.0, color_hex: str = "#2e95d3"):
+def _agg_figure(width_in: float, height_in: float, nrows: int = 1):
+    """Figure + canvas Agg isolados (thread/process-safe; não toca o pyplot)."""
+    from matplotlib.figure import Figure  # pesado: só quando há plots
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=(width_in, height_in * nrows))
+    FigureCanvasAgg(fig)
+    return fig
+
+def _draw_bar_sorted(ax, df: pd.DataFrame, value_col: str, name_col: str, color_hex: str):
     work = df[[name_col, value_col]].dropna().copy()
     work[value_col] = pd.to_numeric(work[value_col], errors="coerce")
     work = work.sort_values(by=value_col, ascending=False)
 
-    plt.figure(figsize=(width_in, height_in))
-    ax = plt.gca()
     ax.bar(work[name_col], work[value_col], color=color_hex)
     for i, (x, y) in enumerate(zip(work[name_col], work[value_col])):
         ax.text(i, y, f"{y:.2f}", ha="center", va="bottom", fontsize=9, fontweight="bold")
     ax.set_title(value_col); ax.set_xlabel(""); ax.set_ylabel("")
-    plt.xticks(rotation=45, ha="right", fontsize=10, fontweight="bold")
-    plt.tight_layout()
-    os.makedirs(os.path.dirname(out_png), exist_ok=True)
-    plt.savefig(out_png, dpi=150)
-    plt.close()
+    for lbl in ax.get_xticklabels():
+        lbl.set(rotation=45, ha="right", fontsize=10, fontweight="bold")
 
-def make_all_bar_charts(results_xlsx: str, sheet: int|str, output_dir: str,
-                        bar_width: float, bar_height: float, plot_prefix: str,
-                        name_col: str = "name", columns: List[str] | None = None):
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir, exist_ok=True)
-    data = pd.read_excel(results_xlsx, sheet_name=sheet)
+def plot_bar_sorted(df: pd.DataFrame, value_col: str, name_col: str, out_png: str,
+                    width_in: float = 12.0, height_in: float = 6.0, color_hex: str = "#2e95d3"):
+    fig = _agg_figure(width_in, height_in)
+    _draw_bar_sorted(fig.add_subplot(), df, value_col, name_col, color_hex)
+    fig.tight_layout()
+    # formato sai da extensão (.png, .svg, ...), preservada no temporário
+    with atomic_output(out_png) as tmp:
+        fig.savefig(tmp, dpi=150)
+
+def plot_bar_panel(df: pd.DataFrame, columns: List[str], name_col: str, out_path: str,
+                   width_in: float = 12.0, height_in: float = 6.0, color_hex: str = "#2e95d3"):
+    """Todas as colunas num único arquivo (um painel por métrica): um só encode."""
+    fig = _agg_figure(width_in, height_in, nrows=len(columns))
+    axes = fig.subplots(len(columns), 1, squeeze=False)[:, 0]
+    for ax, col in zip(axes, columns):
+        _draw_bar_sorted(ax, df, col, name_col, color_hex)
+    fig.tight_layout()
+    with atomic_output(out_path) as tmp:
+        fig.savefig(tmp, dpi=150)
+
+def _plot_task(task: Tuple) -> Tuple[str, str | None]:
+    """Executa um plot no pool; devolve (coluna, erro)."""
+    data, col, name_col, out_path, width_in, height_in = task
+    try:
+        plot_bar_sorted(data, col, name_col, out_path, width_in, height_in)
+        return col, None
+    except Exception as e:
+        return col, str(e)
+
+def render_bar_charts(data: pd.DataFrame, output_dir: str, bar_width: float, bar_height: float,
+                      plot_prefix: str, name_col: str = "name", columns: List[str] | None = None,
+                      fmt: str = "png", combined: bool = False, jobs: int | None = None) -> List[str]:
+    """
+    Gera os gráficos direto do DataFrame em memória (sem ida e volta por XLSX).
+    - fmt: "png" ou "svg" (svg evita o custo de encode PNG)
+    - combined: um único arquivo <prefix>painel.<fmt> com todas as colunas
+    - jobs: processos para renderizar colunas em paralelo (padrão: min(CPUs, colunas))
+    Retorna os caminhos gerados.
+    """
+    os.makedirs(output_dir, exist_ok=True)
     if columns is None:
         columns = [c for c in data.columns if c != name_col]
     if "INFLUENCIA_DIGITAL" in data.columns and "INFLUENCIA_DIGITAL" not in columns:
         columns.append("INFLUENCIA_DIGITAL")
-    for col in columns:
-        if col not in data.columns:
-            continue
-        fname = f"{plot_prefix}{_safe_filename(col)}.png"
-        out_png = os.path.join(output_dir, fname)
+    columns = [c for c in columns if c in data.columns]
+    if not columns:
+        return []
+
+    if combined:
+        out_path = os.path.join(output_dir, f"{plot_prefix}painel.{fmt}")
         try:
-            plot_bar_sorted(data, col, name_col, out_png, bar_width, bar_height)
+            plot_bar_panel(data, columns, name_col, out_path, bar_width, bar_height)
+            return [out_path]
         except Exception as e:
-            print(f"[WARN] Falha ao plotar {col}: {e}")
+            print(f"[WARN] Falha ao plotar painel: {e}")
+            return []
+
+    tasks = [
+        (data[[name_col, col]], col, name_col,
+         os.path.join(output_dir, f"{plot_prefix}{_safe_filename(col)}.{fmt}"), bar_width, bar_height)
+        for col in columns
+    ]
+    jobs = max(1, min(jobs or (os.cpu_count() or 1), len(tasks)))
+    if jobs == 1:
+        results = [_plot_task(t) for t in tasks]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        _agg_figure(1, 1)  # importa matplotlib antes do fork: workers herdam o módulo
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_plot_task, tasks))
+
+    written = []
+    for (col, err), task in zip(results, tasks):
+        if err:
+            print(f"[WARN] Falha ao plotar {col}: {err}")
+        else:
+            written.append(task[3])
+    return written
+
+def make_all_bar_charts(results_xlsx: str, sheet: int|str, output_dir: str,
+                        bar_width: float, bar_height: float, plot_prefix: str,
+                        name_col: str = "name", columns: List[str] | None = None):
+    """Compatibilidade: lê um XLSX (ou .parquet/.arrow) já gravado e delega para render_bar_charts."""
+    if os.path.splitext(results_xlsx)[1].lower() in (".parquet", ".arrow"):
+        data = read_columnar(results_xlsx)
+    else:
+        data = pd.read_excel(results_xlsx, sheet_name=sheet)
+    render_bar_charts(data, output_dir, bar_width, bar_height, plot_prefix,
+                      name_col=name_col, columns=columns, jobs=1)
 
 # ============================
 # Export para aba Metrics (formato long)
 # ============================
 
-def export_metrics_long(df_raw: pd.DataFrame, out_csv: str):
-    # detecta possíveis períodos
+_EXPORT_METRICS = [
+    "fans", "posts", "likes", "comments", "shares", "engagement",
+    "var_fans", "var_likes", "var_comments", "var_shares", "var_engagement",
+]
+_EXPORT_COLUMNS = ["name", "platform", "metric", "value", "period_start", "period_end"]
+_EXPORT_EMPTY_COLUMNS = ["name", "platform", "metric", "period_start", "period_end", "value"]
+
+def _detect_period_columns(df_raw: pd.DataFrame) -> Tuple[str | None, str | None]:
+    # detecta possíveis períodos (a última coluna compatível vence, como antes)
     pstart = None
     pend = None
     for c in df_raw.columns:
@@ -456,67 +1122,1630 @@ def export_metrics_long(df_raw: pd.DataFrame, out_csv: str):
             pstart = c
         if c.lower() in ["period_end", "date_to", "fim_periodo", "end_date"]:
             pend = c
+    return pstart, pend
 
-    records = []
-    for plat in _CANON_PLATFORMS:
-        pairs = [
-            ("fans",           f"fans_{plat}"),
-            ("posts",          f"posts_{plat}"),
-            ("likes",          f"likes_{plat}"),
-            ("comments",       f"comments_{plat}"),
-            ("shares",         f"shares_{plat}"),
-            ("engagement",     f"engagement_{plat}"),
-            ("var_fans",       f"var_fans_{plat}"),
-            ("var_likes",      f"var_likes_{plat}"),
-            ("var_comments",   f"var_comments_{plat}"),
-            ("var_shares",     f"var_shares_{plat}"),
-            ("var_engagement", f"var_engagement_{plat}"),
-        ]
-        for metric, col in pairs:
-            if col not in df_raw.columns:
-                continue
-            for _, row in df_raw.iterrows():
-                rec = {
-                    "name": row.get("name"),
-                    "platform": plat,
-                    "metric": metric,
-                    "value": pd.to_numeric(row.get(col), errors="coerce"),
-                    "period_start": row.get(pstart) if pstart else None,
-                    "period_end":   row.get(pend)   if pend   else None,
-                }
-                records.append(rec)
-
-    if not records:
-        # Se nada foi mapeado, salva um CSV vazio com header para não quebrar o front
-        cols = ["name","platform","metric","period_start","period_end","value"]
-        pd.DataFrame(columns=cols).to_csv(out_csv, index=False, encoding="utf-8")
-        return
+def _row_upcast_dtype(df: pd.DataFrame):
+    """
+    Reproduz o upcast que `iterrows()` fazia: se todas as colunas forem numéricas
+    (sem bool), cada linha vira um único dtype comum (ex.: int -> float).
+    Retorna None quando as linhas permaneceriam object.
+    """
+    dtypes = list(df.dtypes)
+    if not dtypes:
+        return None
+    for t in dtypes:
+        if not pd.api.types.is_numeric_dtype(t) or pd.api.types.is_bool_dtype(t):
+            return None
+        if not isinstance(t, np.dtype):
+            return None
+    return np.result_type(*dtypes)
+
+def build_metrics_long(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Monta a tabela long (name/platform/metric/value/period_start/period_end) num
+    único reshape colunar: um bloco de len(df) linhas por par (plataforma, métrica)
+    presente, na mesma ordem do antigo laço com iterrows.
+    Retorna DataFrame vazio (sem colunas) quando nada foi mapeado.
+    """
+    pstart, pend = _detect_period_columns(df_raw)
 
-    out = pd.DataFrame.from_records(records)
+    blocks = [
+        (plat, metric, f"{metric}_{plat}")
+        for plat in _CANON_PLATFORMS
+        for metric in _EXPORT_METRICS
+        if f"{metric}_{plat}" in df_raw.columns
+    ]
+    n = len(df_raw)
+    if not blocks or n == 0:
+        return pd.DataFrame()
+
+    k = len(blocks)
+    upcast = _row_upcast_dtype(df_raw)
+    rows_idx = np.tile(np.arange(n), k)
+
+    def _repeat_col(col: str | None):
+        if col is None or col not in df_raw.columns:
+            return np.full(n * k, None, dtype=object)
+        s = df_raw[col].take(rows_idx).reset_index(drop=True)
+        return s.astype(upcast) if upcast is not None else s
+
+    values = np.concatenate([
+        pd.to_numeric(df_raw[col], errors="coerce").to_numpy() for _, _, col in blocks
+    ])
+    if upcast is not None:
+        values = values.astype(upcast)
+
+    plat_cats = [p for p in _CANON_PLATFORMS if any(b[0] == p for b in blocks)]
+    metric_cats = [m for m in _EXPORT_METRICS if any(b[1] == m for b in blocks)]
+    plat_codes = np.repeat([plat_cats.index(b[0]) for b in blocks], n)
+    metric_codes = np.repeat([metric_cats.index(b[1]) for b in blocks], n)
+
+    out = pd.DataFrame({
+        "name": _repeat_col("name"),
+        "platform": pd.Categorical.from_codes(plat_codes, plat_cats),
+        "metric": pd.Categorical.from_codes(metric_codes, metric_cats),
+        "value": values,
+        "period_start": _repeat_col(pstart),
+        "period_end": _repeat_col(pend),
+    }, columns=_EXPORT_COLUMNS)
     # garantir 1 casa decimal apenas na coluna numérica 'value'
-    if "value" in out.columns:
-        out["value"] = pd.to_numeric(out["value"], errors="coerce").round(1)
-    out.to_csv(out_csv, index=False, encoding="utf-8", float_format="%.1f")
+    out["value"] = pd.to_numeric(out["value"], errors="coerce").round(1)
+    return out
+
+def write_metrics_long(out: pd.DataFrame, out_csv: str):
+    """Grava a tabela de build_metrics_long no formato do __MetricsExport.csv."""
+    if out.empty and not len(out.columns):
+        # Se nada foi mapeado, salva um CSV vazio com header para não quebrar o front
+        out = pd.DataFrame(columns=_EXPORT_EMPTY_COLUMNS)
+    with atomic_output(out_csv) as tmp:
+        out.to_csv(tmp, index=False, encoding="utf-8", float_format="%.1f")
+
+def export_metrics_long(df_raw: pd.DataFrame, out_csv: str):
+    write_metrics_long(build_metrics_long(df_raw), out_csv)
+
+# ============================
+# Ingestão em streaming de CSV grande (--stream)
+# ============================
+
+# Dois passes em blocos de --chunk-rows linhas, memória limitada pelo bloco:
+#  1) scan: tipo final de cada coluna (como o pandas inferiria lendo tudo) e a
+#     decisão do /100 das colunas percentuais, que olham a coluna inteira;
+#  2) score: limpeza + somas por linha de cada bloco, min/max/top-2 acumulados e
+#     o MetricsExport gravado por bloco. Só name + ~10 floats por linha ficam em
+#     memória; a normalização roda no fim sobre esse resumo.
+_STREAM_SNIFF_BYTES = 64 * 1024
+_STREAM_INT_RE = re.compile(r"^\s*[+-]?\d+\s*$")
+_KIND_RANK = {"empty": 0, "int": 1, "float": 2, "object": 3}
+
+def sniff_csv(path: str, nbytes: int = _STREAM_SNIFF_BYTES) -> Tuple[str, str]:
+    """(separador, encoding) a partir dos primeiros bytes: utf-8 se decodificar, senão latin1."""
+    with open(path, "rb") as fh:
+        head = fh.read(nbytes)
+    try:
+        text = codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        encoding = "utf-8"
+    except UnicodeDecodeError:
+        text = head.decode("latin1")
+        encoding = "latin1"
+    lines = text.lstrip("\ufeff").splitlines()
+    header = lines[0] if lines else ""
+    sep = max([",", ";", "\t"], key=header.count)  # empate (ou nada) -> ","
+    return sep, encoding
+
+def _csv_chunks(path: str, sep: str, encoding: str, chunk_rows: int):
+    """Blocos do CSV com todas as células como texto (NaN para vazios)."""
+    return pd.read_csv(path, sep=sep, encoding=encoding, dtype=str, chunksize=max(1, int(chunk_rows)))
+
+def _text_kind(s: pd.Series) -> str:
+    """Tipo que o parser do pandas daria a esta coluna de texto: empty|int|float|object."""
+    na = s.isna()
+    nonnull = s[~na]
+    if nonnull.empty:
+        return "empty"
+    if pd.to_numeric(nonnull, errors="coerce").isna().any():
+        return "object"
+    if not na.any() and nonnull.str.match(_STREAM_INT_RE).all():
+        return "int"
+    return "float"
+
+def _merge_kind(a: str | None, b: str) -> str:
+    if a is None or a == b:
+        return b
+    top = max(a, b, key=_KIND_RANK.get)
+    # int + (float|empty) -> float: alguma linha tem NaN ou decimal
+    return "float" if top == "int" else top
+
+def _apply_kinds(chunk: pd.DataFrame, kinds: Dict[str, str]) -> pd.DataFrame:
+    for col, kind in kinds.items():
+        if kind == "int":
+            chunk[col] = pd.to_numeric(chunk[col]).astype(np.int64)
+        elif kind in ("float", "empty"):
+            chunk[col] = pd.to_numeric(chunk[col]).astype(float)
+    return chunk
+
+def _percent_decision(any_pct: bool, count: int, vmin: float, vmax: float) -> bool:
+    """Mesma regra de _finish_numeric_one_decimal, com estatísticas da coluna inteira."""
+    if any_pct:
+        return True
+    return bool(count) and 0.0 <= vmin and vmax <= 100.0 and vmax > 1.0
+
+def scan_csv(path: str, chunk_rows: int) -> Dict:
+    """
+    Passe 1: separador/encoding (uma vez), tipo final de cada coluna e, para as colunas
+    percentuais, se o valor deve ser dividido por 100. Não guarda linhas.
+    """
+    sep, encoding = sniff_csv(path)
+    kinds: Dict[str, str | None] = {}
+    colmap: Dict[str, str] | None = None
+    # por coluna percentual: [any_pct, n_txt, min_txt, max_txt, n_num, min_num, max_num]
+    pct: Dict[str, List] = {}
+    rows = 0
+    for chunk in _csv_chunks(path, sep, encoding, chunk_rows):
+        if colmap is None:
+            _, applied, _ = canonicalize_columns(chunk.head(0))
+            colmap = {c: applied.get(c, c) for c in chunk.columns}
+            pct = {c: [False, 0, np.inf, -np.inf, 0, np.inf, -np.inf]
+                   for c in chunk.columns if _is_percent_col(str(colmap[c]))}
+        rows += len(chunk)
+        for col in chunk.columns:
+            kinds[col] = _merge_kind(kinds.get(col), _text_kind(chunk[col]))
+        for col, acc in pct.items():
+            (txt,), (had,) = _parse_object_columns([chunk[col].to_numpy()])
+            num = pd.to_numeric(chunk[col], errors="coerce").to_numpy(dtype=float)
+            acc[0] = acc[0] or had
+            for base, vals in ((1, txt), (4, num)):
+                vals = vals[~np.isnan(vals)]
+                if vals.size:
+                    acc[base] += vals.size
+                    acc[base + 1] = min(acc[base + 1], vals.min())
+                    acc[base + 2] = max(acc[base + 2], vals.max())
+    kinds = {c: ("float" if k == "empty" else k) for c, k in kinds.items()}
+    percent_divide = {}
+    for col, (any_pct, n_txt, lo_txt, hi_txt, n_num, lo_num, hi_num) in pct.items():
+        if kinds[col] == "object":
+            percent_divide[colmap[col]] = _percent_decision(any_pct, n_txt, lo_txt, hi_txt)
+        else:
+            percent_divide[colmap[col]] = _percent_decision(False, n_num, lo_num, hi_num)
+    return {"sep": sep, "encoding": encoding, "rows": rows, "kinds": kinds, "percent_divide": percent_divide}
+
+class RunningStats:
+    """min/max e (min_pos, max_pos, 2º maior positivo) por coluna, acumulados bloco a bloco."""
+
+    def __init__(self):
+        self._range: Dict[str, List[float]] = {}
+        self._pos: Dict[str, List] = {}
+
+    def update(self, name: str, vals: np.ndarray):
+        if not vals.size:
+            return
+        lo, hi = self._range.setdefault(name, [np.inf, -np.inf])
+        self._range[name] = [min(lo, vals.min()), max(hi, vals.max())]
+        positives = vals[vals > 0]
+        if positives.size:
+            acc = self._pos.setdefault(name, [np.inf, -np.inf, []])
+            acc[0] = min(acc[0], positives.min())
+            acc[1] = max(acc[1], positives.max())
+            top = positives if positives.size <= 2 else np.partition(positives, positives.size - 2)[-2:]
+            acc[2] = sorted(acc[2] + [float(v) for v in top])[-2:]
+
+    def value_range(self, name: str) -> Tuple[float, float] | None:
+        r = self._range.get(name)
+        return (r[0], r[1]) if r else None
+
+    def positive(self, name: str) -> Tuple[float, float, float] | None:
+        """Mesmo (min_pos, max_pos, _second_largest) que normalize_0_100_pos_floor_cap calcularia."""
+        acc = self._pos.get(name)
+        if not acc:
+            return None
+        top = acc[2]
+        return acc[0], acc[1], (top[-2] if len(top) == 2 else top[0])
+
+class _MetricsSpool:
+    """
+    MetricsExport em blocos: cada (plataforma, métrica) vai para um arquivo temporário
+    próprio e no fim eles são concatenados — mesma ordem de linhas de build_metrics_long.
+    """
+
+    def __init__(self, out_csv: str):
+        import tempfile
+        self.out_csv = out_csv
+        self.tmp_dir = tempfile.mkdtemp(prefix=".metrics_", dir=os.path.dirname(os.path.abspath(out_csv)))
+        self.files: List = []
+        self.rows = 0
+
+    def add(self, chunk_clean: pd.DataFrame):
+        out = build_metrics_long(chunk_clean)
+        if out.empty and not len(out.columns):
+            return
+        n = len(chunk_clean)
+        for i in range(len(out) // n):
+            if i == len(self.files):
+                self.files.append(open(os.path.join(self.tmp_dir, f"{i:03d}.csv"), "w", encoding="utf-8", newline=""))
+            out.iloc[i * n:(i + 1) * n].to_csv(self.files[i], header=False, index=False, float_format="%.1f")
+        self.rows += len(out)
+
+    def close(self):
+        try:
+            for fh in self.files:
+                fh.close()
+            if not self.rows:
+                write_metrics_long(pd.DataFrame(), self.out_csv)
+                return
+            with atomic_output(self.out_csv) as tmp, open(tmp, "w", encoding="utf-8", newline="") as dst:
+                pd.DataFrame(columns=_EXPORT_COLUMNS).to_csv(dst, index=False)
+                for fh in self.files:
+                    with open(fh.name, "r", encoding="utf-8", newline="") as src:
+                        shutil.copyfileobj(src, dst, 1 << 20)
+        finally:
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+def score_csv_streaming(path: str, plan: Dict, metrics_csv: str, chunk_rows: int, dtype=np.float64):
+    """
+    Passe 2: por bloco, canonicaliza + limpa, acumula as somas de _dimension_parts e a
+    presença, e grava o MetricsExport. Retorna (names, raw, stats, applied_map, faltas),
+    com (names, raw) iguais aos de compute_dimension_arrays e stats =
+    {coluna_raw: (min_pos, max_pos, second_pos)} para dimension_scores_0_100.
+    """
+    running = RunningStats()
+    frames: List[pd.DataFrame] = []
+    applied_map: Dict[str, str] = {}
+    faltas: List[str] = []
+    spool = _MetricsSpool(metrics_csv)
+    try:
+        for i, chunk in enumerate(_csv_chunks(path, plan["sep"], plan["encoding"], chunk_rows)):
+            chunk = _apply_kinds(chunk, plan["kinds"])
+            chunk, colmap, missing = canonicalize_columns(chunk)
+            if i == 0:
+                applied_map, faltas = colmap, missing
+                if chunk.columns.has_duplicates:
+                    raise ValueError("--stream não suporta colunas duplicadas após sinônimos; rode sem --stream")
+            chunk = clean_numeric_dataframe_one_decimal(chunk, plan["percent_divide"])
+            spool.add(chunk)
+
+            parts = _dimension_parts(chunk, dtype)
+            for name in _DIM_PARTS_RANGED + ["ativ_raw", "dif_raw"]:
+                running.update(name, parts[name])
+            frames.append(pd.DataFrame({"name": chunk["name"], **parts}, index=chunk.index))
+    finally:
+        spool.close()
+
+    if not frames:
+        raise ValueError(f"CSV sem linhas: {path}")
+    summary = pd.concat(frames)
+    ranges = {name: running.value_range(name) for name in _DIM_PARTS_RANGED if running.value_range(name)}
+    raw = _finish_dimension_arrays({name: summary[name].to_numpy() for name in _DIM_PARTS}, ranges)
+    raw["presenca_100"] = summary["presenca_100"].to_numpy()
+    stats = {name: running.positive(name) for name in ("ativ_raw", "dif_raw") if running.positive(name)}
+    return summary["name"], raw, stats, applied_map, faltas
+
+# ============================
+# Saídas colunares (--format parquet|arrow), ao lado dos CSVs
+# ============================
+
+# parquet: zstd, para arquivar/ler só algumas colunas; arrow: IPC sem compressão,
+# lido via memory-map sem copiar nem reparsear floats.
+_COLUMNAR_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+_DICT_COLUMNS = ("name", "platform", "metric")
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError("--format parquet/arrow requer pyarrow (pip install pyarrow)") from e
+
+def _columnar_path(csv_path: str, fmt: str) -> str:
+    """<base>__Resultado.csv -> <base>__Resultado.parquet (ou .arrow)."""
+    return f"{os.path.splitext(csv_path)[0]}{_COLUMNAR_FORMATS[fmt]}"
+
+def _arrow_column(s: pd.Series):
+    import pyarrow as pa
+    if s.name in _DICT_COLUMNS:
+        arr = pa.array(s.astype(object).where(s.notna(), None), type=pa.string(), from_pandas=True)
+        return arr.dictionary_encode()
+    if pd.api.types.is_float_dtype(s.dtype):
+        # mesma precisão do CSV (float_format="%.1f")
+        return pa.array(s.round(1), from_pandas=True)
+    try:
+        return pa.array(s, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # object com tipos misturados (ex.: datas e texto em period_start): vira texto
+        return pa.array([None if pd.isna(v) else str(v) for v in s], type=pa.string())
+
+def to_arrow_table(df: pd.DataFrame):
+    """DataFrame -> pyarrow.Table tipada; name/platform/metric dictionary-encoded."""
+    import pyarrow as pa
+    return pa.table({str(c): _arrow_column(df[c]) for c in df.columns})
+
+def write_columnar(df: pd.DataFrame, path: str, fmt: str):
+    """Grava df em parquet (zstd) ou Arrow IPC (sem compressão); escrita atômica."""
+    import pyarrow as pa
+    table = to_arrow_table(df)
+    with atomic_output(path) as tmp:
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            pq.write_table(table, tmp, compression="zstd")
+        else:
+            with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+def read_columnar(path: str, columns: List[str] | None = None) -> pd.DataFrame:
+    """Lê um __Resultado/__MetricsExport .parquet ou .arrow (memory-map, só as colunas pedidas)."""
+    _require_pyarrow()
+    import pyarrow as pa
+    if path.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, columns=columns, memory_map=True)
+    else:
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        if columns is not None:
+            table = table.select(columns)
+    return table.to_pandas()
+
+def write_metrics_long_columnar(out: pd.DataFrame, path: str, fmt: str):
+    """Versão colunar de write_metrics_long (mesmo header quando nada foi mapeado)."""
+    if out.empty and not len(out.columns):
+        out = pd.DataFrame({c: pd.Series([], dtype=float if c == "value" else object)
+                            for c in _EXPORT_EMPTY_COLUMNS})
+    write_columnar(out, path, fmt)
+
+# ============================
+# Artefato de dimensões (__Dimensions.npz) + reweight
+# ============================
+
+_DIM_COLS = ["presenca_100", "popularidade_100", "atividade_100", "engajamento_100", "difusao_100"]
+_DIMENSIONS_VERSION = 1
+
+def _derived_output(path: str, suffix: str, ending: str = "__MetricsExport.csv") -> str:
+    """<base>__MetricsExport.csv (ou <base><ending>) -> <base><suffix> (mesma pasta e mesmo basename)."""
+    base = path[: -len(ending)] if path.endswith(ending) else os.path.splitext(path)[0]
+    return f"{base}{suffix}"
+
+def save_dimensions_artifact(path: str, dims_100: pd.DataFrame, norm_params: Dict[str, float]):
+    """
+    Guarda a matriz entidade × 5 dimensões (*_100, precisão total) num .npz compacto.
+    É tudo o que weighted_final_score_0_100 precisa: trocar pesos não exige reler a planilha.
+    """
+    names = dims_100["name"] if "name" in dims_100.columns else pd.Series(range(len(dims_100)))
+    names = names.astype(object).where(names.notna(), "").astype(str).to_numpy(dtype=str)
+    dims = np.column_stack([
+        pd.to_numeric(dims_100[c], errors="coerce").to_numpy(dtype=float) if c in dims_100.columns
+        else np.full(len(dims_100), np.nan)
+        for c in _DIM_COLS
+    ]) if len(dims_100) else np.zeros((0, len(_DIM_COLS)))
+    meta = json.dumps({"version": _DIMENSIONS_VERSION, "columns": _DIM_COLS, "norm": norm_params})
+    with atomic_output(path) as tmp, open(tmp, "wb") as fh:
+        np.savez_compressed(fh, names=names, dims=dims, meta=np.array(meta))
+
+def load_dimensions_artifact(path: str) -> Tuple[pd.DataFrame, Dict]:
+    """Retorna (DataFrame name + *_100, meta)."""
+    with np.load(path, allow_pickle=False) as z:
+        names, dims, meta = z["names"], z["dims"], json.loads(str(z["meta"]))
+    if meta.get("version") != _DIMENSIONS_VERSION:
+        raise ValueError(f"Artefato de dimensões com versão incompatível: {meta.get('version')}")
+    df = pd.DataFrame(dims, columns=meta["columns"])
+    df.insert(0, "name", names.astype(object))
+    return df, meta
+
+def run_reweight(args) -> Dict[str, str | None]:
+    """
+    Recalcula apenas a média ponderada final a partir de um __Dimensions.npz.
+    Não lê a planilha bruta; normalização (piso/cap/dominância) vem do artefato.
+    """
+    dims_100, meta = load_dimensions_artifact(args.reweight)
+    norm = meta.get("norm", {})
+    asked = {"piso_positivo": args.piso_positivo, "cap_min": args.cap_min, "dominance_factor": args.dominance_factor}
+    diff = {k: v for k, v in asked.items() if k in norm and float(norm[k]) != float(v)}
+    if diff:
+        print(f"[WARN] Reweight usa a normalização do artefato {norm}; ignorando {diff}")
+
+    result = weighted_final_score_0_100(dims_100, PipelineConfig.from_args(args).weights)
+
+    if args.out_csv:
+        out_csv = args.out_csv
+    else:
+        src = os.path.abspath(args.reweight)
+        base = src[: -len("__Dimensions.npz")] if src.endswith("__Dimensions.npz") else os.path.splitext(src)[0]
+        out_dir = args.out_dir or os.path.dirname(base)
+        os.makedirs(out_dir, exist_ok=True)
+        out_csv = os.path.join(out_dir, f"{os.path.basename(base)}__Resultado.csv")
+    with atomic_output(out_csv) as tmp:
+        result.to_csv(tmp, index=False, encoding="utf-8", float_format="%.1f")
+    print(f"[OK] Resultado (reweight) salvo em: {out_csv}")
+    return {"resultado": out_csv, "metrics": None, "xlsx": None, "dimensions": args.reweight, "cache": "off"}
+
+# ============================
+# Sweep de pesos (sensibilidade do ranking)
+# ============================
+
+_WEIGHT_KEYS = ["presenca", "popularidade", "atividade", "engajamento", "difusao"]
+
+def grid_weight_vectors(step: float) -> np.ndarray:
+    """
+    Todas as combinações de 5 pesos múltiplos de `step` que somam 1 (simplex em grade).
+    step=0.1 -> 1001 vetores; step=0.05 -> 10626.
+    """
+    m = int(round(1.0 / step))
+    if m <= 0 or not np.isclose(m * step, 1.0):
+        raise ValueError(f"--sweep-grid precisa dividir 1 exatamente (recebido {step})")
+    # stars and bars: 4 barras entre m+4 posições
+    bars = np.array(list(itertools.combinations(range(m + 4), 4)), dtype=np.int64)
+    edges = np.column_stack([np.full(len(bars), -1), bars, np.full(len(bars), m + 4)])
+    return (np.diff(edges, axis=1) - 1).astype(float) / m
+
+def random_weight_chunks(n: int, chunk: int, seed: int | None = None,
+                         center: np.ndarray | None = None, concentration: float | None = None):
+    """
+    Gera `n` vetores de pesos em blocos de até `chunk` linhas (memória limitada).
+    Sem `concentration`: uniforme no simplex (Dirichlet(1,...,1)).
+    Com `concentration`: Dirichlet(concentration * center), concentrado nos pesos base.
+    """
+    rng = np.random.default_rng(seed)
+    alpha = np.ones(len(_WEIGHT_KEYS))
+    if concentration is not None and center is not None:
+        alpha = np.maximum(concentration * center / center.sum(), 1e-6)
+    done = 0
+    while done < n:
+        k = min(chunk, n - done)
+        yield rng.dirichlet(alpha, size=k)
+        done += k
+
+def weight_sweep(dims_100: pd.DataFrame, weight_chunks, base_weights: Dict[str, float] | None = None) -> pd.DataFrame:
+    """
+    Pontua todas as entidades para cada vetor de pesos (scores = W @ D.T, bloco a bloco)
+    e acumula um histograma de posições por entidade (n × n inteiros), de onde saem
+    rank mínimo/máximo/mediano/médio e a fração de vetores em que a entidade é 1ª.
+    Empates são desfeitos pela ordem das linhas (rank ordinal).
+    """
+    names = dims_100["name"].tolist() if "name" in dims_100.columns else list(range(len(dims_100)))
+    D = dims_100.reindex(columns=_DIM_COLS).apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    n = D.shape[0]
+    # NaN nunca vence: vira -inf na nota final
+    nan_rows = np.isnan(D).any(axis=1)
+    D = np.nan_to_num(D, nan=0.0)
+
+    hist = np.zeros(n * n, dtype=np.int64)
+    total = 0
+    ent = np.arange(n, dtype=np.int64) * n
+    for W in weight_chunks:
+        W = np.asarray(W, dtype=float)
+        W = W / np.where(W.sum(axis=1, keepdims=True) > 0, W.sum(axis=1, keepdims=True), 1.0)
+        scores = W @ D.T                                   # (k × n)
+        scores[:, nan_rows] = -np.inf
+        order = np.argsort(-scores, axis=1, kind="stable")  # posição -> entidade
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(n)[None, :], axis=1)  # entidade -> posição (0-based)
+        hist += np.bincount((ent[None, :] + ranks).ravel(), minlength=n * n)
+        total += W.shape[0]
+
+    hist = hist.reshape(n, n)
+    positions = np.arange(1, n + 1)
+    if total == 0:
+        raise ValueError("Nenhum vetor de pesos para o sweep")
+    seen = hist > 0
+    rank_min = np.where(seen.any(axis=1), seen.argmax(axis=1) + 1, 0)
+    rank_max = n - seen[:, ::-1].argmax(axis=1)
+    cum = hist.cumsum(axis=1)
+    rank_median = (cum >= (total + 1) / 2.0).argmax(axis=1) + 1
+    rank_mean = (hist * positions[None, :]).sum(axis=1) / total
+    p_first = hist[:, 0] / total
+
+    out = pd.DataFrame({
+        "name": names,
+        "rank_min": rank_min,
+        "rank_max": rank_max,
+        "rank_median": rank_median,
+        "rank_mean": rank_mean,
+        "p_first": p_first,
+    })
+    if base_weights is not None:
+        wb = np.array([[float(base_weights[k]) for k in _WEIGHT_KEYS]])
+        base_scores = (wb / (wb.sum() or 1.0)) @ D.T
+        base_scores[:, nan_rows] = -np.inf
+        order = np.argsort(-base_scores[0], kind="stable")
+        rank_base = np.empty(n, dtype=np.int64)
+        rank_base[order] = np.arange(1, n + 1)
+        out.insert(1, "rank_base", rank_base)
+        out = out.sort_values("rank_base", kind="stable")
+    out.attrs["n_vectors"] = total
+    return out.reset_index(drop=True)
+
+def run_sweep(args) -> Dict[str, str | None]:
+    dims_100, _meta = load_dimensions_artifact(args.sweep)
+    n = max(len(dims_100), 1)
+    # limita cada bloco a ~4M células (k × n) para manter a memória estável
+    chunk = max(1, min(args.sweep_chunk, 4_000_000 // n))
+    base = {"presenca": args.w_presenca, "popularidade": args.w_pop,
+            "atividade": args.w_ativ, "engajamento": args.w_eng, "difusao": args.w_dif}
+
+    t0 = time.perf_counter()
+    if args.sweep_grid:
+        grid = grid_weight_vectors(args.sweep_grid)
+        chunks = (grid[i:i + chunk] for i in range(0, len(grid), chunk))
+    else:
+        center = np.array([base[k] for k in _WEIGHT_KEYS], dtype=float)
+        chunks = random_weight_chunks(args.sweep_samples, chunk, seed=args.sweep_seed,
+                                      center=center, concentration=args.sweep_concentration)
+    table = weight_sweep(dims_100, chunks, base_weights=base)
+    elapsed = time.perf_counter() - t0
+
+    if args.out_csv:
+        out_csv = args.out_csv
+    else:
+        src = os.path.abspath(args.sweep)
+        stem = src[: -len("__Dimensions.npz")] if src.endswith("__Dimensions.npz") else os.path.splitext(src)[0]
+        out_dir = args.out_dir or os.path.dirname(stem)
+        os.makedirs(out_dir, exist_ok=True)
+        out_csv = os.path.join(out_dir, f"{os.path.basename(stem)}__Sweep.csv")
+    with atomic_output(out_csv) as tmp:
+        table.to_csv(tmp, index=False, encoding="utf-8", float_format="%.4f")
+    print(f"[OK] Sweep: {table.attrs['n_vectors']} vetores × {len(table)} entidades em {elapsed:.2f}s -> {out_csv}")
+    return {"resultado": None, "metrics": None, "xlsx": None, "sweep": out_csv, "cache": "off"}
+
+# ============================
+# Payloads JSON do dashboard (overview/radar/metrics.json)
+# ============================
+# Mesmo schema de src/libs/api/pendulo/assembleFromSir.ts; o front lê estes arquivos
+# direto (src/libs/data/pendulo.fs.ts) sem reparsear o CSV nem remontar os objetos.
+
+_DASH_PALETTE = [
+    "#38d4b0", "#3b25a1", "#7dd3fc", "#fca5a5", "#fde68a",
+    "#f472b6", "#60a5fa", "#34d399", "#a78bfa", "#f59e0b",
+]
+_DASH_DIMS = [
+    ("Presença", "presenca_100"),
+    ("Popularidade", "popularidade_100"),
+    ("Atividade", "atividade_100"),
+    ("Engajamento", "engajamento_100"),
+    ("Difusão", "difusao_100"),
+]
+_METRICS_ROW_FIELDS = ["followers", "subscribers", "posts", "videos", "tweets",
+                       "likes", "comments", "shares", "views", "mentions"]
+# caracteres com a propriedade Diacritic que não são marcas combinantes
+_SPACING_DIACRITICS = set("^`¨¯´·¸")
+
+def dash_slug(s: str) -> str:
+    """Igual ao slug() do front: minúsculas, sem acentos, não-alfanumérico -> '-'."""
+    s = unicodedata.normalize("NFD", str(s or "").lower())
+    s = "".join(ch for ch in s if not (unicodedata.combining(ch) or ch in _SPACING_DIACRITICS
+                                       or 0x02B0 <= ord(ch) <= 0x02FF))
+    s = re.sub(r"[^a-z0-9]+", "-", s)
+    return s.strip("-")
+
+def _js_hash_code(s: str) -> int:
+    """hashCode() do front: h = imul(31, h) + charCode (unidades UTF-16, int32)."""
+    h = 0
+    data = s.encode("utf-16-le")
+    for i in range(0, len(data), 2):
+        h = (31 * h + int.from_bytes(data[i:i + 2], "little")) & 0xFFFFFFFF
+    return h - (1 << 32) if h >= (1 << 31) else h
+
+def dash_color(name: str) -> str:
+    return _DASH_PALETTE[abs(_js_hash_code(name)) % len(_DASH_PALETTE)]
+
+def _js_number(v) -> float:
+    """Number(x) do JS para texto de CSV: '' -> 0, inválido -> NaN."""
+    if v is None:
+        return 0.0
+    t = str(v).strip()
+    if t == "":
+        return 0.0
+    try:
+        return float(t)
+    except ValueError:
+        return float("nan")
+
+def to2(n: float) -> float | int:
+    """to2() do front: Math.round((n + EPSILON) * 100) / 100 (meio arredonda para cima)."""
+    if n is None or not math.isfinite(n):
+        return n
+    x = (n + sys.float_info.epsilon) * 100.0
+    r = math.floor(x)
+    if x - r >= 0.5:
+        r += 1
+    v = r / 100.0
+    return int(v) if v.is_integer() else v
+
+def _read_resultado_rows(resultado_csv: str) -> List[Dict[str, str]]:
+    # csv-parse { columns: true, skip_empty_lines: true }
+    with open(resultado_csv, "r", encoding="utf-8", newline="") as fh:
+        return [row for row in csv.DictReader(fh) if any((v or "").strip() for v in row.values())]
+
+def _load_prev_totals(out_root: str, client: str, wave: str) -> Dict[str, List[Dict]]:
+    """tryLoadPrevTotals(): linha 'total' do metrics.json de P(n-1), chaveada por slug."""
+    m = re.match(r"^P(\d+)$", wave, re.I)
+    if not m or int(m.group(1)) <= 1:
+        return {}
+    prev_path = os.path.join(out_root, client, f"P{int(m.group(1)) - 1}", "metrics.json")
+    try:
+        with open(prev_path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    by_player = data.get("platformDataByPlayer") if isinstance(data, dict) else None
+    if not by_player:
+        return {}
+    out = {}
+    for k, rows in by_player.items():
+        rows = rows if isinstance(rows, list) else []
+        total = next((r for r in rows if isinstance(r, dict) and r.get("platform") == "total"), {})
+        cast = {"platform": "total", "engagementPct": to2(_js_number(total.get("engagementPct", 0)))}
+        cast.update({f: _js_number(total.get(f, 0)) for f in _METRICS_ROW_FIELDS})
+        out[dash_slug(k)] = [cast]
+    return out
+
+def _dashboard_norm(rows: List[Dict[str, str]]) -> List[Dict]:
+    """Linhas do Resultado -> name + dimensões/final com duas casas (sem nomes vazios)."""
+    norm = []
+    for r in rows:
+        final = r.get("sir_final_0_100")
+        if final is None:
+            final = r.get("INFLUENCIA_DIGITAL")
+        rec = {"name": str(r.get("name") or "").strip()}
+        for _, col in _DASH_DIMS:
+            rec[col] = to2(_js_number(r.get(col)))
+        rec["sir_final_0_100"] = to2(_js_number(final))
+        if rec["name"]:
+            norm.append(rec)
+    return norm
+
+def build_dashboard_payloads(rows: List[Dict[str, str]], out_root: str, client: str, wave: str) -> Dict[str, Dict]:
+    """Equivalente Python de assembleFromSir(): {overview, radar, metrics}."""
+    norm = _dashboard_norm(rows)
+
+    players = [
+        {"id": dash_slug(r["name"]), "name": r["name"], "color": dash_color(r["name"]),
+         "sirIndex": to2(r["sir_final_0_100"]), "isClient": False}
+        for r in sorted(norm, key=lambda r: -(r["sir_final_0_100"] or 0))
+    ]
+    overview = {"wave": wave, "players": players, "series": load_series_upto(out_root, client, wave)}
+
+    radar = {
+        "wave": wave,
+        "dimensions": [label for label, _ in _DASH_DIMS],
+        "data": [{"metric": label, **{r["name"]: to2(r[col]) for r in norm}} for label, col in _DASH_DIMS],
+    }
+
+    by_player = {}
+    for r in norm:
+        row = {"platform": "total", "engagementPct": to2(r["engajamento_100"])}
+        row.update({f: 0 for f in _METRICS_ROW_FIELDS})
+        by_player[dash_slug(r["name"])] = [row]
+    metrics = {
+        "wave": wave,
+        "platformDataByPlayer": by_player,
+        "platformPrevDataByPlayer": _load_prev_totals(out_root, client, wave),
+    }
+    return {"overview": overview, "radar": radar, "metrics": metrics}
+
+def _json_safe(obj):
+    """NaN/±inf -> None (o JSON.stringify do front grava null); escalares numpy -> Python."""
+    if isinstance(obj, dict):
+        return {k: _json_safe(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_json_safe(v) for v in obj]
+    if isinstance(obj, (float, np.floating)):
+        return float(obj) if math.isfinite(obj) else None
+    if isinstance(obj, np.integer):
+        return int(obj)
+    return obj
+
+def _write_json_atomic(path: str, payload: Dict):
+    with atomic_output(path) as tmp, open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(_json_safe(payload), fh, ensure_ascii=False, allow_nan=False)
+
+def _dashboard_target(out_csv: str, json_dir: str | None, client: str | None, wave: str | None):
+    """
+    Resolve (json_dir, out_root, client, wave). Padrão: saídas em
+    processed/<client>/<wave>/pendulo -> JSON em processed/<client>/<wave>/.
+    """
+    if not json_dir:
+        d = os.path.dirname(os.path.abspath(out_csv))
+        json_dir = os.path.dirname(d) if os.path.basename(d) == "pendulo" else d
+    json_dir = os.path.abspath(json_dir)
+    wave = wave or os.path.basename(json_dir)
+    client = client or os.path.basename(os.path.dirname(json_dir))
+    out_root = os.path.dirname(os.path.dirname(json_dir))
+    return json_dir, out_root, client, wave
+
+def emit_dashboard_json(resultado_csv: str, json_dir: str | None = None,
+                        client: str | None = None, wave: str | None = None,
+                        fingerprint: Dict | None = None) -> Dict[str, str]:
+    """
+    Gera overview/radar/metrics.json a partir do __Resultado.csv (escrita atômica)
+    e registra a onda no series.json do cliente (`fingerprint`: ver _wave_fingerprint).
+    """
+    json_dir, out_root, client, wave = _dashboard_target(resultado_csv, json_dir, client, wave)
+    rows = _read_resultado_rows(resultado_csv)
+    # a onda entra no índice de séries antes: overview.series já inclui o ponto dela
+    update_series_index(out_root, client, wave, _dashboard_norm(rows), fingerprint)
+    payloads = build_dashboard_payloads(rows, out_root, client, wave)
+    paths = {}
+    for key in ("metrics", "radar", "overview"):
+        paths[key] = os.path.join(json_dir, f"{key}.json")
+        _write_json_atomic(paths[key], payloads[key])
+    return paths
+
+# ============================
+# Séries multi-onda (<out_root>/<client>/series.json)
+# ============================
+
+# Um arquivo por cliente com o ponto de cada onda já calculada. Onda nova ou
+# planilha trocada: só aquela onda é pontuada e o índice é regravado; as demais
+# ficam como estão. Overview.series e DimensionEvolutions leem daqui.
+_SERIES_FILE = "series.json"
+_SERIES_VERSION = 1
+_SERIES_LOCK_STALE_S = 600.0
+# lock das saídas de uma execução (run_job): pontuar uma planilha grande pode passar de
+# 10 min, então a idade só descarta o lock bem depois; pid morto libera na hora
+_WAVE_LOCK_TIMEOUT_S = 900.0
+_WAVE_LOCK_STALE_S = 3600.0
+
+def _wave_order(wave: str) -> Tuple[int, float, str]:
+    """P1 < P2 < ... < P10; nomes fora do padrão P<n> vão para o fim, em ordem alfabética."""
+    m = re.match(r"^P(\d+)$", wave, re.I)
+    return (0, float(m.group(1)), "") if m else (1, 0.0, wave)
+
+def _pid_alive(pid: int) -> bool:
+    if os.name != "posix":
+        return True  # sem sinal 0 fora do POSIX: vale só a idade do lock
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+def _lock_is_stale(lock: str, stale_s: float) -> bool:
+    """Lock de processo que já morreu (pid gravado no arquivo) ou mais velho que stale_s."""
+    try:
+        with open(lock, "r") as fh:
+            pid = int(fh.read().strip() or 0)
+    except ValueError:
+        pid = 0
+    if pid > 0 and pid != os.getpid() and not _pid_alive(pid):
+        return True
+    return time.time() - os.path.getmtime(lock) > stale_s
+
+@contextlib.contextmanager
+def _file_lock(path: str, timeout_s: float = 60.0, stale_s: float = _SERIES_LOCK_STALE_S):
+    """
+    Lock exclusivo por arquivo (O_EXCL). Lock de pid morto ou mais velho que stale_s é
+    descartado. Rende os segundos esperados até conseguir o lock.
+    """
+    lock = f"{path}.lock"
+    os.makedirs(os.path.dirname(os.path.abspath(lock)), exist_ok=True)
+    t0 = time.monotonic()
+    deadline = t0 + timeout_s
+    while True:
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if _lock_is_stale(lock, stale_s):
+                    os.unlink(lock)
+                    continue
+            except OSError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Lock ocupado: {lock}")
+            time.sleep(0.05)
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield time.monotonic() - t0
+    finally:
+        with contextlib.suppress(OSError):
+            os.unlink(lock)
+
+def series_index_path(out_root: str, client: str) -> str:
+    return os.path.join(out_root, client, _SERIES_FILE)
+
+def load_series_index(out_root: str, client: str) -> Dict:
+    try:
+        with open(series_index_path(out_root, client), "r", encoding="utf-8") as fh:
+            index = json.load(fh)
+    except (OSError, ValueError):
+        index = {}
+    if index.get("version") != _SERIES_VERSION:
+        index = {}
+    index.setdefault("waves", {})
+    return index
+
+def _wave_fingerprint(input_path: str, params: Dict, known: Dict | None = None,
+                      trust_mtime: bool = False) -> Dict:
+    """
+    Identidade de uma onda pontuada: hash do input + parâmetros (mesma chave do cache).
+    Com trust_mtime, reaproveita o sha256 de `known` quando (size, mtime_ns) não mudaram.
+    """
+    abspath = os.path.abspath(input_path)
+    st, digest = input_sha256(abspath, known, trust_mtime)
+    return {"input": abspath, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+            "sha256": digest, "key": cache_key(digest, params)}
+
+def _rebuild_series(index: Dict):
+    """Recalcula series/dimensionSeries (formato SeriesPoint do front) a partir das ondas do índice."""
+    waves = sorted(index["waves"], key=_wave_order)
+    index["waveOrder"] = waves
+    index["series"] = [
+        {"date": w, **{name: p["sirIndex"] for name, p in index["waves"][w]["players"].items()}}
+        for w in waves
+    ]
+    index["dimensionSeries"] = {
+        label: [{"date": w, **{name: p[label] for name, p in index["waves"][w]["players"].items()}}
+                for w in waves]
+        for label, _ in _DASH_DIMS
+    }
+
+def update_series_index(out_root: str, client: str, wave: str, norm: List[Dict],
+                        fingerprint: Dict | None = None) -> Dict:
+    """Grava/substitui o ponto de `wave` (linhas de _dashboard_norm) sem tocar nas outras ondas."""
+    path = series_index_path(out_root, client)
+    with _file_lock(path):
+        index = load_series_index(out_root, client)
+        index.update(version=_SERIES_VERSION, client=client,
+                     dimensions=[label for label, _ in _DASH_DIMS])
+        players = {}
+        for r in norm:
+            pt = {"sirIndex": r["sir_final_0_100"]}
+            pt.update({label: r[col] for label, col in _DASH_DIMS})
+            players[r["name"]] = pt
+        index["waves"][wave] = {**(fingerprint or {}), "updated": time.time(), "players": players}
+        _rebuild_series(index)
+        _write_json_atomic(path, index)
+    return index
+
+def load_series_upto(out_root: str, client: str, wave: str) -> List[Dict]:
+    """Overview.series: pontos do series.json até `wave` (inclusive), em ordem de onda."""
+    index = load_series_index(out_root, client)
+    limit = _wave_order(wave)
+    return [pt for pt in index.get("series", []) if _wave_order(str(pt.get("date"))) <= limit]
+
+def _refresh_wave_payloads(out_root: str, client: str) -> int:
+    """
+    Após repontuar uma onda antiga, atualiza o que as ondas seguintes derivam dela:
+    overview.series, metrics.platformPrevDataByPlayer e ranks.json (deltas contra P(n-1)).
+    Retorna quantos JSONs mudaram.
+    """
+    index = load_series_index(out_root, client)
+    changed = 0
+    for wave in index["waves"]:
+        for name, field, value in (
+            ("overview", "series", lambda: load_series_upto(out_root, client, wave)),
+            ("metrics", "platformPrevDataByPlayer", lambda: _load_prev_totals(out_root, client, wave)),
+        ):
+            path = os.path.join(out_root, client, wave, f"{name}.json")
+            try:
+                with open(path, "r", encoding="utf-8") as fh:
+                    payload = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            fresh = value()
+            if payload.get(field) != fresh:
+                payload[field] = fresh
+                _write_json_atomic(path, payload)
+                changed += 1
+        if refresh_wave_ranks(out_root, client, wave):
+            changed += 1
+    return changed
+
+def _series_base_args(args) -> Dict:
+    """Args de run_job para pontuar uma onda do --series/--watch (saídas derivadas, com JSON)."""
+    base = vars(args).copy()
+    base.update(series=None, batch=None, watch=None, serve=False, out_csv=None, out_xlsx=None,
+                emit_json=True, json_dir=None, plots_dir=None)
+    return base
+
+def score_series_wave(base: Dict, out_root: str, params: Dict, client: str, wave: str, path: str) -> bool:
+    """
+    Pontua uma onda se o conteúdo do input (ou os parâmetros) mudou desde a última vez
+    registrada no series.json. Retorna True se pontuou, False se nada mudou.
+    """
+    known = load_series_index(out_root, client)["waves"].get(wave)
+    fp = _wave_fingerprint(path, params, known, base.get("trust_mtime", False))
+    overview = os.path.join(out_root, client, wave, "overview.json")
+    if known and known.get("key") == fp["key"] and os.path.exists(overview):
+        return False
+    out_dir = os.path.join(out_root, client, wave, "pendulo")
+    job = argparse.Namespace(**dict(base, excel=path, out_dir=out_dir, client=client, wave=wave))
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_job(job)
+    return True
+
+def _series_out_root(args, raw_root: str) -> str:
+    return os.path.abspath(args.batch_out_root or os.path.join(os.path.dirname(raw_root), "processed"))
+
+def run_series(args) -> Dict[str, Dict]:
+    """
+    --series RAW_ROOT: para cada cliente (ou só --client), pontua apenas as ondas novas ou
+    alteradas e atualiza <out_root>/<client>/series.json + JSONs do dashboard.
+    Retorna {client: {"scored": [...], "skipped": [...], "failed": {...}}}.
+    """
+    raw_root = os.path.abspath(args.series)
+    out_root = _series_out_root(args, raw_root)
+    params = cache_params(args)
+    base = _series_base_args(args)
+
+    report: Dict[str, Dict] = {}
+    for client, wave, path in sorted(discover_raw_inputs(raw_root), key=lambda t: (t[0], _wave_order(t[1]))):
+        if args.client and client != args.client:
+            continue
+        rec = report.setdefault(client, {"scored": [], "skipped": [], "failed": {}})
+        try:
+            scored = score_series_wave(base, out_root, params, client, wave, path)
+        except Exception as e:
+            rec["failed"][wave] = f"{type(e).__name__}: {e}"
+            continue
+        rec["scored" if scored else "skipped"].append(wave)
+
+    for client, rec in report.items():
+        refreshed = _refresh_wave_payloads(out_root, client)
+        print(f"[OK] Séries {client}: {len(rec['scored'])} onda(s) pontuada(s), "
+              f"{len(rec['skipped'])} sem mudança, {len(rec['failed'])} falha(s); "
+              f"{refreshed} JSON(s) dependente(s) atualizado(s) -> {series_index_path(out_root, client)}")
+        for wave, err in rec["failed"].items():
+            print(f"   - [FALHA] {client}/{wave}: {err}")
+    return report
+
+# ============================
+# Ranks, percentis e deltas por onda (__Ranks.csv / __MetricDeltas.csv / ranks.json)
+# ============================
+# Posição, percentil e variação contra P(n-1) saem prontos do pipeline: o front e a
+# API só indexam. Dependem da onda anterior, então ficam fora do cache de resultados
+# e são recalculados (barato) a cada execução e quando P(n-1) é repontuada.
+
+_RANK_SCORES = [("sirIndex", "sir_final_0_100")] + _DASH_DIMS
+_RANKS_COLUMNS = ["name", "score", "value", "rank", "percentile", "prev_value", "delta", "prev_rank", "rank_delta"]
+_DELTA_KEYS = ["name", "platform", "metric"]
+
+def _prev_wave(wave: str) -> str | None:
+    """P(n-1) de uma onda P<n> (None para P1 ou nomes fora do padrão)."""
+    m = re.match(r"^P(\d+)$", wave, re.I)
+    return f"P{int(m.group(1)) - 1}" if m and int(m.group(1)) > 1 else None
+
+def _main_outputs(out_dir: str, files: List[str], sfx: str) -> List[str]:
+    """
+    Arquivos *sfx de out_dir sem os por sheet do --sheet all (<base>__<sheet>__Resultado.csv
+    ao lado de <base>__Resultado.csv). O basename pode ter "__", então o corte é por
+    prefixo contra os outros candidatos, não por contagem de separadores.
+    """
+    stems = [f[: -len(sfx)] for f in files if f.endswith(sfx)]
+    return [os.path.join(out_dir, f"{st}{sfx}") for st in stems
+            if not any(o != st and st.startswith(f"{o}__") for o in stems)]
+
+def find_wave_outputs(out_root: str, client: str, wave: str) -> Tuple[str | None, str | None]:
+    """
+    (__Resultado.csv, __MetricsExport.csv) principais de <out_root>/<client>/<wave>/pendulo.
+    Usa os caminhos gravados no series.json pela execução da onda (ou derivados do input
+    registrado lá); sem registro, procura na pasta ignorando as saídas por sheet.
+    """
+    out_dir = os.path.join(out_root, client, wave, "pendulo")
+    rec = load_series_index(out_root, client)["waves"].get(wave) or {}
+    if rec.get("resultado") and os.path.exists(rec["resultado"]):
+        metrics = rec.get("metrics")
+        return rec["resultado"], metrics if metrics and os.path.exists(metrics) else None
+    if rec.get("input"):
+        resultado, metrics = (os.path.join(out_dir, os.path.basename(p))
+                              for p in _output_names(rec["input"]))
+        if os.path.exists(resultado):
+            return resultado, metrics if os.path.exists(metrics) else None
+    try:
+        files = sorted(os.listdir(out_dir))
+    except OSError:
+        return None, None
+    found = [next(iter(_main_outputs(out_dir, files, sfx)), None)
+             for sfx in ("__Resultado.csv", "__MetricsExport.csv")]
+    return found[0], found[1]
+
+def _score_ranks(scores: pd.DataFrame, keys: pd.Series | None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(rank, percentil) por coluna: rank 1 = maior (empates dividem a melhor posição),
+    percentil = % de entidades com valor <= o próprio. Com `keys`, dentro de cada grupo."""
+    ranked = scores if keys is None else scores.groupby(keys.to_numpy(), dropna=False, sort=False)
+    return ranked.rank(method="min", ascending=False), ranked.rank(method="max", pct=True) * 100.0
+
+def _match_prev(names: pd.Series, prev_names: pd.Series) -> np.ndarray:
+    """Posição de cada name em prev_names (primeira ocorrência; -1 se ausente)."""
+    prev_names = prev_names.astype(object)
+    first = ~prev_names.duplicated().to_numpy()
+    idx = pd.Index(prev_names[first]).get_indexer(names.astype(object))
+    return np.where(idx >= 0, np.flatnonzero(first)[np.maximum(idx, 0)], -1)
+
+def _nullable_int(a: np.ndarray):
+    """float com NaN -> Int64 (vazio no CSV) sem o parse elemento a elemento de pd.array."""
+    mask = np.isnan(a)
+    return pd.arrays.IntegerArray(np.where(mask, 0, a).astype(np.int64), mask)
+
+def rank_table(result: pd.DataFrame, prev: pd.DataFrame | None = None, group_by: str | None = None) -> pd.DataFrame:
+    """
+    Uma linha por (name, score) para sir_final_0_100 e cada *_100: value, rank, percentile
+    e, com `prev` (Resultado de P(n-1), casado por name), prev_value, delta, prev_rank e
+    rank_delta (positivo = subiu). `group_by`: rank/percentil dentro do grupo (--group-by).
+    Usa os valores com 1 casa, como publicados no __Resultado.csv: empates e deltas são os
+    mesmos calculando em memória ou relendo os CSVs.
+    """
+    cols = [c for _, c in _RANK_SCORES if c in result.columns]
+    group_by = group_by if group_by and group_by in result.columns else None
+    scores = result[cols].apply(pd.to_numeric, errors="coerce").round(1)
+    rank, pct = _score_ranks(scores, result[group_by] if group_by else None)
+    n, k = scores.shape
+    prev_vals = np.full((n, k), np.nan)
+    prev_rank = np.full((n, k), np.nan)
+    if prev is not None and len(prev) and "name" in prev.columns:
+        pcols = [c for c in cols if c in prev.columns]
+        pscores = prev[pcols].apply(pd.to_numeric, errors="coerce").round(1)
+        pgroup = prev[group_by] if group_by and group_by in prev.columns else None
+        prank, _ = _score_ranks(pscores, pgroup)
+        pos = _match_prev(result["name"], prev["name"])
+        hit = pos >= 0
+        j = [cols.index(c) for c in pcols]
+        prev_vals[np.ix_(hit, j)] = pscores.to_numpy(dtype=float)[pos[hit]]
+        prev_rank[np.ix_(hit, j)] = prank.to_numpy(dtype=float)[pos[hit]]
+
+    values = scores.to_numpy(dtype=float)
+    ranks = rank.to_numpy(dtype=float)
+    out = {"name": np.repeat(result["name"].to_numpy(), k)}
+    extra = [group_by] if group_by and group_by != "name" else []
+    for c in extra:
+        out[c] = np.repeat(result[c].to_numpy(), k)
+    out.update({
+        "score": np.tile(np.array(cols, dtype=object), n),
+        "value": values.ravel(),
+        "rank": _nullable_int(ranks.ravel()),
+        "percentile": pct.to_numpy(dtype=float).ravel(),
+        "prev_value": prev_vals.ravel(),
+        "delta": (values - prev_vals).ravel(),
+        "prev_rank": _nullable_int(prev_rank.ravel()),
+        "rank_delta": _nullable_int((prev_rank - ranks).ravel()),
+    })
+    columns = _RANKS_COLUMNS[:1] + extra + _RANKS_COLUMNS[1:]
+    return pd.DataFrame(out, columns=columns)
+
+def metric_deltas(metrics_long: pd.DataFrame, prev_metrics: pd.DataFrame) -> pd.DataFrame:
+    """
+    MetricsExport atual × P(n-1) por (name, platform, metric): value, prev_value, delta e
+    delta_pct (% sobre |prev_value|; vazio quando prev_value é 0 ou ausente).
+    """
+    if metrics_long.empty or not set(_DELTA_KEYS) <= set(metrics_long.columns):
+        return pd.DataFrame(columns=_DELTA_KEYS + ["value", "prev_value", "delta", "delta_pct"])
+    cur_keys = pd.MultiIndex.from_arrays([metrics_long[c].astype(object) for c in _DELTA_KEYS])
+    value = pd.to_numeric(metrics_long["value"], errors="coerce").to_numpy(dtype=float)
+    prev_value = np.full(len(metrics_long), np.nan)
+    if not prev_metrics.empty and set(_DELTA_KEYS) <= set(prev_metrics.columns):
+        prev_keys = pd.MultiIndex.from_arrays([prev_metrics[c].astype(object) for c in _DELTA_KEYS])
+        first = ~prev_keys.duplicated()
+        idx = prev_keys[first].get_indexer(cur_keys)
+        pv = pd.to_numeric(prev_metrics["value"], errors="coerce").to_numpy(dtype=float)[first]
+        prev_value[idx >= 0] = pv[idx[idx >= 0]]
+    delta = value - prev_value
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta_pct = np.where(prev_value != 0, delta / np.abs(prev_value) * 100.0, np.nan)
+    out = pd.DataFrame({c: metrics_long[c].astype(object).to_numpy() for c in _DELTA_KEYS})
+    out["value"], out["prev_value"], out["delta"], out["delta_pct"] = value, prev_value, delta, delta_pct
+    return out
+
+def _read_prev_frames(prev_resultado: str | None) -> Tuple[pd.DataFrame | None, pd.DataFrame | None]:
+    """Resultado e MetricsExport de P(n-1) (o MetricsExport é o irmão de mesmo basename)."""
+    if not prev_resultado or not os.path.exists(prev_resultado):
+        return None, None
+    prev = pd.read_csv(prev_resultado)
+    metrics_path = _derived_output(prev_resultado, "__MetricsExport.csv", "__Resultado.csv")
+    prev_metrics = pd.read_csv(metrics_path) if os.path.exists(metrics_path) else None
+    return prev, prev_metrics
+
+def write_rank_tables(result: pd.DataFrame, metrics_long: pd.DataFrame | None, prev_resultado: str | None,
+                      ranks_csv: str, deltas_csv: str, group_by: str | None = None
+                      ) -> Tuple[pd.DataFrame, pd.DataFrame | None]:
+    """Grava __Ranks.csv e, havendo MetricsExport de P(n-1), __MetricDeltas.csv. Retorna as tabelas."""
+    prev, prev_metrics = _read_prev_frames(prev_resultado)
+    ranks = rank_table(result, prev, group_by)
+    with atomic_output(ranks_csv) as tmp:
+        ranks.to_csv(tmp, index=False, encoding="utf-8", float_format="%.1f")
+    deltas = None
+    if prev_metrics is not None and metrics_long is not None:
+        deltas = metric_deltas(metrics_long, prev_metrics)
+        with atomic_output(deltas_csv) as tmp:
+            deltas.to_csv(tmp, index=False, encoding="utf-8", float_format="%.1f")
+    elif os.path.exists(deltas_csv):
+        os.unlink(deltas_csv)  # de uma execução anterior com outra P(n-1)
+    return ranks, deltas
+
+def _json_num(v):
+    return None if v is None or pd.isna(v) else to2(float(v))
+
+def build_ranks_payload(ranks: pd.DataFrame, deltas: pd.DataFrame | None, wave: str, prev_wave: str | None,
+                        prev_key: str | None = None, group_by: str | None = None) -> Dict:
+    """ranks.json: {players: {slug: {rótulo: {value, rank, percentile, delta, prevRank, rankDelta}}}, metricDeltas}."""
+    label = {col: lab for lab, col in _RANK_SCORES}
+    players: Dict[str, Dict] = {}
+    for rec in ranks.to_dict("records"):
+        name = str(rec["name"] if pd.notna(rec["name"]) else "").strip()
+        if not name:
+            continue
+        p = players.setdefault(dash_slug(name), {"name": name})
+        p[label[rec["score"]]] = {
+            "value": _json_num(rec["value"]), "rank": None if pd.isna(rec["rank"]) else int(rec["rank"]),
+            "percentile": _json_num(rec["percentile"]), "delta": _json_num(rec["delta"]),
+            "prevRank": None if pd.isna(rec["prev_rank"]) else int(rec["prev_rank"]),
+            "rankDelta": None if pd.isna(rec["rank_delta"]) else int(rec["rank_delta"]),
+        }
+    by_player: Dict[str, List[Dict]] = {}
+    if deltas is not None:
+        for rec in deltas.to_dict("records"):
+            name = str(rec["name"] if pd.notna(rec["name"]) else "").strip()
+            if name:
+                by_player.setdefault(dash_slug(name), []).append({
+                    "platform": rec["platform"], "metric": rec["metric"], "value": _json_num(rec["value"]),
+                    "prev": _json_num(rec["prev_value"]), "delta": _json_num(rec["delta"]),
+                    "deltaPct": _json_num(rec["delta_pct"]),
+                })
+    return {"wave": wave, "prevWave": prev_wave, "prevKey": prev_key, "groupBy": group_by,
+            "scores": [lab for lab, _ in _RANK_SCORES], "players": players, "metricDeltas": by_player}
+
+def _prev_wave_key(out_root: str, client: str, prev_wave: str | None) -> str | None:
+    if not prev_wave:
+        return None
+    return load_series_index(out_root, client)["waves"].get(prev_wave, {}).get("key")
+
+def refresh_wave_ranks(out_root: str, client: str, wave: str) -> bool:
+    """
+    Recalcula as tabelas de `wave` a partir dos CSVs quando P(n-1) mudou desde o último
+    ranks.json (prevKey diferente do series.json). Retorna True se regravou.
+    """
+    path = os.path.join(out_root, client, wave, "ranks.json")
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            payload = json.load(fh)
+    except (OSError, ValueError):
+        return False
+    prev_wave = _prev_wave(wave)
+    prev_key = _prev_wave_key(out_root, client, prev_wave)
+    if payload.get("prevKey") == prev_key and payload.get("prevWave") == prev_wave:
+        return False
+    resultado, metrics_csv = find_wave_outputs(out_root, client, wave)
+    if not resultado:
+        return False
+    prev_resultado = find_wave_outputs(out_root, client, prev_wave)[0] if prev_wave else None
+    result = pd.read_csv(resultado)
+    metrics_long = pd.read_csv(metrics_csv) if metrics_csv else None
+    ranks, deltas = write_rank_tables(result, metrics_long, prev_resultado,
+                                      _derived_output(resultado, "__Ranks.csv", "__Resultado.csv"),
+                                      _derived_output(resultado, "__MetricDeltas.csv", "__Resultado.csv"),
+                                      payload.get("groupBy"))
+    _write_json_atomic(path, build_ranks_payload(ranks, deltas, wave, prev_wave, prev_key, payload.get("groupBy")))
+    return True
+
+def rank_prev_resultado(args, out_csv: str) -> Tuple[str | None, str | None, str | None]:
+    """
+    (Resultado de P(n-1), P(n-1), chave de P(n-1) no series.json). --prev-resultado tem
+    precedência; senão P(n-1) vem do layout processed/<client>/<wave>/pendulo.
+    """
+    if getattr(args, "prev_resultado", None):
+        return args.prev_resultado, None, None
+    _, out_root, client, wave = _dashboard_target(out_csv, args.json_dir, args.client, args.wave)
+    prev_wave = _prev_wave(wave)
+    if not prev_wave:
+        return None, None, None
+    return find_wave_outputs(out_root, client, prev_wave)[0], prev_wave, _prev_wave_key(out_root, client, prev_wave)
+
+# ============================
+# Cache de resultados (manifest content-addressed)
+# ============================
+
+# Suba esta versão quando a metodologia mudar: invalida todas as entradas antigas.
+_CACHE_VERSION = "v6.1-1"
+_CACHE_MANIFEST = "manifest.json"
+_CACHE_ROLES = {"resultado": "resultado.csv", "metrics": "metrics.csv", "xlsx": "resultado.xlsx",
+                "dimensions": "dimensions.npz",
+                "resultado_parquet": "resultado.parquet", "metrics_parquet": "metrics.parquet",
+                "resultado_arrow": "resultado.arrow", "metrics_arrow": "metrics.arrow"}
+
+def _file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _cache_load_manifest(cache_dir: str) -> Dict:
+    path = os.path.join(cache_dir, _CACHE_MANIFEST)
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        manifest = {}
+    manifest.setdefault("entries", {})
+    manifest.setdefault("inputs", {})
+    return manifest
+
+def _cache_save_manifest(cache_dir: str, manifest: Dict):
+    path = os.path.join(cache_dir, _CACHE_MANIFEST)
+    with atomic_output(path) as tmp, open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, ensure_ascii=False, indent=1, sort_keys=True)
+
+def input_sha256(path: str, known: Dict | None = None, trust_mtime: bool = False) -> Tuple[os.stat_result, str]:
+    """
+    (stat, sha256 do conteúdo). Por padrão relê os bytes sempre: cópia com mtime
+    preservado (cp -p, rsync, backup restaurado) não pode servir resultado velho.
+    trust_mtime (--trust-mtime) reaproveita known["sha256"] quando (size, mtime_ns) batem.
+    """
+    st = os.stat(path)
+    known = known or {}
+    if (trust_mtime and known.get("sha256") and known.get("size") == st.st_size
+            and known.get("mtime_ns") == st.st_mtime_ns):
+        return st, known["sha256"]
+    return st, _file_sha256(path)
+
+@contextlib.contextmanager
+def cache_manifest(cache_dir: str):
+    """
+    Manifest sob lock para read-modify-write: `with cache_manifest(d) as m:` relê o
+    arquivo, e o que for alterado em m é gravado na saída. Alvos diferentes que dividem
+    o mesmo --cache-dir não perdem entradas um do outro.
+    """
+    with _file_lock(os.path.join(cache_dir, _CACHE_MANIFEST)):
+        manifest = _cache_load_manifest(cache_dir)
+        yield manifest
+        _cache_save_manifest(cache_dir, manifest)
+
+def cache_params(args) -> Dict:
+    """Parâmetros que influenciam o resultado (entram na chave do cache)."""
+    return {
+        "sheet": str(_coerce_sheet_arg(args.sheet)),
+        "w_presenca": float(args.w_presenca),
+        "w_pop": float(args.w_pop),
+        "w_ativ": float(args.w_ativ),
+        "w_eng": float(args.w_eng),
+        "w_dif": float(args.w_dif),
+        "piso_positivo": float(args.piso_positivo),
+        "cap_min": float(args.cap_min),
+        "dominance_factor": float(args.dominance_factor),
+        **({"float32": True} if getattr(args, "float32", False) else {}),
+        **({"group_by": args.group_by} if getattr(args, "group_by", None) else {}),
+        # calamine pode ler a mesma planilha diferente: resultado dele não serve a openpyxl
+        **({"excel_engine": "calamine"} if excel_engine(getattr(args, "excel_engine", "openpyxl")) else {}),
+    }
+
+def cache_key(input_sha256: str, params: Dict) -> str:
+    payload = json.dumps({"v": _CACHE_VERSION, "input": input_sha256, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _same_file_content(a: str, b: str) -> bool:
+    try:
+        return os.path.getsize(a) == os.path.getsize(b) and filecmp.cmp(a, b, shallow=False)
+    except OSError:
+        return False
+
+def cache_restore(cache_dir: str, manifest: Dict, key: str, targets: Dict[str, str | None],
+                  copied: List[str] | None = None) -> bool:
+    """
+    Em caso de hit, copia as saídas guardadas para os caminhos pedidos; destino que já
+    tem o mesmo conteúdo não é regravado. Papéis copiados de fato vão para `copied`.
+    Retorna False (miss) se a entrada não existir ou faltar algum arquivo pedido.
+    """
+    entry = manifest["entries"].get(key)
+    if not entry:
+        return False
+    sources = {}
+    for role, dest in targets.items():
+        if not dest:
+            continue
+        rel = entry.get("files", {}).get(role)
+        src = os.path.join(cache_dir, rel) if rel else None
+        if not src or not os.path.exists(src):
+            return False
+        sources[role] = src
+    for role, src in sources.items():
+        if _same_file_content(src, targets[role]):
+            continue
+        _copy_atomic(src, targets[role])
+        if copied is not None:
+            copied.append(role)
+    entry["last_used"] = time.time()
+    return True
+
+def cache_store(cache_dir: str, manifest: Dict, key: str, input_path: str, params: Dict,
+                outputs: Dict[str, str | None]):
+    entry_dir = os.path.join(cache_dir, key)
+    os.makedirs(entry_dir, exist_ok=True)
+    files, total = {}, 0
+    for role, src in outputs.items():
+        if not src or role not in _CACHE_ROLES or not os.path.exists(src):
+            continue
+        rel = os.path.join(key, _CACHE_ROLES[role])
+        _copy_atomic(src, os.path.join(cache_dir, rel))
+        files[role] = rel
+        total += os.path.getsize(src)
+    now = time.time()
+    manifest["entries"][key] = {
+        "version": _CACHE_VERSION,
+        "input": os.path.abspath(input_path),
+        "params": params,
+        "files": files,
+        "bytes": total,
+        "created": now,
+        "last_used": now,
+    }
+
+def cache_evict(cache_dir: str, manifest: Dict, max_bytes: int | None, max_age_s: float | None,
+                keep: str | None = None) -> List[str]:
+    """
+    Remove entradas mais velhas que max_age_s (por último uso) e, depois, as menos
+    usadas recentemente até o total caber em max_bytes. `keep` nunca é removida.
+    Retorna as chaves removidas.
+    """
+    entries = manifest["entries"]
+    now = time.time()
+    evicted = []
+    if max_age_s is not None:
+        for k, e in list(entries.items()):
+            if k != keep and now - e.get("last_used", 0) > max_age_s:
+                evicted.append(k)
+                del entries[k]
+    if max_bytes is not None:
+        total = sum(e.get("bytes", 0) for e in entries.values())
+        for k, e in sorted(entries.items(), key=lambda kv: kv[1].get("last_used", 0)):
+            if total <= max_bytes:
+                break
+            if k == keep:
+                continue
+            total -= e.get("bytes", 0)
+            evicted.append(k)
+            del entries[k]
+    for k in evicted:
+        shutil.rmtree(os.path.join(cache_dir, k), ignore_errors=True)
+    # inputs sem nenhuma entrada apontando para eles não precisam ficar no manifest
+    live_inputs = {e.get("input") for e in entries.values()}
+    for p in list(manifest["inputs"]):
+        if p not in live_inputs:
+            del manifest["inputs"][p]
+    return evicted
+
+# ============================
+# Instrumentação por etapa (__Profile.json)
+# ============================
+
+def _rss_mb() -> float | None:
+    """RSS atual (MB) via /proc; None fora do Linux."""
+    try:
+        with open("/proc/self/statm", "r") as fh:
+            pages = int(fh.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024.0 * 1024.0)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+def _peak_rss_mb() -> float | None:
+    """Pico de RSS do processo (MB). ru_maxrss é KB no Linux e bytes no macOS."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+class RunProfile:
+    """
+    Coleta tempo de parede, RSS e formato (linhas × colunas) de cada etapa do pipeline.
+    Uso: `with prof.stage("read") as st: df = ...; st.update(rows=..., cols=...)`.
+    """
+
+    def __init__(self, input_path: str | None = None):
+        self.input_path = input_path
+        self.started_at = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        self.t0 = time.perf_counter()
+        self.stages: List[Dict] = []
+        self.cache: str | None = None
+        # status de cache atribuído às etapas que não informam o próprio
+        self.default_cache: str | None = None
+
+    @contextlib.contextmanager
+    def stage(self, name: str, cache: str | None = None):
+        rec: Dict = {"name": name, "cache": cache}
+        t = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec["wall_ms"] = round((time.perf_counter() - t) * 1000.0, 3)
+            if rec["cache"] is None:
+                rec["cache"] = self.default_cache
+            rss, peak = _rss_mb(), _peak_rss_mb()
+            if rss is not None and peak is not None:
+                peak = max(peak, rss)
+            rec["rss_mb"] = None if rss is None else round(rss, 1)
+            rec["peak_rss_mb"] = None if peak is None else round(peak, 1)
+            self.stages.append(rec)
+
+    @staticmethod
+    def shape(df) -> Dict[str, int]:
+        return {"rows": int(df.shape[0]), "cols": int(df.shape[1]) if df.ndim > 1 else 1}
+
+    def to_dict(self) -> Dict:
+        # ru_maxrss pode ficar atrás do RSS lido do /proc: o pico do run cobre o das etapas
+        peaks = [_peak_rss_mb(), _rss_mb()] + [st.get("peak_rss_mb") for st in self.stages]
+        peak = max((p for p in peaks if p is not None), default=None)
+        return {
+            "version": 1,
+            "input": None if self.input_path is None else os.path.abspath(self.input_path),
+            "started_at": self.started_at,
+            "total_ms": round((time.perf_counter() - self.t0) * 1000.0, 3),
+            "peak_rss_mb": None if peak is None else round(peak, 1),
+            "cache": self.cache,
+            "stages": self.stages,
+        }
+
+    def write(self, path: str):
+        with atomic_output(path) as tmp, open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.to_dict(), fh, ensure_ascii=False, indent=2)
+
+# ============================
+# API em processo (run_pipeline)
+# ============================
+# Mesma pontuação da CLI sem passar pelo disco: entra DataFrame (ou caminho),
+# saem Resultado e MetricsExport em memória. Arquivos só quando pedidos no config.
+# Cabeçalho repetido entre chamadas reaproveita sinônimos e grupos de colunas
+# (lru_cache), então pontuar milhares de fatias é O(linhas) por fatia.
+
+@dataclass
+class PipelineConfig:
+    """Pesos, normalização e saídas opcionais; os defaults são os mesmos da CLI."""
+    w_presenca: float = 12.0
+    w_pop: float = 24.0
+    w_ativ: float = 16.0
+    w_eng: float = 28.0
+    w_dif: float = 20.0
+    piso_positivo: float = 1.0
+    cap_min: float = 98.0
+    dominance_factor: float = 10.0
+    float32: bool = False
+    group_by: str | None = None      # normaliza cada dimensão dentro dos grupos desta coluna
+    sheet: str | int = 0             # só para caminhos XLSX
+    excel_engine: str = "openpyxl"   # openpyxl | calamine | auto (ver excel_engine)
+    metrics: bool = True             # monta o MetricsExport (long)
+    # sinks opcionais (None = não grava)
+    out_csv: str | None = None
+    out_xlsx: str | None = None
+    metrics_csv: str | None = None
+    format: str = "csv"              # parquet/arrow: grava também <out_csv|metrics_csv>.<fmt>
+
+    def __post_init__(self):
+        if self.format not in ("csv", *_COLUMNAR_FORMATS):
+            raise ValueError(f"format inválido: {self.format!r} (csv, parquet ou arrow)")
+        if self.excel_engine not in _EXCEL_ENGINES:
+            raise ValueError(f"excel_engine inválido: {self.excel_engine!r} ({', '.join(_EXCEL_ENGINES)})")
+
+    @classmethod
+    def from_args(cls, args) -> "PipelineConfig":
+        """Config equivalente a um Namespace da CLI (sem sinks: run_job grava os seus)."""
+        return cls(**{f.name: getattr(args, f.name) for f in fields(cls)
+                      if f.name in _CONFIG_ARG_FIELDS and hasattr(args, f.name)})
+
+    @property
+    def weights(self) -> Dict[str, float]:
+        return {"presenca": self.w_presenca, "popularidade": self.w_pop, "atividade": self.w_ativ,
+                "engajamento": self.w_eng, "difusao": self.w_dif}
+
+    @property
+    def norm_params(self) -> Dict[str, float]:
+        return {"piso_positivo": self.piso_positivo, "cap_min": self.cap_min,
+                "dominance_factor": self.dominance_factor}
+
+    @property
+    def dtype(self):
+        return np.float32 if self.float32 else np.float64
+
+_CONFIG_ARG_FIELDS = ("w_presenca", "w_pop", "w_ativ", "w_eng", "w_dif",
+                      "piso_positivo", "cap_min", "dominance_factor", "float32", "group_by")
+_DEFAULTS = PipelineConfig()
+
+@dataclass
+class PipelineResult:
+    result: pd.DataFrame                      # name + *_100 + sir_final_0_100
+    metrics: pd.DataFrame | None              # MetricsExport long (None com metrics=False)
+    renamed: Dict[str, str]                   # colunas renomeadas via sinônimos
+    missing: List[str]                        # grupos de colunas não encontrados (tratados como 0)
+    outputs: Dict[str, str] = field(default_factory=dict)  # arquivos gravados pelos sinks
+
+def write_result_table(result: pd.DataFrame, out_csv: str, out_xlsx: str | None = None,
+                       fmt: str = "csv") -> Dict[str, str]:
+    """Grava o Resultado (CSV com 1 casa; XLSX e parquet/arrow opcionais). Retorna os caminhos."""
+    with atomic_output(out_csv) as tmp:
+        result.to_csv(tmp, index=False, encoding="utf-8", float_format="%.1f")
+    paths = {"resultado": out_csv}
+    if out_xlsx:
+        with atomic_output(out_xlsx) as tmp:
+            result.to_excel(tmp, index=False)
+        paths["xlsx"] = out_xlsx
+    if fmt != "csv":
+        paths[f"resultado_{fmt}"] = _columnar_path(out_csv, fmt)
+        write_columnar(result, paths[f"resultado_{fmt}"], fmt)
+    return paths
+
+def write_metrics_table(metrics_long: pd.DataFrame, metrics_csv: str, fmt: str = "csv") -> Dict[str, str]:
+    """Grava o MetricsExport (CSV e, com fmt parquet/arrow, a versão colunar). Retorna os caminhos."""
+    write_metrics_long(metrics_long, metrics_csv)
+    paths = {"metrics": metrics_csv}
+    if fmt != "csv":
+        paths[f"metrics_{fmt}"] = _columnar_path(metrics_csv, fmt)
+        write_metrics_long_columnar(metrics_long, paths[f"metrics_{fmt}"], fmt)
+    return paths
+
+def run_pipeline(data: pd.DataFrame | str, config: PipelineConfig | None = None, **overrides) -> PipelineResult:
+    """
+    Pontua um DataFrame (ou caminho CSV/XLSX) em memória, sem prints nem arquivos.
+    `overrides` ajustam campos do config: run_pipeline(df, w_eng=40.0).
+    O DataFrame de entrada não é modificado. Só grava com out_csv/out_xlsx/metrics_csv.
+
+        >>> from sir_excel_pipeline_v6 import run_pipeline, PipelineConfig
+        >>> res = run_pipeline(df, PipelineConfig(cap_min=95.0, metrics=False))
+        >>> res.result.sort_values("sir_final_0_100", ascending=False).head()
+    """
+    config = replace(config or _DEFAULTS, **overrides) if overrides or config is None else config
+    if config.format != "csv" and (config.out_csv or config.metrics_csv):
+        _require_pyarrow()
+
+    if isinstance(data, pd.DataFrame):
+        df_in = data
+    else:
+        path = os.fspath(data)
+        sheet = _coerce_sheet_arg(config.sheet) if isinstance(config.sheet, str) else config.sheet
+        df_in = _read_table_any(path) if path.lower().endswith(".csv") else \
+            _read_table_any(path, sheet_name=sheet, engine=excel_engine(config.excel_engine))
+
+    df_in, renamed, missing = canonicalize_columns(df_in)
+    df_in = clean_numeric_dataframe_one_decimal(df_in)
+    groups = group_layout(df_in, config.group_by, renamed) if config.group_by else None
+    names, dims_raw = compute_dimension_arrays(df_in, config.dtype, groups)
+    dims_100 = dimension_scores_0_100(dims_raw, groups=groups, **config.norm_params)
+    result = weighted_final_from_arrays(names, dims_100, config.weights)
+    if groups is not None:
+        _attach_group(result, groups, config.group_by)
+    metrics_long = build_metrics_long(df_in) if config.metrics or config.metrics_csv else None
+
+    outputs: Dict[str, str] = {}
+    if config.out_csv or config.out_xlsx:
+        if config.out_csv:
+            outputs.update(write_result_table(result, config.out_csv, config.out_xlsx, config.format))
+        else:
+            with atomic_output(config.out_xlsx) as tmp:
+                result.to_excel(tmp, index=False)
+            outputs["xlsx"] = config.out_xlsx
+    if config.metrics_csv:
+        outputs.update(write_metrics_table(metrics_long, config.metrics_csv, config.format))
+    return PipelineResult(result=result, metrics=metrics_long if config.metrics else None,
+                          renamed=renamed, missing=missing, outputs=outputs)
 
 # ============================
 # CLI
 # ============================
 
-def parse_args():
+def build_arg_parser() -> argparse.ArgumentParser:
     ap = argparse.ArgumentParser(description="SIR Excel v6.1 (IO clean; metrics export; csv/xlsx)")
-    ap.add_argument("--excel", required=True, help="Caminho do arquivo de métricas (XLSX ou CSV)")
+    ap.add_argument("--excel", default=None, help="Caminho do arquivo de métricas (XLSX ou CSV)")
     # guardamos como string; no main coergimos para int quando for "0","1",...
-    ap.add_argument("--sheet", default="0", help="Nome/índice da sheet (só em XLSX)")
+    ap.add_argument("--sheet", default="0",
+                    help="Nome/índice da sheet (só em XLSX); 'all' pontua cada sheet separadamente")
+    ap.add_argument("--excel-engine", choices=_EXCEL_ENGINES, default="openpyxl",
+                    help="Leitor XLSX: openpyxl (padrão), calamine (python-calamine, mais rápido; pode "
+                         "diferir em datas/fórmulas/células vazias) ou auto (calamine se instalado)")
     ap.add_argument("--out-csv", default=None, help="CSV final de resultados (se omitido, deriva como __Resultado.csv)")
     ap.add_argument("--out-xlsx", default=None, help="XLSX final de resultados (opcional)")
     ap.add_argument("--out-dir", default=None, help="Diretório para salvar saídas; padrão: data/processed ou pasta do input")
+    ap.add_argument("--stream", action="store_true",
+                    help="CSV grande: lê em blocos com memória limitada (mesmo resultado da leitura inteira)")
+    ap.add_argument("--chunk-rows", type=int, default=200_000, help="Linhas por bloco no --stream")
+    ap.add_argument("--float32", action="store_true",
+                    help="Matriz numérica das dimensões em float32 (metade da memória; somas em float64)")
+    ap.add_argument("--group-by", default=None, metavar="COLUNA",
+                    help="Normaliza cada dimensão dentro dos grupos desta coluna (setor, UF, tier...)")
+    ap.add_argument("--format", choices=["csv", "parquet", "arrow"], default="csv",
+                    help="parquet/arrow: grava também Resultado e MetricsExport colunares (requer pyarrow)")
 
     # Pesos das dimensões
-    ap.add_argument("--w-presenca", type=float, default=12.0)
-    ap.add_argument("--w-pop",      type=float, default=24.0)
-    ap.add_argument("--w-ativ",     type=float, default=16.0)
-    ap.add_argument("--w-eng",      type=float, default=28.0)
-    ap.add_argument("--w-dif",      type=float, default=20.0)
+    ap.add_argument("--w-presenca", type=float, default=_DEFAULTS.w_presenca)
+    ap.add_argument("--w-pop",      type=float, default=_DEFAULTS.w_pop)
+    ap.add_argument("--w-ativ",     type=float, default=_DEFAULTS.w_ativ)
+    ap.add_argument("--w-eng",      type=float, default=_DEFAULTS.w_eng)
+    ap.add_argument("--w-dif",      type=float, default=_DEFAULTS.w_dif)
 
     # Pesos por plataforma (DEPRECATED)
     # ap.add_argument("--w-facebook",  type=float, default=0.5)
@@ -525,35 +2754,310 @@ def parse_args():
     # ap.add_argument("--w-tiktok",    type=float, default=1.0)
 
     # Normalização
-    ap.add_argument("--piso_positivo",   type=float, default=1.0)
-    ap.add_argument("--cap_min",         type=float, default=98.0)
-    ap.add_argument("--dominance_factor",type=float, default=10.0)
+    ap.add_argument("--piso_positivo",   type=float, default=_DEFAULTS.piso_positivo)
+    ap.add_argument("--cap_min",         type=float, default=_DEFAULTS.cap_min)
+    ap.add_argument("--dominance_factor",type=float, default=_DEFAULTS.dominance_factor)
 
     # Plots
     ap.add_argument("--plots-dir",  default=None)
     ap.add_argument("--bar-width",  type=float, default=12.0)
     ap.add_argument("--bar-height", type=float, default=6.0)
     ap.add_argument("--plot-prefix", default="SIR_")
-
-    return ap.parse_args()
+    ap.add_argument("--plot-format", choices=["png", "svg"], default="png")
+    ap.add_argument("--plot-combined", action="store_true",
+                    help="Um único arquivo com todos os gráficos (um painel por coluna)")
+    ap.add_argument("--plot-jobs", type=int, default=None,
+                    help="Processos para renderizar gráficos; padrão: min(CPUs, colunas)")
+
+    # Cache de resultados
+    ap.add_argument("--cache-dir", default=None,
+                    help="Diretório do cache de resultados; padrão: <out-dir>/.sir_cache")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Ignora o cache e sempre recalcula (inclusive depois de esperar outra execução "
+                         "com as mesmas saídas)")
+    ap.add_argument("--trust-mtime", action="store_true",
+                    help="Reaproveita o hash do input quando tamanho e mtime não mudaram (mais rápido; "
+                         "arquivo editado com mtime preservado passa despercebido)")
+    ap.add_argument("--cache-max-mb", type=float, default=256.0, help="Tamanho máximo do cache (MB)")
+    ap.add_argument("--cache-max-age-days", type=float, default=30.0,
+                    help="Remove entradas sem uso há mais de N dias")
+    ap.add_argument("--lock-timeout", type=float, default=_WAVE_LOCK_TIMEOUT_S,
+                    help="Segundos esperando outra execução com as mesmas saídas antes de falhar")
+
+    # Payloads do dashboard
+    ap.add_argument("--emit-json", action="store_true",
+                    help="Grava overview.json, radar.json e metrics.json (schema do front) de forma atômica")
+    ap.add_argument("--json-dir", default=None,
+                    help="Destino dos JSON; padrão: pasta acima de .../pendulo (processed/<client>/<wave>)")
+    ap.add_argument("--client", default=None, help="Slug do cliente (padrão: inferido do --json-dir)")
+    ap.add_argument("--wave", default=None, help="Onda, ex.: P6 (padrão: inferida do --json-dir)")
+
+    # Ranks / percentis / deltas
+    ap.add_argument("--ranks", action="store_true",
+                    help="Grava <base>__Ranks.csv (rank/percentil/delta vs P(n-1)) e __MetricDeltas.csv; "
+                         "implícito com --emit-json (que grava também ranks.json)")
+    ap.add_argument("--prev-resultado", default=None, metavar="RESULTADO_CSV",
+                    help="__Resultado.csv da onda anterior; padrão: P(n-1) em processed/<client>/<wave-1>/pendulo")
+
+    # Reweight
+    ap.add_argument("--reweight", default=None, metavar="DIMENSIONS_NPZ",
+                    help="Recalcula só a nota final a partir de um __Dimensions.npz (sem ler a planilha)")
+
+    # Sweep de pesos
+    ap.add_argument("--sweep", default=None, metavar="DIMENSIONS_NPZ",
+                    help="Distribuição de ranks sob muitos vetores de pesos, a partir de um __Dimensions.npz")
+    ap.add_argument("--sweep-samples", type=int, default=10000, help="Vetores aleatórios (Dirichlet) no sweep")
+    ap.add_argument("--sweep-grid", type=float, default=None,
+                    help="Usa grade no simplex com este passo (ex.: 0.05) em vez de amostras aleatórias")
+    ap.add_argument("--sweep-concentration", type=float, default=None,
+                    help="Concentra as amostras em torno dos --w-* (Dirichlet(c * w)); padrão: uniforme")
+    ap.add_argument("--sweep-seed", type=int, default=None)
+    ap.add_argument("--sweep-chunk", type=int, default=8192, help="Máx. de vetores por bloco")
+
+    # Batch
+    ap.add_argument("--batch", default=None, metavar="RAW_ROOT",
+                    help="Processa todas as ondas em RAW_ROOT/<client>/<wave>/ (como o runner)")
+    ap.add_argument("--batch-out-root", default=None,
+                    help="Raiz das saídas do batch/--series; padrão: pasta 'processed' irmã de RAW_ROOT")
+    ap.add_argument("--batch-summary", default=None,
+                    help="JSON com tempos/falhas do batch; padrão: <out-root>/batch_summary.json")
+    ap.add_argument("--jobs", type=int, default=None,
+                    help="Processos no batch/--sheet all (padrão: nº de CPUs) e no --watch (padrão: 1)")
+    ap.add_argument("--series", default=None, metavar="RAW_ROOT",
+                    help="Atualiza <out-root>/<client>/series.json pontuando só ondas novas/alteradas "
+                         "(--client restringe a um cliente)")
+    ap.add_argument("--watch", default=None, metavar="RAW_ROOT",
+                    help="Fica observando RAW_ROOT/<client>/<wave>/ e repontua (como o --series) as ondas "
+                         "cujo input mudou; --jobs processos (padrão 1)")
+    ap.add_argument("--watch-interval", type=float, default=2.0, help="Segundos entre verificações do --watch")
+    ap.add_argument("--watch-debounce", type=float, default=5.0,
+                    help="Input precisa ficar N segundos sem mudar (size/mtime) antes de ser pontuado")
+    ap.add_argument("--watch-queue", type=int, default=16,
+                    help="Máximo de ondas esperando na fila do --watch")
+
+    # Diagnóstico
+    ap.add_argument("--profile", action="store_true",
+                    help="Grava <base>__Profile.json (tempo, RSS, linhas/colunas e cache por etapa)")
+    ap.add_argument("--timings", action="store_true",
+                    help="Relatório de startup/execução no stderr. Orçamento de cold-start: planilha pequena "
+                         f"(≤ 1k linhas, sem plots/xlsx) em até {_COLD_START_BUDGET_MS:.0f} ms de parede")
+
+    # Worker persistente
+    ap.add_argument("--serve", action="store_true",
+                    help="Modo worker: lê jobs JSON (um por linha) no stdin e responde no stdout")
+
+    return ap
+
+def parse_args(argv: List[str] | None = None):
+    ap = build_arg_parser()
+    args = ap.parse_args(argv)
+    if not (args.serve or args.batch or args.series or args.watch or args.reweight or args.sweep or args.excel):
+        ap.error("--excel é obrigatório (exceto em --serve/--batch/--series/--watch/--reweight/--sweep)")
+    return args
 
 # ============================
 # Pipeline
 # ============================
 
-def main():
-    args = parse_args()
+def run_job(args) -> Dict[str, str | None]:
+    """
+    Executa o pipeline completo para um conjunto de argumentos já parseados.
+    Cada etapa é cronometrada (RunProfile); com --profile grava <base>__Profile.json.
+    Retorna os caminhos gerados: {"resultado", "metrics", "xlsx", "dimensions", "profile", "cache"}
+    (+ "resultado_<fmt>"/"metrics_<fmt>" com --format parquet|arrow).
+    Com --sheet all num XLSX delega para run_all_sheets.
+
+    Execuções para o mesmo __Resultado.csv são serializadas por um lock (<saída>.lock):
+    a segunda espera a primeira terminar e, com cache, sai num hit em vez de recalcular.
+    Com --no-cache não há o que reaproveitar: a segunda recalcula e regrava (é o que
+    --no-cache pede); as escritas continuam atômicas e sem intercalar.
+    """
+    auto_out_csv, _ = _derive_basenames(args.excel, args.out_dir)
+    timeout_s = getattr(args, "lock_timeout", _WAVE_LOCK_TIMEOUT_S)
+    with _file_lock(args.out_csv or auto_out_csv, timeout_s, stale_s=_WAVE_LOCK_STALE_S) as waited_s:
+        if waited_s >= 0.1:
+            print(f"[INFO] Aguardou {waited_s:.1f}s outra execução com as mesmas saídas")
+        if _is_all_sheets(args.sheet) and os.path.splitext(args.excel)[1].lower() != ".csv":
+            return run_all_sheets(args)
+        return _run_job_locked(args)
+
+def _run_job_locked(args) -> Dict[str, str | None]:
+    """Corpo de run_job, já com o lock das saídas."""
+    prof = RunProfile(args.excel)
+
+    # 0) Saídas derivadas + cache (hit -> nenhum trabalho além de copiar arquivos)
+    auto_out_csv, metrics_csv = _derive_basenames(args.excel, args.out_dir)
+    out_csv = args.out_csv or auto_out_csv
+    out_xlsx = args.out_xlsx  # opcional
+    dims_npz = _derived_output(metrics_csv, "__Dimensions.npz")
+    profile_json = _derived_output(metrics_csv, "__Profile.json") if args.profile else None
+    targets = {"resultado": out_csv, "metrics": metrics_csv, "xlsx": out_xlsx, "dimensions": dims_npz}
+    fmt = getattr(args, "format", "csv")
+    if fmt != "csv":
+        _require_pyarrow()  # falha antes de calcular qualquer coisa
+        targets[f"resultado_{fmt}"] = _columnar_path(out_csv, fmt)
+        targets[f"metrics_{fmt}"] = _columnar_path(metrics_csv, fmt)
+    cfg = PipelineConfig.from_args(args)
+    want_ranks = bool(getattr(args, "ranks", False) or args.emit_json)
+    ranks_csv = _derived_output(metrics_csv, "__Ranks.csv")
+    deltas_csv = _derived_output(metrics_csv, "__MetricDeltas.csv")
+
+    def _derived_up_to_date() -> bool:
+        """
+        Hit sem nenhum arquivo restaurado: ranks e JSONs do dashboard já derivam deste
+        input e das ondas anteriores como estão agora? (mtime dos derivados >= das fontes)
+        """
+        def mtime(path):
+            return os.path.getmtime(path) if path and os.path.exists(path) else None
+        t_result = mtime(out_csv)
+        if t_result is None:
+            return False
+        t_ranks = None
+        if want_ranks:
+            prev_resultado, _, _ = rank_prev_resultado(args, out_csv)
+            t_ranks = mtime(ranks_csv)
+            if t_ranks is None or t_ranks < t_result:
+                return False
+            if prev_resultado:
+                t_prev = mtime(prev_resultado)
+                if t_prev is None or t_prev > t_ranks or mtime(deltas_csv) is None:
+                    return False
+        if args.emit_json:
+            json_dir, out_root, client, wave = _dashboard_target(out_csv, args.json_dir, args.client, args.wave)
+            stamps = [mtime(os.path.join(json_dir, f"{k}.json")) for k in ("overview", "radar", "metrics", "ranks")]
+            if None in stamps:
+                return False
+            t_json = min(stamps)
+            waves = load_series_index(out_root, client)["waves"]
+            if waves.get(wave, {}).get("key") != key or t_json < max(t_result, t_ranks or 0.0):
+                return False
+            # overview.series/prev totals leem as ondas até esta: nenhuma repontuada depois dos JSONs
+            limit = _wave_order(wave)
+            if any(w.get("updated", 0.0) > t_json for name, w in waves.items() if _wave_order(name) <= limit):
+                return False
+        return True
+
+    def _finish(cache_status: str, result: pd.DataFrame | None = None,
+                metrics_long: pd.DataFrame | None = None) -> Dict[str, str | None]:
+        # ranks/deltas dependem de P(n-1): fora do cache, sempre recalculados
+        ranks_out = {}
+        if want_ranks:
+            with prof.stage("ranks") as st:
+                if result is None:
+                    result = pd.read_csv(out_csv)
+                prev_resultado, prev_wave, prev_key = rank_prev_resultado(args, out_csv)
+                if metrics_long is None and prev_resultado:
+                    metrics_long = pd.read_csv(metrics_csv)
+                ranks, deltas = write_rank_tables(result, metrics_long, prev_resultado,
+                                                  ranks_csv, deltas_csv, cfg.group_by)
+                st.update(prof.shape(ranks))
+            ranks_out = {"ranks": ranks_csv, "metric_deltas": deltas_csv if deltas is not None else None}
+            print(f"[OK] Ranks/percentis salvos em: {ranks_csv}"
+                  + (f" (deltas contra {prev_resultado})" if prev_resultado else " (sem onda anterior)"))
+        json_dir = None
+        if args.emit_json:
+            with prof.stage("emit_json"):
+                # hash já calculado no lookup desta execução: não relê o input
+                fingerprint = _wave_fingerprint(args.excel, cache_params(args), input_rec, trust_mtime=True)
+                # saídas principais da onda: find_wave_outputs não confunde com as de --sheet all
+                fingerprint.update(resultado=os.path.abspath(out_csv), metrics=os.path.abspath(metrics_csv))
+                paths = emit_dashboard_json(out_csv, args.json_dir, args.client, args.wave, fingerprint)
+                json_dir = os.path.dirname(paths["overview"])
+                _write_json_atomic(os.path.join(json_dir, "ranks.json"), build_ranks_payload(
+                    ranks, deltas, args.wave or os.path.basename(json_dir), prev_wave, prev_key, cfg.group_by))
+            print(f"[OK] Payloads JSON do dashboard salvos em: {json_dir}")
+        prof.cache = cache_status
+        if profile_json:
+            prof.write(profile_json)
+        return {**targets, **ranks_out, "profile": profile_json, "json_dir": json_dir, "cache": cache_status}
+
+    # plots não são guardados no cache: pedir plots força recálculo
+    use_cache = not args.no_cache and not args.plots_dir
+    prof.default_cache = "miss" if use_cache else "off"
+    input_rec = None
+    if use_cache:
+        with prof.stage("cache_lookup") as st:
+            cache_dir = args.cache_dir or os.path.join(os.path.dirname(os.path.abspath(out_csv)), ".sir_cache")
+            params = cache_params(args)
+            # hash fora do lock do manifest (planilha grande); o manifest sem lock só serve de dica p/ --trust-mtime
+            input_abs = os.path.abspath(args.excel)
+            in_stat, input_sha = input_sha256(input_abs, _cache_load_manifest(cache_dir)["inputs"].get(input_abs),
+                                              getattr(args, "trust_mtime", False))
+            input_rec = {"size": in_stat.st_size, "mtime_ns": in_stat.st_mtime_ns, "sha256": input_sha}
+            key = cache_key(input_sha, params)
+            copied: List[str] = []
+            with cache_manifest(cache_dir) as manifest:
+                manifest["inputs"][input_abs] = input_rec
+                hit = cache_restore(cache_dir, manifest, key, targets, copied)
+                if hit:
+                    cache_evict(cache_dir, manifest,
+                                max_bytes=int(args.cache_max_mb * 1024 * 1024),
+                                max_age_s=args.cache_max_age_days * 86400.0,
+                                keep=key)
+            st["cache"] = "hit" if hit else "miss"
+        if hit and not copied and _derived_up_to_date():
+            # leitura pura: nada foi restaurado e ranks/JSONs já estão atuais -> não regrava nada
+            print(f"[OK] Cache hit ({key[:12]}): saídas já atualizadas em {os.path.dirname(os.path.abspath(out_csv))}")
+            json_dir = _dashboard_target(out_csv, args.json_dir, args.client, args.wave)[0] if args.emit_json else None
+            ranks_out = {}
+            if want_ranks:
+                ranks_out = {"ranks": ranks_csv, "metric_deltas": deltas_csv if os.path.exists(deltas_csv) else None}
+            prof.cache = "hit"
+            if profile_json:
+                prof.write(profile_json)
+            return {**targets, **ranks_out, "profile": profile_json, "json_dir": json_dir, "cache": "hit"}
+        if hit:
+            print(f"[OK] Cache hit ({key[:12]}): saídas restauradas em {os.path.dirname(os.path.abspath(out_csv))}")
+            return _finish("hit")
+
+    # 2) Pré-ponderação por plataforma (aplicada após a leitura)
+    platform_weights = {
+    "facebook": getattr(args, "w_facebook", 1.0),
+    "twitter": getattr(args, "w_twitter", 1.0),
+    "instagram": getattr(args, "w_instagram", 1.0),
+    "tiktok": getattr(args, "w_tiktok", 1.0),
+        }
 
-    # 1) Ler entrada (CSV/XLSX) e padronizar colunas
-    #    - CSV ignora sheet
-    #    - XLSX: coagir "0" -> 0 (índice), "Planilha1" permanece string
     ext = os.path.splitext(args.excel)[1].lower()
-    if ext == ".csv":
-        df_in = _read_table_any(args.excel)
+    dtype = cfg.dtype
+    streaming = bool(getattr(args, "stream", False))
+    if streaming and ext != ".csv":
+        print("[WARN] --stream só vale para CSV; lendo a planilha inteira")
+        streaming = False
+    if streaming and cfg.group_by:
+        print("[WARN] --group-by precisa das estatísticas de cada grupo; lendo a planilha inteira")
+        streaming = False
+
+    norm_stats = groups = None
+    if streaming:
+        # 1–3 em blocos: memória limitada ao bloco + resumo de dimensões por linha
+        with prof.stage("stream_scan") as st:
+            plan = scan_csv(args.excel, args.chunk_rows)
+            st.update(rows=plan["rows"], cols=len(plan["kinds"]))
+        with prof.stage("stream_score") as st:
+            names, dims_raw, norm_stats, applied_map, faltas = score_csv_streaming(
+                args.excel, plan, metrics_csv, args.chunk_rows, dtype)
+            st.update(rows=len(names), cols=len(dims_raw))
+        apply_platform_weights(None, platform_weights)  # só loga pesos ignorados
     else:
-        df_in = _read_table_any(args.excel, sheet_name=_coerce_sheet_arg(args.sheet))
-    df_in, applied_map, faltas = canonicalize_columns(df_in)
-    df_in = clean_numeric_dataframe_one_decimal(df_in)
+        # 1) Ler entrada (CSV/XLSX) e padronizar colunas
+        #    - CSV ignora sheet
+        #    - XLSX: coagir "0" -> 0 (índice), "Planilha1" permanece string
+        with prof.stage("read") as st:
+            if ext == ".csv":
+                df_in = _read_table_any(args.excel)
+            else:
+                engine = excel_engine(getattr(args, "excel_engine", "openpyxl"))
+                df_in = _read_table_any(args.excel, sheet_name=_coerce_sheet_arg(args.sheet), engine=engine)
+                st["engine"] = engine or "openpyxl"
+                print(f"[INFO] XLSX lido com {st['engine']}")
+            st.update(prof.shape(df_in))
+        with prof.stage("canonicalize_columns") as st:
+            df_in, applied_map, faltas = canonicalize_columns(df_in)
+            st.update(prof.shape(df_in))
+        with prof.stage("clean_numeric") as st:
+            df_in = clean_numeric_dataframe_one_decimal(df_in)
+            st.update(prof.shape(df_in))
 
     if applied_map:
         print("[INFO] Colunas renomeadas via sinônimos:")
@@ -564,58 +3068,576 @@ def main():
         for f in faltas:
             print(f"   - padrão não encontrado: {f}")
 
-    # 2) Pré-ponderação por plataforma
-    platform_weights = {
-    "facebook": getattr(args, "w_facebook", 1.0),
-    "twitter": getattr(args, "w_twitter", 1.0),
-    "instagram": getattr(args, "w_instagram", 1.0),
-    "tiktok": getattr(args, "w_tiktok", 1.0),
-        }
-    df_weighted = apply_platform_weights(df_in, platform_weights)
+    if not streaming:
+        df_weighted = apply_platform_weights(df_in, platform_weights)
 
-    # 3) Dimensões brutas + presença (0–100)
-    dims_raw = compute_dimensions_raw(df_weighted)
-    dims_raw["presenca_100"] = compute_presence_score_0_100(dims_raw)
+        # 3) Dimensões brutas + presença (0–100): uma matriz numérica, sem copiar o DataFrame
+        with prof.stage("compute_dimensions") as st:
+            groups = group_layout(df_weighted, cfg.group_by, applied_map) if cfg.group_by else None
+            names, dims_raw = compute_dimension_arrays(df_weighted, dtype, groups)
+            st.update(rows=len(names), cols=len(dims_raw))
+            if groups is not None:
+                st["groups"] = groups.n
 
     # 4) POP/ATIV/ENG/DIF (0–100)
-    dims_100 = to_scores_0_100_other_dims(dims_raw,
-                                          piso_positivo=args.piso_positivo,
-                                          cap_min=args.cap_min,
-                                          dominance_factor=args.dominance_factor)
+    with prof.stage("normalize") as st:
+        dims_100 = dimension_scores_0_100(dims_raw, stats=norm_stats, groups=groups, **cfg.norm_params)
+        st.update(rows=len(names), cols=len(dims_100))
 
     # 5) Média ponderada final (0–100)
-    weights = {"presenca": args.w_presenca, "popularidade": args.w_pop,
-               "atividade": args.w_ativ, "engajamento": args.w_eng, "difusao": args.w_dif}
-    result = weighted_final_score_0_100(dims_100, weights)
+    with prof.stage("weighted_score") as st:
+        result = weighted_final_from_arrays(names, dims_100, cfg.weights)
+        if groups is not None:
+            _attach_group(result, groups, cfg.group_by)
+        st.update(prof.shape(result))
 
-    # 6) Definir saídas derivadas
-    auto_out_csv, metrics_csv = _derive_basenames(args.excel, args.out_dir)
-    out_csv = args.out_csv or auto_out_csv
-    out_xlsx = args.out_xlsx  # opcional
+    # 6) (saídas já derivadas no passo 0)
 
     # 7) Escrever resultados
     # 1 casa decimal e ponto como separador
-    result.to_csv(out_csv, index=False, encoding="utf-8", float_format="%.1f")
-    if out_xlsx:
-        result.to_excel(out_xlsx, index=False)
+    with prof.stage("write_result") as st:
+        write_result_table(result, out_csv, out_xlsx, fmt)
+        st.update(prof.shape(result))
     print(f"[OK] Resultado salvo em: {out_csv}")
 
+    # 7b) Matriz de dimensões (*_100) para reweight sem reler a planilha
+    with prof.stage("write_dimensions"):
+        save_dimensions_artifact(dims_npz, result, cfg.norm_params)
+
     # 8) Exportar subset padronizado para aba Metrics (direto da planilha de métricas):
-    export_metrics_long(df_in, metrics_csv)
+    #    (no streaming o CSV já foi gravado bloco a bloco em stream_score)
+    with prof.stage("export_metrics") as st:
+        if streaming:
+            if fmt != "csv":
+                # versão colunar a partir do CSV já exportado (esta etapa lê o export inteiro)
+                write_metrics_long_columnar(pd.read_csv(metrics_csv), targets[f"metrics_{fmt}"], fmt)
+        else:
+            metrics_long = build_metrics_long(df_in)
+            write_metrics_table(metrics_long, metrics_csv, fmt)
+            st.update(prof.shape(metrics_long))
     print(f"[OK] Metrics export salvo em: {metrics_csv}")
 
-    # 9) Plots (opcional)
-    if args.plots_dir and out_xlsx:
-        cols_to_plot = [c for c in result.columns if c != "name"]
-        make_all_bar_charts(
-            results_xlsx=out_xlsx, sheet=0, output_dir=args.plots_dir,
-            bar_width=args.bar_width, bar_height=args.bar_height, plot_prefix=args.plot_prefix,
-            name_col="name", columns=cols_to_plot,
-        )
+    # 9) Plots (opcional) — direto do DataFrame, sem reler o XLSX
+    if args.plots_dir:
+        with prof.stage("plots") as st:
+            cols_to_plot = _RESULT_COLS[1:]
+            written = render_bar_charts(
+                result, output_dir=args.plots_dir,
+                bar_width=args.bar_width, bar_height=args.bar_height, plot_prefix=args.plot_prefix,
+                name_col="name", columns=cols_to_plot,
+                fmt=args.plot_format, combined=args.plot_combined, jobs=args.plot_jobs,
+            )
+            st["files"] = len(written)
 
     # 10) Preview
     print("\nPrévia do resultado (0–100):")
     print(result.head())
 
+    # 11) Guardar no cache + despejo por idade/tamanho
+    if use_cache:
+        with prof.stage("cache_store"), cache_manifest(cache_dir) as manifest:
+            manifest["inputs"][input_abs] = input_rec
+            cache_store(cache_dir, manifest, key, args.excel, params, targets)
+            cache_evict(cache_dir, manifest,
+                        max_bytes=int(args.cache_max_mb * 1024 * 1024),
+                        max_age_s=args.cache_max_age_days * 86400.0,
+                        keep=key)
+
+    return _finish("miss" if use_cache else "off", result, None if streaming else metrics_long)
+
+# ============================
+# Todas as sheets (--sheet all)
+# ============================
+# O workbook é lido uma vez só (sheet_name=None) e cada sheet é pontuada como uma
+# planilha independente num pool de processos, com as próprias saídas:
+# <base>__<sheet>__Resultado.csv, __MetricsExport.csv e __Dimensions.npz (+ parquet/arrow).
+
+def _is_all_sheets(sheet) -> bool:
+    return isinstance(sheet, str) and sheet.strip().lower() == "all"
+
+def sheet_output_paths(metrics_csv: str, sheet_names: List) -> Dict[object, Tuple[str, str, str]]:
+    """{sheet: (resultado_csv, metrics_csv, dimensions_npz)}; slugs repetidos ganham sufixo -2, -3..."""
+    seen: Dict[str, int] = {}
+    paths = {}
+    for name in sheet_names:
+        slug = _slugify(str(name)) or "sheet"
+        n = seen[slug.lower()] = seen.get(slug.lower(), 0) + 1
+        if n > 1:
+            slug = f"{slug}-{n}"
+        paths[name] = tuple(_derived_output(metrics_csv, f"__{slug}__{suffix}")
+                            for suffix in ("Resultado.csv", "MetricsExport.csv", "Dimensions.npz"))
+    return paths
+
+def _sheet_worker(job: Dict) -> Dict:
+    """Pontua uma sheet num processo do pool. Nunca levanta: erros voltam no dict."""
+    t0 = time.perf_counter()
+    cfg: PipelineConfig = job["config"]
+    rec = {"sheet": job["sheet"]}
+    try:
+        res = run_pipeline(job["df"], cfg)
+        save_dimensions_artifact(job["dimensions"], res.result, cfg.norm_params)
+        outputs = {**res.outputs, "dimensions": job["dimensions"]}
+        if job["plots"]:
+            outputs["plots"] = len(render_bar_charts(res.result, name_col="name", columns=_RESULT_COLS[1:],
+                                                     jobs=1, **job["plots"]))
+        rec.update(ok=True, rows=len(res.result), outputs=outputs, missing=res.missing)
+    except Exception as e:
+        rec.update(ok=False, error=f"{type(e).__name__}: {e}")
+    rec["elapsed_s"] = round(time.perf_counter() - t0, 3)
+    return rec
+
+def run_all_sheets(args) -> Dict:
+    """
+    --sheet all: um parse do workbook, pontuação por sheet em até args.jobs processos.
+    Sheets que falham não interrompem as demais; no fim, RuntimeError lista as falhas.
+    Sem cache (a chave é por sheet) e sem --out-csv/--out-xlsx/--emit-json (saída única).
+    """
+    fmt = getattr(args, "format", "csv")
+    if fmt != "csv":
+        _require_pyarrow()
+    for flag, value in (("--out-csv", args.out_csv), ("--out-xlsx", args.out_xlsx), ("--emit-json", args.emit_json)):
+        if value:
+            print(f"[WARN] {flag} ignorado com --sheet all (saídas derivadas por sheet)")
+
+    t0 = time.perf_counter()
+    engine = excel_engine(getattr(args, "excel_engine", "openpyxl"))
+    sheets = _read_table_any(args.excel, sheet_name=None, engine=engine)
+    print(f"[INFO] {len(sheets)} sheet(s) lidas em {time.perf_counter() - t0:.2f}s ({engine or 'openpyxl'})")
+
+    _, metrics_csv = _derive_basenames(args.excel, args.out_dir)
+    base_cfg = replace(PipelineConfig.from_args(args), format=fmt, metrics=False)
+    jobs = []
+    for name, (res_csv, met_csv, dims_npz) in sheet_output_paths(metrics_csv, list(sheets)).items():
+        plots = None
+        if args.plots_dir:
+            plots = dict(output_dir=os.path.join(args.plots_dir, os.path.basename(dims_npz)[: -len("__Dimensions.npz")]),
+                         bar_width=args.bar_width, bar_height=args.bar_height, plot_prefix=args.plot_prefix,
+                         fmt=args.plot_format, combined=args.plot_combined)
+        jobs.append({"sheet": name, "df": sheets[name], "dimensions": dims_npz, "plots": plots,
+                     "config": replace(base_cfg, out_csv=res_csv, metrics_csv=met_csv)})
+    sheets = None  # os DataFrames seguem só nos jobs
+
+    max_workers = max(1, min(args.jobs or (os.cpu_count() or 1), len(jobs) or 1))
+    if max_workers == 1:
+        recs = [_sheet_worker(job) for job in jobs]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            recs = list(pool.map(_sheet_worker, jobs))
+
+    for rec in recs:
+        if rec["ok"]:
+            print(f"   - [OK] {rec['sheet']}: {rec['rows']} linha(s) -> {rec['outputs']['resultado']} ({rec['elapsed_s']}s)")
+        else:
+            print(f"   - [FALHA] {rec['sheet']}: {rec['error']}")
+    failed = [rec["sheet"] for rec in recs if not rec["ok"]]
+    print(f"[OK] --sheet all: {len(recs) - len(failed)} sheet(s) em {time.perf_counter() - t0:.2f}s "
+          f"com {max_workers} worker(s)")
+    if failed:
+        raise RuntimeError(f"{len(failed)} sheet(s) com falha: {', '.join(map(str, failed))}")
+    return {"sheets": {str(rec["sheet"]): rec["outputs"] for rec in recs}, "cache": "off"}
+
+# ============================
+# Batch (--batch): todas as ondas de data/raw em paralelo
+# ============================
+
+_BATCH_INPUT_EXTS = [".xlsx", ".xls", ".csv"]
+
+def find_excel_or_csv(raw_dir: str) -> str | None:
+    """Mesma regra do findExcelOrCsv (runner.ts): primeiro .xlsx, depois .xls, depois .csv."""
+    if not os.path.isdir(raw_dir):
+        return None
+    files = sorted(os.listdir(raw_dir))
+    for ext in _BATCH_INPUT_EXTS:
+        for f in files:
+            if f.lower().endswith(ext) and os.path.isfile(os.path.join(raw_dir, f)):
+                return os.path.join(raw_dir, f)
+    return None
+
+def discover_raw_inputs(raw_root: str) -> List[Tuple[str, str, str]]:
+    """Retorna [(client, wave, input_path)] para cada data/raw/<client>/<wave>/ com planilha."""
+    found = []
+    if not os.path.isdir(raw_root):
+        return found
+    for client in sorted(os.listdir(raw_root)):
+        client_dir = os.path.join(raw_root, client)
+        if not os.path.isdir(client_dir):
+            continue
+        for wave in sorted(os.listdir(client_dir)):
+            wave_dir = os.path.join(client_dir, wave)
+            if not os.path.isdir(wave_dir):
+                continue
+            path = find_excel_or_csv(wave_dir)
+            if path:
+                found.append((client, wave, path))
+    return found
+
+def _batch_worker(job: Dict) -> Dict:
+    """Roda uma onda num processo do pool. Nunca levanta: erros voltam no dict."""
+    t0 = time.perf_counter()
+    log = io.StringIO()
+    rec = {k: job[k] for k in ("client", "wave", "input", "out_dir")}
+    try:
+        with contextlib.redirect_stdout(log):
+            outputs = run_job(argparse.Namespace(**job["args"]))
+        rec.update(ok=True, cache=outputs.get("cache"), resultado=outputs.get("resultado"))
+    except Exception as e:
+        rec.update(ok=False, error=f"{type(e).__name__}: {e}", log_tail=log.getvalue()[-2000:])
+    rec["elapsed_s"] = round(time.perf_counter() - t0, 3)
+    return rec
+
+def run_batch(args) -> Dict:
+    """
+    Descobre todas as ondas em args.batch e processa cada uma num pool de processos
+    limitado a args.jobs. Saídas em <out_root>/<client>/<wave>/pendulo/, como o runner.
+    Falha numa onda não interrompe as demais; o resumo lista tempos e erros.
+    """
+    raw_root = os.path.abspath(args.batch)
+    out_root = os.path.abspath(args.batch_out_root or os.path.join(os.path.dirname(raw_root), "processed"))
+    inputs = discover_raw_inputs(raw_root)
+
+    base = vars(args).copy()
+    # opções de arquivo único não fazem sentido por onda
+    base.update(batch=None, out_csv=None, out_xlsx=None, serve=False)
+    # plots: paraleliza entre ondas (um processo por onda), não entre colunas
+    base.update(plot_jobs=1)
+
+    jobs = []
+    for client, wave, path in inputs:
+        out_dir = os.path.join(out_root, client, wave, "pendulo")
+        job_args = dict(base, excel=path, out_dir=out_dir,
+                        plots_dir=os.path.join(out_dir, "plots") if args.plots_dir else None)
+        jobs.append({"client": client, "wave": wave, "input": path, "out_dir": out_dir, "args": job_args})
+
+    max_workers = max(1, min(args.jobs or (os.cpu_count() or 1), len(jobs) or 1))
+    print(f"[INFO] Batch: {len(jobs)} onda(s) em {raw_root} com {max_workers} worker(s)")
+
+    t0 = time.perf_counter()
+    waves = []
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_batch_worker, job): job for job in jobs}
+        for fut in as_completed(futures):
+            job = futures[fut]
+            try:
+                rec = fut.result()
+            except Exception as e:  # ex.: processo do pool morreu
+                rec = {k: job[k] for k in ("client", "wave", "input", "out_dir")}
+                rec.update(ok=False, error=f"{type(e).__name__}: {e}", elapsed_s=None)
+            status = "OK" if rec["ok"] else "FALHA"
+            print(f"   - [{status}] {rec['client']}/{rec['wave']} ({rec.get('elapsed_s')}s)"
+                  + ("" if rec["ok"] else f": {rec['error']}"))
+            waves.append(rec)
+
+    waves.sort(key=lambda r: (r["client"], r["wave"]))
+    summary = {
+        "raw_root": raw_root,
+        "out_root": out_root,
+        "workers": max_workers,
+        "total_s": round(time.perf_counter() - t0, 3),
+        "ok": sum(1 for r in waves if r["ok"]),
+        "failed": sum(1 for r in waves if not r["ok"]),
+        "waves": waves,
+    }
+    summary_path = args.batch_summary or os.path.join(out_root, "batch_summary.json")
+    with atomic_output(summary_path) as tmp, open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(summary, fh, ensure_ascii=False, indent=2)
+    print(f"[OK] Batch: {summary['ok']} ok, {summary['failed']} falha(s) em {summary['total_s']}s; resumo em {summary_path}")
+    return summary
+
+# ============================
+# Watch (--watch): repontua ondas alteradas em data/raw
+# ============================
+# Polling de RAW_ROOT/<client>/<wave>/ por (size, mtime_ns): um listdir + stat por onda,
+# portável e sem dependência extra. Um input só vai para a fila depois de ficar parado
+# por --watch-debounce segundos (upload/cópia em andamento) e só é pontuado se o conteúdo
+# mudou de fato (sha256 + parâmetros, mesma identidade do series.json: touch não repontua).
+# A fila é limitada (--watch-queue): cheia, as mudanças esperam o próximo ciclo.
+
+def _raw_snapshot(raw_root: str) -> Dict[Tuple[str, str], Tuple[str, int, int]]:
+    """{(client, wave): (input_path, size, mtime_ns)} das ondas em raw_root."""
+    snap = {}
+    for client, wave, path in discover_raw_inputs(raw_root):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue  # removido entre o listdir e o stat
+        snap[(client, wave)] = (path, st.st_size, st.st_mtime_ns)
+    return snap
+
+class RawWatcher:
+    """
+    Detecta inputs novos/alterados em raw_root e devolve os que estão estáveis há
+    debounce_s. Quem consome chama accept() ao enfileirar; o que não foi aceito volta
+    no próximo poll().
+    """
+
+    def __init__(self, raw_root: str, debounce_s: float):
+        self.raw_root = raw_root
+        self.debounce_s = debounce_s
+        self.accepted: Dict[Tuple[str, str], Tuple] = {}            # assinatura já enfileirada
+        self.settling: Dict[Tuple[str, str], Tuple[Tuple, float]] = {}  # (assinatura, parada desde)
+
+    def poll(self, now: float | None = None) -> List[Tuple[str, str, Tuple]]:
+        """[(client, wave, assinatura)] prontos; assinatura = (input_path, size, mtime_ns)."""
+        now = time.monotonic() if now is None else now
+        snap = _raw_snapshot(self.raw_root)
+        ready = []
+        for key, sig in snap.items():
+            if self.accepted.get(key) == sig:
+                self.settling.pop(key, None)
+                continue
+            prev = self.settling.get(key)
+            if prev is None or prev[0] != sig:
+                self.settling[key] = (sig, now)  # novo ou ainda mudando: reinicia o debounce
+            elif now - prev[1] >= self.debounce_s:
+                ready.append((key[0], key[1], sig))
+        for key in [k for k in self.settling if k not in snap]:
+            del self.settling[key]
+        return ready
+
+    def accept(self, client: str, wave: str, sig: Tuple):
+        self.accepted[(client, wave)] = sig
+        self.settling.pop((client, wave), None)
+
+def _watch_worker(job: Dict) -> Dict:
+    """Pontua uma onda do --watch num processo do pool. Nunca levanta: erros voltam no dict."""
+    t0 = time.perf_counter()
+    rec = {"client": job["client"], "wave": job["wave"]}
+    try:
+        rec["scored"] = score_series_wave(job["base"], job["out_root"], job["params"],
+                                          job["client"], job["wave"], job["input"])
+        rec["ok"] = True
+    except Exception as e:
+        rec.update(ok=False, error=f"{type(e).__name__}: {e}")
+    rec["elapsed_s"] = round(time.perf_counter() - t0, 3)
+    return rec
+
+def _watch_collect(done, running: Dict, counts: Dict[str, int], stale: set):
+    """Contabiliza os jobs terminados do --watch; clientes com onda pontuada vão para `stale`."""
+    for fut in done:
+        client, wave = running.pop(fut)
+        try:
+            rec = fut.result()
+        except Exception as e:  # ex.: processo do pool morreu
+            rec = {"client": client, "wave": wave, "ok": False, "error": f"{type(e).__name__}: {e}"}
+        if not rec["ok"]:
+            counts["failed"] += 1
+            print(f"   - [FALHA] {client}/{wave}: {rec['error']}")
+        elif rec["scored"]:
+            counts["scored"] += 1
+            stale.add(client)
+            print(f"[OK] Watch: {client}/{wave} pontuada em {rec['elapsed_s']}s")
+        else:
+            counts["skipped"] += 1
+
+def _watch_refresh(out_root: str, running: Dict, stale: set):
+    """
+    Atualiza os JSONs dependentes dos clientes em `stale` sem nenhuma onda deles em
+    andamento: _refresh_wave_payloads lê e regrava overview/metrics/ranks.json e não pode
+    cruzar com um worker que ainda grava os mesmos arquivos (nem ler o series.json no meio).
+    """
+    busy = {client for client, _ in running.values()}
+    for client in sorted(stale - busy):
+        stale.discard(client)
+        refreshed = _refresh_wave_payloads(out_root, client)
+        print(f"[OK] Watch: {client}: {refreshed} JSON(s) dependente(s) atualizado(s)")
+
+def run_watch(args, max_polls: int | None = None) -> Dict[str, int]:
+    """
+    --watch RAW_ROOT: a cada --watch-interval segundos procura inputs novos/alterados e
+    repontua só essas ondas (series.json + JSONs do dashboard, como o --series), em até
+    args.jobs processos. No início, ondas alteradas enquanto nada observava também entram.
+    Roda até Ctrl+C (ou max_polls ciclos, esperando as ondas em andamento); retorna contadores
+    scored/skipped/failed. JSONs dependentes de um cliente só são atualizados sem onda dele rodando.
+    """
+    raw_root = os.path.abspath(args.watch)
+    out_root = _series_out_root(args, raw_root)
+    params = cache_params(args)
+    base = _series_base_args(args)
+    watcher = RawWatcher(raw_root, args.watch_debounce)
+    max_queue = max(1, args.watch_queue)
+    workers = max(1, args.jobs or 1)
+    queue: Dict[Tuple[str, str], str] = {}  # (client, wave) -> input; ordem de chegada, sem duplicatas
+    running: Dict = {}
+    stale: set = set()  # clientes com onda repontuada e JSONs dependentes ainda por atualizar
+    counts = {"scored": 0, "skipped": 0, "failed": 0}
+    print(f"[INFO] Watch: {raw_root} a cada {args.watch_interval:g}s (debounce {args.watch_debounce:g}s, "
+          f"fila {max_queue}, {workers} worker(s)) -> {out_root}")
+
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+    polls = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while max_polls is None or polls < max_polls:
+                polls += 1
+                for client, wave, sig in watcher.poll():
+                    if args.client and client != args.client:
+                        continue
+                    if (client, wave) not in queue and len(queue) >= max_queue:
+                        break  # fila cheia: o resto volta no próximo poll
+                    queue[(client, wave)] = sig[0]
+                    watcher.accept(client, wave, sig)
+
+                busy = set(running.values())
+                for key in [k for k in queue if k not in busy][: workers - len(running)]:
+                    job = {"client": key[0], "wave": key[1], "input": queue.pop(key),
+                           "base": base, "out_root": out_root, "params": params}
+                    running[pool.submit(_watch_worker, job)] = key
+
+                if not running:
+                    time.sleep(args.watch_interval)
+                    continue
+                done, _ = wait(list(running), timeout=args.watch_interval, return_when=FIRST_COMPLETED)
+                _watch_collect(done, running, counts, stale)
+                _watch_refresh(out_root, running, stale)
+            # fim por max_polls: termina (e conta) as ondas já em andamento
+            _watch_collect(wait(list(running))[0], running, counts, stale)
+            _watch_refresh(out_root, running, stale)
+    except KeyboardInterrupt:
+        pass
+    print(f"[OK] Watch encerrado: {counts['scored']} onda(s) pontuada(s), {counts['skipped']} sem mudança, "
+          f"{counts['failed']} falha(s)")
+    return counts
+
+# ============================
+# Relatório de startup (--timings)
+# ============================
+
+def _process_age_ms() -> float | None:
+    """Idade do processo (desde o exec) via /proc; None fora do Linux."""
+    try:
+        with open("/proc/self/stat", "r") as fh:
+            start_ticks = float(fh.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", "r") as fh:
+            uptime_s = float(fh.read().split()[0])
+        return max(0.0, (uptime_s - start_ticks / os.sysconf("SC_CLK_TCK")) * 1000.0)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+def startup_report(t_args_parsed: float, t_done: float) -> Dict[str, float | bool | None]:
+    """Tempos de startup/execução em ms + quais dependências opcionais foram carregadas."""
+    age = _process_age_ms()
+    module_ms = (t_done - _T_MODULE_START) * 1000.0
+    return {
+        # antes do módulo começar a executar (interpretador + site)
+        "interpreter_ms": None if age is None else max(0.0, age - module_ms),
+        "imports_ms": (_T_IMPORTS_DONE - _T_MODULE_START) * 1000.0,
+        "parse_args_ms": (t_args_parsed - _T_IMPORTS_DONE) * 1000.0,
+        "run_ms": (t_done - t_args_parsed) * 1000.0,
+        "total_ms": age if age is not None else module_ms,
+        "budget_ms": _COLD_START_BUDGET_MS,
+        "matplotlib_loaded": "matplotlib" in sys.modules,
+        "openpyxl_loaded": "openpyxl" in sys.modules,
+    }
+
+def print_startup_report(rep: Dict, stream=None):
+    stream = stream or sys.stderr
+    fmt = lambda v: "n/d" if v is None else f"{v:.0f} ms"
+    print(f"[TIMINGS] interpretador: {fmt(rep['interpreter_ms'])}", file=stream)
+    print(f"[TIMINGS] imports (numpy/pandas): {fmt(rep['imports_ms'])}", file=stream)
+    print(f"[TIMINGS] parse_args: {fmt(rep['parse_args_ms'])}", file=stream)
+    print(f"[TIMINGS] execução: {fmt(rep['run_ms'])}", file=stream)
+    status = "OK" if rep["total_ms"] <= rep["budget_ms"] else "ACIMA DO ORÇAMENTO"
+    print(f"[TIMINGS] total: {fmt(rep['total_ms'])} (orçamento cold-start: {rep['budget_ms']:.0f} ms) {status}",
+          file=stream)
+    print(f"[TIMINGS] opcionais carregados: matplotlib={rep['matplotlib_loaded']} "
+          f"openpyxl={rep['openpyxl_loaded']}", file=stream)
+
+# ============================
+# Worker persistente (--serve)
+# ============================
+
+def _handle_job_line(line: str) -> Dict:
+    """
+    Processa um job JSON: {"id": "...", "args": ["--excel", "...", ...]}.
+    Os args seguem exatamente a CLI; a resposta traz os caminhos gerados.
+    """
+    try:
+        job = json.loads(line)
+    except ValueError as e:
+        return {"id": None, "ok": False, "error": f"JSON inválido: {e}"}
+    if not isinstance(job, dict):
+        return {"id": None, "ok": False, "error": "job deve ser um objeto JSON"}
+
+    job_id = job.get("id")
+    argv = [str(a) for a in (job.get("args") or [])]
+    t0 = time.perf_counter()
+    try:
+        args = parse_args(argv)
+        if args.serve or args.batch or args.watch:
+            raise ValueError("--serve/--batch/--watch não são aceitos dentro de um job")
+        if args.series:
+            outputs = {"series": run_series(args)}
+        elif args.sweep:
+            outputs = run_sweep(args)
+        elif args.reweight:
+            outputs = run_reweight(args)
+        else:
+            outputs = run_job(args)
+    except SystemExit:
+        # argparse já escreveu o motivo no stderr
+        return {"id": job_id, "ok": False, "error": "argumentos inválidos"}
+    except Exception as e:
+        return {"id": job_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+    elapsed_ms = round((time.perf_counter() - t0) * 1000.0, 1)
+    return {"id": job_id, "ok": True, "elapsed_ms": elapsed_ms, **outputs}
+
+def serve(stdin=None, stdout=None):
+    """
+    Loop do worker: um job JSON por linha no stdin, uma resposta JSON por linha no
+    stdout. pandas/numpy e as regras de sinônimos ficam carregados entre jobs.
+    Os logs do pipeline vão para o stderr para não misturar com as respostas.
+    Termina no EOF do stdin.
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+
+    def _reply(payload: Dict):
+        stdout.write(json.dumps(payload, ensure_ascii=False) + "\n")
+        stdout.flush()
+
+    _expand_synonyms()  # aquece as regras compiladas
+    _reply({"ready": True, "pid": os.getpid()})
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+        with contextlib.redirect_stdout(sys.stderr):
+            resp = _handle_job_line(line)
+        _reply(resp)
+
+def main(argv: List[str] | None = None):
+    args = parse_args(argv)
+    if args.timings:
+        t_args = time.perf_counter()
+        atexit.register(lambda: print_startup_report(startup_report(t_args, time.perf_counter())))
+    if args.serve:
+        serve()
+        return
+    if args.batch:
+        summary = run_batch(args)
+        if summary["failed"]:
+            sys.exit(1)
+        return
+    if args.watch:
+        run_watch(args)
+        return
+    if args.series:
+        report = run_series(args)
+        if any(rec["failed"] for rec in report.values()):
+            sys.exit(1)
+        return
+    if args.sweep:
+        run_sweep(args)
+        return
+    if args.reweight:
+        run_reweight(args)
+        return
+    run_job(args)
+
 if __name__ == "__main__":
     main()
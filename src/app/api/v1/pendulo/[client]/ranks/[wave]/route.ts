@@ -0,0 +1,16 @@
+// src/app/api/v1/pendulo/[client]/ranks/[wave]/route.ts
+import { getOrBuildWave, okJSON, readRanks } from '@/libs/api/pendulo-server';
+
+export async function GET(
+  _req: Request,
+  { params }: { params: Promise<{ client: string; wave: string }> }
+) {
+  const { client, wave } = await params;
+  // ranks.json sai junto com overview/radar/metrics.json; sem ele, roda a onda uma vez
+  let ranks = readRanks(client, wave);
+  if (!ranks) {
+    await getOrBuildWave(client, wave);
+    ranks = readRanks(client, wave);
+  }
+  return okJSON(ranks ?? { wave, prevWave: null, prevKey: null, groupBy: null, scores: [], players: {}, metricDeltas: {} });
+}
@@ -0,0 +1,10 @@
+// src/app/api/v1/pendulo/[client]/series/route.ts
+import { okJSON, readSeries } from '@/libs/api/pendulo-server';
+
+export async function GET(
+  _req: Request,
+  { params }: { params: Promise<{ client: string }> }
+) {
+  const { client } = await params;
+  return okJSON(readSeries(client) ?? { waves: [], series: [], dimensions: [], dimensionSeries: {} });
+}
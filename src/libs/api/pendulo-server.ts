@@ -3,6 +3,7 @@ import fs from 'node:fs';
 import path from 'node:path';
 import { NextResponse } from 'next/server';
 import { runSirAndRead } from '@/libs/sir/runner';
+import type { RanksPayload } from '@/libs/api/pendulo/assembleFromSir';
 
 const OUT_ROOT = 'data/processed';
 const RAW_ROOT = 'data/raw';
@@ -30,6 +31,21 @@ export function listWaves(client: string): string[] {
     .sort((a, b) => Number(b.slice(1)) - Number(a.slice(1)));
 }
 
+/** series.json do cliente (séries multi-onda do pipeline); null se ainda não existir. */
+export function readSeries(client: string) {
+  const p = path.resolve(process.cwd(), OUT_ROOT, client, 'series.json');
+  if (!fs.existsSync(p)) return null;
+  const { waveOrder, series, dimensions, dimensionSeries } = JSON.parse(fs.readFileSync(p, 'utf-8'));
+  return { waves: waveOrder ?? [], series: series ?? [], dimensions: dimensions ?? [], dimensionSeries: dimensionSeries ?? {} };
+}
+
+/** ranks.json de uma onda (rank/percentil/delta vs P(n-1)); null se ainda não existir. */
+export function readRanks(client: string, wave: string): RanksPayload | null {
+  const p = path.resolve(process.cwd(), OUT_ROOT, client, wave, 'ranks.json');
+  if (!fs.existsSync(p)) return null;
+  return JSON.parse(fs.readFileSync(p, 'utf-8')) as RanksPayload;
+}
+
 /** Helper para responses JSON com cache */
 export function okJSON(data: unknown) {
   return NextResponse.json(data, {
@@ -16,7 +16,7 @@ export type SeriesPoint = { date: string; [playerName: string]: number | string
 export type Overview = {
   wave: string;
   players: Player[];
-  series: SeriesPoint[]; // mantemos vazio por enquanto (sem série temporal intra-onda)
+  series: SeriesPoint[]; // uma entrada por onda até a atual (series.json do cliente)
 };
 
 export type RadarRow = { metric: string; [playerName: string]: number | string };
@@ -51,6 +51,35 @@ export type MetricsPayload = {
   platformPrevDataByPlayer: Record<string, MetricsRow[]>;   // idem para P(n-1)
 };
 
+// ranks.json (pipeline --emit-json): posição/percentil/delta vs P(n-1) já calculados
+export type RankCell = {
+  value: number | null;
+  rank: number | null;        // 1 = maior; empates dividem a melhor posição
+  percentile: number | null;  // % de players com valor <= o próprio
+  delta: number | null;       // valor - valor em P(n-1)
+  prevRank: number | null;
+  rankDelta: number | null;   // positivo = subiu
+};
+
+export type MetricDelta = {
+  platform: string;
+  metric: string;
+  value: number | null;
+  prev: number | null;
+  delta: number | null;
+  deltaPct: number | null;
+};
+
+export type RanksPayload = {
+  wave: string;
+  prevWave: string | null;
+  prevKey: string | null;
+  groupBy: string | null;
+  scores: string[]; // 'sirIndex' + rótulos das dimensões
+  players: Record<string, { name: string; [score: string]: RankCell | string }>; // chave por slug
+  metricDeltas: Record<string, MetricDelta[]>;                                   // idem
+};
+
 // --------- Helpers ----------
 const PALETTE = [
   '#38d4b0', '#3b25a1', '#7dd3fc', '#fca5a5', '#fde68a',
@@ -146,6 +175,32 @@ async function tryLoadPrevTotals(
   }
 }
 
+// Ordem das ondas: P1 < P2 < ... < P10; nomes fora do padrão vão para o fim (alfabético)
+function waveOrder(wave: string): [number, number, string] {
+  const m = /^P(\d+)$/i.exec(wave);
+  return m ? [0, Number(m[1]), ''] : [1, 0, wave];
+}
+
+export function waveLte(a: string, b: string) {
+  const [x, y] = [waveOrder(a), waveOrder(b)];
+  if (x[0] !== y[0]) return x[0] < y[0];
+  if (x[1] !== y[1]) return x[1] < y[1];
+  return x[2] <= y[2];
+}
+
+// Lê <outRoot>/<client>/series.json (gerado por sir_excel_pipeline_v6.py --series/--emit-json)
+// e devolve os pontos até a onda atual, inclusive
+async function tryLoadSeries(outRoot: string, client: string, wave: string): Promise<SeriesPoint[]> {
+  try {
+    const raw = await fs.readFile(path.join(outRoot, client, 'series.json'), 'utf-8');
+    const json = JSON.parse(raw) as { version?: number; series?: SeriesPoint[] };
+    if (json.version !== 1 || !Array.isArray(json.series)) return [];
+    return json.series.filter((pt) => waveLte(String(pt?.date), wave));
+  } catch {
+    return [];
+  }
+}
+
 // --------- Entrada "norm" (linhas do XLSX do SIR após leitura) ----------
 // Esperamos pelo menos: name, presenca_100, popularidade_100, atividade_100, engajamento_100, difusao_100
 // e, se existir, a coluna final: sir_final_0_100 (ou INFLUENCIA_DIGITAL mapeada para ela antes).
@@ -203,7 +258,7 @@ export async function assembleFromSir(
   const overview: Overview = {
     wave,
     players,
-    series: [], // sem série temporal intra-onda por ora
+    series: await tryLoadSeries(outRoot, client, wave),
   };
 
   // ---------- Radar ----------
@@ -0,0 +1,39 @@
+// node --experimental-strip-types --test src/libs/sir/*.test.ts  (npm run test:sir)
+import assert from 'node:assert/strict';
+import fs from 'node:fs';
+import os from 'node:os';
+import path from 'node:path';
+import { test } from 'node:test';
+import { readProfile } from './profile.ts';
+
+const tmp = () => fs.mkdtempSync(path.join(os.tmpdir(), 'sir-profile-'));
+
+// mesmo shape do RunProfile.to_dict() do pipeline (conferido em tests/test_profile.py)
+const sample = {
+  version: 1,
+  input: '/data/raw/c/P1/x.xlsx',
+  started_at: '2025-09-18T10:00:00+0000',
+  total_ms: 812.4,
+  peak_rss_mb: 210.5,
+  cache: 'miss',
+  stages: [
+    { name: 'read', cache: 'miss', wall_ms: 500.1, rss_mb: 180.2, peak_rss_mb: 200.0, rows: 40, cols: 61 },
+    { name: 'normalize', cache: 'miss', wall_ms: 12.5, rss_mb: 181.0, peak_rss_mb: 200.0 },
+  ],
+};
+
+test('readProfile lê o __Profile.json do pipeline', () => {
+  const p = path.join(tmp(), 'x__Profile.json');
+  fs.writeFileSync(p, JSON.stringify(sample));
+  assert.deepEqual(readProfile(p), sample);
+});
+
+test('readProfile devolve null sem arquivo, com JSON inválido ou fora do schema', () => {
+  const dir = tmp();
+  assert.equal(readProfile(null), null);
+  assert.equal(readProfile(path.join(dir, 'faltando.json')), null);
+  fs.writeFileSync(path.join(dir, 'ruim.json'), '{nope');
+  assert.equal(readProfile(path.join(dir, 'ruim.json')), null);
+  fs.writeFileSync(path.join(dir, 'sem-stages.json'), JSON.stringify({ version: 1 }));
+  assert.equal(readProfile(path.join(dir, 'sem-stages.json')), null);
+});
@@ -0,0 +1,36 @@
+// src/libs/sir/profile.ts — __Profile.json do sir_excel_pipeline_v6.py (--profile)
+import fs from 'node:fs';
+
+export type SirProfileStage = {
+  name: string;
+  wall_ms: number;
+  rss_mb: number | null;
+  peak_rss_mb: number | null;
+  rows?: number;
+  cols?: number;
+  cache: 'hit' | 'miss' | 'off' | null;
+};
+
+export type SirProfile = {
+  version: number;
+  input: string | null;
+  started_at: string;
+  total_ms: number;
+  peak_rss_mb: number | null;
+  cache: 'hit' | 'miss' | 'off' | null;
+  stages: SirProfileStage[];
+};
+
+/** Lê o profile gravado pelo pipeline e loga a etapa mais lenta; null se faltar ou for inválido. */
+export function readProfile(p?: string | null): SirProfile | null {
+  if (!p || !fs.existsSync(p)) return null;
+  try {
+    const prof = JSON.parse(fs.readFileSync(p, 'utf-8')) as SirProfile;
+    const slow = prof.stages.slice().sort((a, b) => b.wall_ms - a.wall_ms)[0];
+    console.info(`[sir] ${prof.input} ${prof.total_ms.toFixed(0)}ms cache=${prof.cache}` +
+      (slow ? ` (mais lenta: ${slow.name} ${slow.wall_ms.toFixed(0)}ms)` : ''));
+    return prof;
+  } catch {
+    return null;
+  }
+}
@@ -1,10 +1,21 @@
 
 // src/libs/sir/runner.ts — unified runner using CSV outputs from sir_excel_pipeline_v6.py
+import crypto from 'node:crypto';
 import fs from 'node:fs';
 import path from 'node:path';
-import { spawn } from 'node:child_process';
 import { parse as parseCsv } from 'csv-parse/sync';
-import { assembleFromSir, type SirRow } from '@/libs/api/pendulo/assembleFromSir';
+import {
+  assembleFromSir,
+  waveLte,
+  type SirRow,
+  type Overview,
+  type RadarApi,
+  type MetricsPayload,
+} from '@/libs/api/pendulo/assembleFromSir';
+import { readProfile, type SirProfile } from '@/libs/sir/profile';
+import { runSirJob, spawnSirOnce, sirWorkersEnabled } from '@/libs/sir/worker';
+
+export type { SirProfile, SirProfileStage } from '@/libs/sir/profile';
 
 function ensureDir(p: string) {
   fs.mkdirSync(p, { recursive: true });
@@ -44,19 +55,104 @@ function findOutCsvs(outDir: string) {
   };
 }
 
-function resolvePython() {
-  if (process.env.PYTHON_BIN) return process.env.PYTHON_BIN!;
-  const cwd = process.cwd();
-  return process.platform === 'win32'
-    ? path.join(cwd, '.venv', 'Scripts', 'python.exe')
-    : path.join(cwd, '.venv', 'bin', 'python');
+function sha256File(p: string): Promise<string> {
+  return new Promise((resolve, reject) => {
+    const h = crypto.createHash('sha256');
+    fs.createReadStream(p)
+      .on('error', reject)
+      .on('data', (d) => h.update(d))
+      .on('end', () => resolve(h.digest('hex')));
+  });
+}
+
+/**
+ * Carimbo da última execução bem-sucedida num outDir: args + sha256 do conteúdo do input
+ * + chave (series.json) de cada onda anterior, das quais saem deltas e Overview.series.
+ * Mesmo carimbo => as saídas já são destas entradas e o GET não precisa acionar o Python
+ * (nem o lock de saídas, nem o cache). O hash é do conteúdo, não do mtime.
+ */
+const RUN_STAMP = '.sir_request.json';
+type RunStamp = { args: string[]; sha256: string; upstream: string };
+
+function upstreamKeys(outRoot: string, client: string, wave: string) {
+  try {
+    const index = JSON.parse(fs.readFileSync(path.join(outRoot, client, 'series.json'), 'utf-8'));
+    const waves = Object.entries((index?.waves ?? {}) as Record<string, { key?: string }>)
+      .filter(([w]) => w !== wave && waveLte(w, wave))
+      .map(([w, rec]) => `${w}=${rec?.key ?? ''}`);
+    return waves.sort().join(',');
+  } catch {
+    return '';
+  }
+}
+
+function stampMatches(outDir: string, stamp: RunStamp) {
+  try {
+    const prev = JSON.parse(fs.readFileSync(path.join(outDir, RUN_STAMP), 'utf-8')) as RunStamp;
+    return prev.sha256 === stamp.sha256 && prev.upstream === stamp.upstream
+      && JSON.stringify(prev.args) === JSON.stringify(stamp.args);
+  } catch {
+    return false;
+  }
+}
+
+function writeStamp(outDir: string, stamp: RunStamp) {
+  const dest = path.join(outDir, RUN_STAMP);
+  const tmp = `${dest}.${process.pid}.tmp`;
+  fs.writeFileSync(tmp, JSON.stringify(stamp));
+  fs.renameSync(tmp, dest);
+}
+
+type DashboardPayloads = { overview: Overview; radar: RadarApi; metrics: MetricsPayload };
+
+type SirRunOutputs = {
+  resultado: string | null;
+  metrics: string | null;
+  profile: SirProfile | null;
+  jsonDir: string | null;
+};
+
+/**
+ * Execuções em andamento, por outDir + args: requests simultâneos para o mesmo
+ * client/wave aguardam a mesma execução em vez de disparar outra. Entre processos
+ * (outro servidor, CLI), o lock de saídas do pipeline faz o mesmo papel.
+ */
+const inflight = new Map<string, Promise<SirRunOutputs>>();
+
+function runSirCoalesced(outDir: string, args: string[], run: () => Promise<SirRunOutputs>) {
+  const key = [outDir, ...args].join('\0');
+  let p = inflight.get(key);
+  if (!p) {
+    p = run().finally(() => inflight.delete(key));
+    inflight.set(key, p);
+  }
+  return p;
+}
+
+/**
+ * Lê overview/radar/metrics.json gravados pelo pipeline (--emit-json).
+ * null se faltar algum ou se forem mais velhos que o __Resultado.csv (JSON de outra execução).
+ */
+function readDashboardJson(jsonDir: string | null, resultadoCsv: string): DashboardPayloads | null {
+  if (!jsonDir) return null;
+  try {
+    const csvMtime = fs.statSync(resultadoCsv).mtimeMs;
+    for (const k of ['overview', 'radar', 'metrics']) {
+      if (fs.statSync(path.join(jsonDir, `${k}.json`)).mtimeMs < csvMtime) return null;
+    }
+    const read = (k: string) => JSON.parse(fs.readFileSync(path.join(jsonDir, `${k}.json`), 'utf-8'));
+    return { overview: read('overview'), radar: read('radar'), metrics: read('metrics') };
+  } catch {
+    return null;
+  }
 }
 
 /**
  * Executa o SIR v6.1 para um client/wave e retorna payloads prontos para o front.
  * - Lê a planilha em data/raw/<client>/<wave>/(.xlsx|.csv)
  * - Escreve saídas em data/processed/<client>/<wave>/pendulo/
- * - Consome __Resultado.csv (overview/radar) e __MetricsExport.csv (metrics)
+ * - O pipeline (--emit-json) grava overview/radar/metrics.json em data/processed/<client>/<wave>/;
+ *   o parse do __Resultado.csv + assembleFromSir fica só como fallback (saídas antigas)
  */
 export async function runSirAndRead({
   client,
@@ -90,17 +186,21 @@ export async function runSirAndRead({
     throw new Error(`Arquivo de métricas não encontrado em ${rawDir}`);
   }
 
-  // roda o python se os CSVs não existirem ainda
+  // Com workers persistentes o pipeline roda sempre: o cache content-addressed do
+  // Python (hash do input + pesos) decide entre hit barato e recálculo, então
+  // planilha substituída ou pesos novos nunca servem resultado velho.
+  // Sem workers (spawn por request), mantemos o atalho "só roda se faltar CSV".
   let { resultado, metrics } = findOutCsvs(outDir);
-  if (!resultado || !metrics) {
-    const python = resolvePython();
-    const script = path.resolve(process.cwd(), 'etl', 'sir_excel_pipeline_v6.py');
+  let profile: SirProfile | null = null;
+  let jsonDir: string | null = path.dirname(outDir);
+  if (sirWorkersEnabled() || !resultado || !metrics) {
     const args = [
-      script,
       '--excel', inputPath,
       '--sheet', String(sheet),
       '--out-dir', outDir,
       '--out-xlsx', path.join(outDir, 'pendulo_v6.xlsx'),
+      // payloads do dashboard saem prontos do Python (mesmo schema do assembleFromSir)
+      '--emit-json', '--client', client, '--wave', wave,
     ];
 
     // pesos (opcionais)
@@ -120,24 +220,47 @@ export async function runSirAndRead({
     pushNum('--piso_positivo', w.piso_positivo);
     pushNum('--cap_min', w.cap_min);
     pushNum('--dominance_factor', w.dominance_factor);
+    // SIR_PROFILE=1: grava <base>__Profile.json (tempo/RSS por etapa) ao lado do Resultado
+    if (process.env.SIR_PROFILE === '1') args.push('--profile');
+
+    // checagem barata antes do Python: mesmo input (conteúdo) e mesmos args da última
+    // execução ok -> saídas atuais, sem job, sem lock e sem regravar JSON
+    const processedRoot = path.resolve(dataRoot, outRoot.replace(/^data\//, ''));
+    const inputSha = await sha256File(inputPath);
+    const stamp = { args, sha256: inputSha, upstream: upstreamKeys(processedRoot, client, wave) };
+    const fresh = !!resultado && !!metrics && stampMatches(outDir, stamp)
+      && readDashboardJson(jsonDir, resultado) !== null;
 
-    await new Promise<void>((resolve, reject) => {
-      const p = spawn(python, args, { shell: false });
-      let stderr = '';
-      p.stderr?.on('data', (d) => { stderr += String(d); });
-      p.on('error', (err) => reject(err));
-      p.on('close', (code) => {
-        if (code === 0) resolve();
-        else reject(new Error(`SIR falhou (code=${code}). ${stderr}`));
-      });
-    });
-
-    ({ resultado, metrics } = findOutCsvs(outDir));
+    // worker persistente (--serve) evita pagar startup do Python + imports a cada request
+    const defaultJsonDir = jsonDir;
+    if (!fresh) {
+      ({ resultado, metrics, profile, jsonDir } = await runSirCoalesced(outDir, args, async () => {
+        let out: SirRunOutputs;
+        if (sirWorkersEnabled()) {
+          const job = await runSirJob(args);
+          out = {
+            resultado: job.resultado,
+            metrics: job.metrics,
+            profile: readProfile(job.profile),
+            jsonDir: job.json_dir ?? defaultJsonDir,
+          };
+        } else {
+          await spawnSirOnce(args);
+          out = { ...findOutCsvs(outDir), profile: null, jsonDir: defaultJsonDir };
+        }
+        // ondas anteriores lidas agora, depois da execução: é o estado que os JSONs refletem
+        writeStamp(outDir, { ...stamp, upstream: upstreamKeys(processedRoot, client, wave) });
+        return out;
+      }));
+    }
   }
 
   if (!resultado) throw new Error('Resultado CSV não encontrado após execução');
   // metrics pode faltar; tratamos depois
 
+  const precomputed = readDashboardJson(jsonDir, resultado);
+  if (precomputed) return profile ? { ...precomputed, profile } : precomputed;
+
   const resultadoCsv = fs.readFileSync(resultado, 'utf-8');
   const rows = parseCsv(resultadoCsv, { columns: true, skip_empty_lines: true }) as SirRow[];
 
@@ -149,5 +272,5 @@ export async function runSirAndRead({
     // por enquanto, mantemos o assemble como está (usa "total") — opcional você pode expandir
   }
 
-  return assembled;
+  return profile ? { ...assembled, profile } : assembled;
 }
@@ -0,0 +1,61 @@
+// node --experimental-strip-types --test src/libs/sir/*.test.ts  (npm run test:sir)
+import assert from 'node:assert/strict';
+import { test } from 'node:test';
+import { SirWorker } from './worker.ts';
+
+// stub do --serve: responde jobs com args ['ok']; o primeiro outro job trava o processo,
+// como um job Python preso (o --serve é sequencial: nada mais é respondido depois dele)
+const STUB = `
+const rl = require('node:readline').createInterface({ input: process.stdin });
+let stuck = false;
+console.log(JSON.stringify({ ready: true, pid: process.pid }));
+rl.on('line', (line) => {
+  const job = JSON.parse(line);
+  stuck = stuck || job.args[0] !== 'ok';
+  if (!stuck) console.log(JSON.stringify({ id: job.id, ok: true, resultado: String(process.pid) }));
+});
+`;
+
+const stubWorker = (jobTimeoutMs: number) =>
+  new SirWorker({ command: [process.execPath, ['-e', STUB]], jobTimeoutMs });
+
+const alive = (pid: number) => {
+  try {
+    process.kill(pid, 0);
+    return true;
+  } catch {
+    return false;
+  }
+};
+
+async function waitExit(pid: number, ms = 2_000) {
+  for (const t0 = Date.now(); alive(pid) && Date.now() - t0 < ms; ) await new Promise((r) => setTimeout(r, 20));
+  return !alive(pid);
+}
+
+test('job sem resposta é rejeitado no prazo e o worker é reiniciado', async () => {
+  const w = stubWorker(1_000);
+  const first = await w.run('1', ['ok']);
+
+  const t0 = Date.now();
+  const hung = w.run('2', ['trava']);
+  const queued = w.run('3', ['ok']); // atrás do travado no mesmo processo
+  await assert.rejects(hung, /SIR job 2 excedeu 1000ms/);
+  await assert.rejects(queued, /excedeu/);
+  assert.ok(Date.now() - t0 < 5_000);
+  assert.equal(w.load, 0);
+  assert.ok(await waitExit(Number(first.resultado))); // processo travado foi morto
+
+  const again = await w.run('4', ['ok']);
+  assert.notEqual(again.resultado, first.resultado);
+  await assert.rejects(w.run('5', ['trava']), /excedeu/); // encerra o último stub
+});
+
+test('job respondido no prazo não reinicia o worker depois', async () => {
+  const w = stubWorker(1_000);
+  const first = await w.run('ok-1', ['ok']);
+  await new Promise((r) => setTimeout(r, 1_300)); // passa do prazo do job já respondido
+  const second = await w.run('ok-2', ['ok']);
+  assert.equal(second.resultado, first.resultado); // mesmo processo
+  await assert.rejects(w.run('fim', ['trava']), /excedeu/); // encerra o stub
+});
@@ -0,0 +1,169 @@
+// src/libs/sir/worker.ts — pool de workers persistentes do sir_excel_pipeline_v6.py (--serve)
+import path from 'node:path';
+import readline from 'node:readline';
+import { spawn, type ChildProcessWithoutNullStreams } from 'node:child_process';
+
+export type SirJobResult = {
+  resultado: string | null;
+  metrics: string | null;
+  xlsx: string | null;
+  profile?: string | null;
+  json_dir?: string | null;
+  cache?: 'hit' | 'miss' | 'off';
+  elapsed_ms?: number;
+};
+
+type Pending = {
+  resolve: (r: SirJobResult) => void;
+  reject: (e: Error) => void;
+  timer: ReturnType<typeof setTimeout>;
+};
+
+export type SirWorkerOptions = {
+  /** Comando do processo (padrão: python do .venv + sir_excel_pipeline_v6.py --serve). */
+  command?: [string, string[]];
+  /** Prazo de cada job desde o envio; estourou -> rejeita e reinicia o worker. */
+  jobTimeoutMs?: number;
+};
+
+// acima do --lock-timeout do pipeline (900 s): um job pode esperar outro com as mesmas saídas
+const JOB_TIMEOUT_MS = Number(process.env.SIR_JOB_TIMEOUT_MS) || 20 * 60_000;
+
+export function resolvePython() {
+  if (process.env.PYTHON_BIN) return process.env.PYTHON_BIN!;
+  const cwd = process.cwd();
+  return process.platform === 'win32'
+    ? path.join(cwd, '.venv', 'Scripts', 'python.exe')
+    : path.join(cwd, '.venv', 'bin', 'python');
+}
+
+export function sirScriptPath() {
+  return path.resolve(process.cwd(), 'etl', 'sir_excel_pipeline_v6.py');
+}
+
+/**
+ * Um processo Python de vida longa rodando `--serve`.
+ * Jobs são linhas JSON { id, args } e as respostas voltam com o mesmo id.
+ */
+export class SirWorker {
+  private child: ChildProcessWithoutNullStreams | null = null;
+  private pending = new Map<string, Pending>();
+  private stderrTail = '';
+  private command: [string, string[]];
+  private jobTimeoutMs: number;
+
+  constructor(opts: SirWorkerOptions = {}) {
+    this.command = opts.command ?? [resolvePython(), [sirScriptPath(), '--serve']];
+    this.jobTimeoutMs = opts.jobTimeoutMs ?? JOB_TIMEOUT_MS;
+  }
+
+  get load() {
+    return this.pending.size;
+  }
+
+  private start() {
+    const child = spawn(this.command[0], this.command[1], { shell: false });
+    this.child = child;
+    this.stderrTail = '';
+
+    readline.createInterface({ input: child.stdout }).on('line', (line) => {
+      let msg: any;
+      try {
+        msg = JSON.parse(line);
+      } catch {
+        return; // linha fora do protocolo
+      }
+      if (msg?.ready || msg?.id == null) return;
+      const p = this.pending.get(String(msg.id));
+      if (!p) return;
+      this.pending.delete(String(msg.id));
+      clearTimeout(p.timer);
+      if (msg.ok) {
+        p.resolve({
+          resultado: msg.resultado ?? null,
+          metrics: msg.metrics ?? null,
+          xlsx: msg.xlsx ?? null,
+          profile: msg.profile ?? null,
+          json_dir: msg.json_dir ?? null,
+          cache: msg.cache,
+          elapsed_ms: msg.elapsed_ms,
+        });
+      } else {
+        p.reject(new Error(`SIR falhou: ${msg.error ?? 'erro desconhecido'}. ${this.stderrTail}`));
+      }
+    });
+
+    child.stderr.on('data', (d) => {
+      // guarda só o final do stderr para anexar nas mensagens de erro
+      this.stderrTail = (this.stderrTail + String(d)).slice(-4000);
+    });
+
+    child.on('error', (err) => this.fail(child, err));
+    child.on('close', (code) => this.fail(child, new Error(`SIR worker encerrou (code=${code}). ${this.stderrTail}`)));
+    // worker morto entre jobs: o write seguinte dá EPIPE como 'error' no stdin; sem este
+    // handler o evento derruba o processo do Next em vez de rejeitar os jobs
+    child.stdin.on('error', (err) => this.fail(child, new Error(`SIR worker: stdin falhou (${err.message}). ${this.stderrTail}`)));
+  }
+
+  /** Rejeita os jobs em andamento e descarta o processo; o próximo run() sobe outro. */
+  private fail(child: ChildProcessWithoutNullStreams, err: Error) {
+    if (this.child !== child) return;
+    this.child = null;
+    for (const p of this.pending.values()) {
+      clearTimeout(p.timer);
+      p.reject(err);
+    }
+    this.pending.clear();
+    if (child.exitCode === null) child.kill();
+  }
+
+  run(id: string, args: string[]): Promise<SirJobResult> {
+    if (this.child && !this.child.stdin.writable) {
+      this.fail(this.child, new Error(`SIR worker: stdin fechado. ${this.stderrTail}`));
+    }
+    if (!this.child) this.start();
+    const child = this.child!;
+    return new Promise<SirJobResult>((resolve, reject) => {
+      // o --serve roda um job por vez: um job travado seguraria todos os da fila deste worker
+      const timer = setTimeout(() => {
+        this.fail(child, new Error(`SIR job ${id} excedeu ${this.jobTimeoutMs}ms; worker reiniciado. ${this.stderrTail}`));
+      }, this.jobTimeoutMs);
+      this.pending.set(id, { resolve, reject, timer });
+      child.stdin.write(JSON.stringify({ id, args }) + '\n');
+    });
+  }
+}
+
+const POOL_SIZE = Math.max(1, Number(process.env.SIR_WORKERS || 2) || 1);
+
+// sobrevive ao hot-reload do Next em dev
+const g = globalThis as unknown as { __sirPool?: SirWorker[]; __sirSeq?: number };
+
+function pool() {
+  if (!g.__sirPool) g.__sirPool = Array.from({ length: POOL_SIZE }, () => new SirWorker());
+  return g.__sirPool;
+}
+
+/** Envia um job para o worker menos ocupado. `args` segue a CLI do pipeline (sem o script). */
+export function runSirJob(args: string[]): Promise<SirJobResult> {
+  const workers = pool();
+  const w = workers.reduce((a, b) => (b.load < a.load ? b : a));
+  g.__sirSeq = (g.__sirSeq ?? 0) + 1;
+  return w.run(`${process.pid}-${g.__sirSeq}`, args);
+}
+
+/** Caminho antigo: um processo por execução (SIR_WORKERS=0 ou fallback). */
+export function spawnSirOnce(args: string[]): Promise<void> {
+  return new Promise<void>((resolve, reject) => {
+    const p = spawn(resolvePython(), [sirScriptPath(), ...args], { shell: false });
+    let stderr = '';
+    p.stderr?.on('data', (d) => { stderr += String(d); });
+    p.on('error', (err) => reject(err));
+    p.on('close', (code) => {
+      if (code === 0) resolve();
+      else reject(new Error(`SIR falhou (code=${code}). ${stderr}`));
+    });
+  });
+}
+
+export const sirWorkersEnabled = () => process.env.SIR_WORKERS !== '0';
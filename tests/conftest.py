@@ -0,0 +1,42 @@
+# Fixtures: planilhas de referência (data/raw -> data/processed) e sintéticas.
+import itertools
+import os
+
+import pytest
+
+from helpers import GOLDEN, ROLES, ROOT, assert_same_outputs, bench, run_cli
+
+@pytest.fixture(params=GOLDEN, ids=lambda g: os.path.basename(g[1]))
+def golden(request):
+    """{"excel", "resultado", "metrics"}: input e saídas de referência."""
+    src, prefix = request.param
+    return {"excel": os.path.join(ROOT, src),
+            "resultado": os.path.join(ROOT, f"{prefix}__Resultado.csv"),
+            "metrics": os.path.join(ROOT, f"{prefix}__MetricsExport.csv")}
+
+@pytest.fixture
+def cli_matches(tmp_path):
+    """
+    cli_matches(src, *argv, against=None, roles=ROLES): roda a CLI (--no-cache) sobre src
+    com argv e compara byte a byte os papéis em `roles` com `against` ({papel: caminho},
+    ex.: golden); sem `against`, com uma execução sem argv. Devolve as saídas da execução.
+    """
+    runs = itertools.count()
+
+    def run(src, *argv):
+        return run_cli("--excel", src, "--out-dir", tmp_path / f"run{next(runs)}", "--no-cache", *argv)
+
+    def check(src, *argv, against=None, roles=ROLES):
+        out = run(src, *argv)
+        assert_same_outputs(out, against if against is not None else run(src), roles)
+        return out
+    return check
+
+@pytest.fixture
+def synthetic_csv(tmp_path):
+    """Fábrica: synthetic_csv(n, seed) -> caminho de uma planilha sintética em CSV."""
+    def make(n: int = 300, seed: int = 0, name: str = "sintetica") -> str:
+        path = tmp_path / f"{name}_{seed}.csv"
+        bench.make_synthetic_sheet(n, seed=seed).to_csv(path, index=False)
+        return str(path)
+    return make
@@ -0,0 +1,35 @@
+# Utilitários compartilhados pelos testes do etl/sir_excel_pipeline_v6.py.
+# Planilhas sintéticas vêm do gerador do bench (etl/bench_sir_pipeline.py); as saídas
+# de referência (baseline) são as já versionadas em data/processed.
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "etl"))
+
+import bench_sir_pipeline as bench  # noqa: E402,F401
+import sir_excel_pipeline_v6 as sir  # noqa: E402
+
+# (input em data/raw, prefixo das saídas versionadas em data/processed)
+GOLDEN = [
+    ("data/raw/rafael/P1/20250918__rafael__metrics.xlsx",
+     "data/processed/rafael/P1/pendulo/20250918__rafael__metrics"),
+    ("data/raw/meu-cliente/P8/20250918__meu-cliente__metrics-2.xlsx",
+     "data/processed/meu-cliente/P8/pendulo/20250918__meu-cliente__metrics-2"),
+]
+
+ROLES = ("resultado", "metrics")
+
+def read_bytes(path: str) -> bytes:
+    with open(path, "rb") as fh:
+        return fh.read()
+
+def assert_same_outputs(got: dict, expected: dict, roles=ROLES):
+    """Compara byte a byte os arquivos de cada papel ({"resultado": caminho, ...})."""
+    for role in roles:
+        assert read_bytes(got[role]) == read_bytes(expected[role]), f"{role}: {got[role]} != {expected[role]}"
+
+def run_cli(*argv) -> dict:
+    """Roda a CLI em processo (mesmo caminho do main) e devolve as saídas do run_job."""
+    return sir.run_job(sir.parse_args([str(a) for a in argv]))
+
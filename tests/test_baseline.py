@@ -0,0 +1,10 @@
+from helpers import read_bytes, sir
+
+def test_cli_matches_committed_outputs(golden, cli_matches):
+    cli_matches(golden["excel"], against=golden)
+
+def test_metrics_export_long_format(golden, tmp_path):
+    out = tmp_path / "m.csv"
+    df = sir.canonicalize_columns(sir._read_table_any(golden["excel"]))[0]
+    sir.export_metrics_long(sir.clean_numeric_dataframe_one_decimal(df), str(out))
+    assert read_bytes(out) == read_bytes(golden["metrics"])
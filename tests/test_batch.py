@@ -0,0 +1,13 @@
+import shutil
+
+from helpers import assert_same_outputs, sir
+
+def test_batch_matches_single_runs(golden, tmp_path):
+    raw = tmp_path / "raw"
+    for wave in ("P1", "P2"):
+        (raw / "cli" / wave).mkdir(parents=True)
+        shutil.copy(golden["excel"], raw / "cli" / wave)
+    summary = sir.run_batch(sir.parse_args(["--batch", str(raw), "--jobs", "1", "--no-cache"]))
+    assert summary["failed"] == 0 and len(summary["waves"]) == 2
+    for rec in summary["waves"]:
+        assert_same_outputs(rec, golden, ("resultado",))
@@ -0,0 +1,37 @@
+import os
+
+from helpers import ROLES, assert_same_outputs, read_bytes, run_cli
+
+def test_hit_equals_miss_and_baseline(golden, tmp_path):
+    argv = ("--excel", golden["excel"], "--cache-dir", tmp_path / "cache")
+    miss = run_cli(*argv, "--out-dir", tmp_path / "a")
+    hit = run_cli(*argv, "--out-dir", tmp_path / "b")
+    assert (miss["cache"], hit["cache"]) == ("miss", "hit")
+    assert_same_outputs(hit, miss, ROLES + ("dimensions",))
+    assert_same_outputs(hit, golden)
+
+def test_hit_with_current_outputs_rewrites_nothing(tmp_path, synthetic_csv):
+    src = synthetic_csv(50)
+    out = tmp_path / "c" / "P1" / "pendulo"
+    argv = ("--excel", src, "--out-dir", out, "--emit-json", "--client", "c", "--wave", "P1")
+    run_cli(*argv)
+    stamps = {p: os.stat(p).st_mtime_ns for p in map(str, (tmp_path / "c").rglob("*"))
+              if os.path.isfile(p) and ".sir_cache" not in p}  # manifest registra o acesso
+    assert run_cli(*argv)["cache"] == "hit"
+    assert {p: os.stat(p).st_mtime_ns for p in stamps} == stamps
+
+def test_edit_with_preserved_mtime_misses(tmp_path, synthetic_csv):
+    src = synthetic_csv(50)
+    argv = ("--excel", src, "--out-dir", tmp_path / "o")
+    before = read_bytes(run_cli(*argv)["resultado"])
+    st = os.stat(src)
+    data = bytearray(read_bytes(src))
+    data[data.index(b"Perfil 0000000") + 13] = ord("9")  # mesmo tamanho, conteúdo diferente
+    with open(src, "wb") as fh:
+        fh.write(data)
+    os.utime(src, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    assert run_cli(*argv, "--trust-mtime")["cache"] == "hit"  # atalho opt-in: não relê
+    again = run_cli(*argv)
+    assert again["cache"] == "miss"
+    assert read_bytes(again["resultado"]) != before
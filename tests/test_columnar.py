@@ -0,0 +1,20 @@
+import pandas as pd
+import pytest
+
+from helpers import ROLES, sir
+
+pytest.importorskip("pyarrow")
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_columnar_matches_csv(golden, cli_matches, fmt):
+    out = cli_matches(golden["excel"], "--format", fmt, against=golden)
+    for role in ROLES:
+        csv = pd.read_csv(out[role])
+        col = sir.read_columnar(out[f"{role}_{fmt}"])
+        assert list(col.columns) == list(csv.columns)
+        assert len(col) == len(csv)
+        for c in csv.columns:
+            if pd.api.types.is_float_dtype(csv[c]):
+                pd.testing.assert_series_equal(col[c].astype(float), csv[c], check_names=False)
+            else:
+                assert col[c].astype(str).tolist() == csv[c].astype(str).tolist()
@@ -0,0 +1,27 @@
+import json
+import math
+
+import numpy as np
+
+from helpers import run_cli, sir
+
+def _strict_load(path):
+    def reject(token):
+        raise ValueError(f"constante não-JSON: {token}")
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh, parse_constant=reject)
+
+def test_non_finite_values_become_null(tmp_path):
+    path = tmp_path / "x.json"
+    sir._write_json_atomic(str(path), {"a": float("nan"), "b": [np.float64("inf"), np.int64(3)],
+                                       "c": {"d": -math.inf, "e": 1.5}})
+    assert _strict_load(path) == {"a": None, "b": [None, 3], "c": {"d": None, "e": 1.5}}
+
+def test_emitted_payloads_are_strict_json(synthetic_csv, tmp_path):
+    out = run_cli("--excel", synthetic_csv(60), "--out-dir", tmp_path / "c" / "P1" / "pendulo",
+                  "--emit-json", "--client", "c", "--wave", "P1", "--no-cache")
+    names = sorted(p.name for p in (tmp_path / "c" / "P1").glob("*.json"))
+    assert {"overview.json", "radar.json", "metrics.json"} <= set(names)
+    for name in names:
+        _strict_load(tmp_path / "c" / "P1" / name)
+    assert out["json_dir"]
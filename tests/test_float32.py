@@ -0,0 +1,8 @@
+import pytest
+
+def test_float32_matches_baseline(golden, cli_matches):
+    cli_matches(golden["excel"], "--float32", against=golden)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_float32_matches_float64(synthetic_csv, cli_matches, seed):
+    cli_matches(synthetic_csv(300, seed=seed), "--float32")
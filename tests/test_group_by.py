@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from helpers import bench, sir
+
+def _sheet(n, seed):
+    df = bench.make_synthetic_sheet(n, seed=seed)
+    rng = np.random.default_rng(seed)
+    df["setor"] = rng.choice(["varejo", "banco", "saude", None], n)
+    return df
+
+def test_grouped_matches_per_group_loop():
+    for seed in range(4):
+        df = _sheet(250, seed)
+        got = sir.run_pipeline(df, group_by="setor", metrics=False).result.set_index("name")
+        parts = [sir.run_pipeline(df[mask].drop(columns="setor"), metrics=False).result
+                 for mask in ([df["setor"] == k for k in df["setor"].dropna().unique()] + [df["setor"].isna()])]
+        exp = pd.concat(parts).set_index("name").loc[got.index]
+        pd.testing.assert_frame_equal(got[exp.columns], exp)
+
+def test_single_group_equals_ungrouped():
+    df = _sheet(300, 7).assign(setor="todos")
+    got = sir.run_pipeline(df, group_by="setor", metrics=False).result
+    plain = sir.run_pipeline(df.drop(columns="setor"), metrics=False).result
+    pd.testing.assert_frame_equal(got[plain.columns], plain)
+
+def test_group_layout_vectorized_matches_loop():
+    rng = np.random.default_rng(0)
+    vals = rng.gamma(1.0, 100.0, 20_000) * rng.choice([0, 1, -1], 20_000)
+    keys = rng.integers(0, 300, 20_000)
+    got = sir.normalize_pos_floor_cap_grouped(vals, sir.GroupLayout(keys), 1.0, 98.0, 10.0)
+    loop = np.zeros_like(vals)
+    for k in np.unique(keys):
+        m = keys == k
+        loop[m] = sir._normalize_pos_floor_cap_array(vals[m], 1.0, 98.0, 10.0)
+    assert np.array_equal(got, loop)
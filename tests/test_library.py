@@ -0,0 +1,18 @@
+import pandas as pd
+
+from helpers import assert_same_outputs, sir
+
+def test_run_pipeline_sinks_match_baseline(golden, tmp_path):
+    res = sir.run_pipeline(golden["excel"], out_csv=str(tmp_path / "r.csv"), metrics_csv=str(tmp_path / "m.csv"))
+    assert_same_outputs(res.outputs, golden)
+
+def test_run_pipeline_in_memory(golden):
+    df = pd.read_excel(golden["excel"])
+    before = df.copy()
+    res = sir.run_pipeline(df, metrics=False)
+    pd.testing.assert_frame_equal(df, before)  # entrada intacta
+    assert res.metrics is None and res.outputs == {}
+    expected = pd.read_csv(golden["resultado"])
+    got = res.result.round(1)
+    assert list(got.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(got.reset_index(drop=True), expected, check_dtype=False)
@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from helpers import assert_same_outputs, read_bytes, run_cli, sir
+
+def test_second_run_waits_then_hits_cache(golden, tmp_path):
+    src = golden["excel"]
+    argv = ("--excel", src, "--out-dir", tmp_path / "out", "--cache-dir", tmp_path / "cache")
+    out_csv, _ = sir._derive_basenames(src, str(tmp_path / "out"))
+    results = []
+    with sir._file_lock(out_csv):
+        worker = threading.Thread(target=lambda: results.append(run_cli(*argv)))
+        worker.start()
+        time.sleep(0.5)
+        assert worker.is_alive() and not os.path.exists(out_csv)  # esperando o lock
+    worker.join(60)
+    assert results[0]["cache"] == "miss"
+    assert_same_outputs(results[0], golden)
+
+    with ThreadPoolExecutor(2) as pool:
+        both = list(pool.map(lambda _: run_cli(*argv), range(2)))
+    assert [r["cache"] for r in both] == ["hit", "hit"]
+    assert not os.path.exists(f"{out_csv}.lock")
+
+def test_lock_timeout(synthetic_csv, tmp_path):
+    src = synthetic_csv(20)
+    out_csv, _ = sir._derive_basenames(src, str(tmp_path))
+    with sir._file_lock(out_csv):
+        with pytest.raises(TimeoutError):
+            run_cli("--excel", src, "--out-dir", tmp_path, "--lock-timeout", 0.2)
+
+def test_lock_of_dead_process_is_discarded(tmp_path):
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    target = str(tmp_path / "x__Resultado.csv")
+    with open(f"{target}.lock", "w") as fh:
+        fh.write(str(dead.pid))
+    with sir._file_lock(target, timeout_s=1.0) as waited_s:
+        assert waited_s < 1.0
+        assert int(read_bytes(f"{target}.lock")) == os.getpid()
+    assert not os.path.exists(f"{target}.lock")
+
+def test_shared_cache_dir_keeps_every_entry(synthetic_csv, tmp_path):
+    inputs = [synthetic_csv(40, seed=s) for s in range(4)]
+    cache = tmp_path / "cache"
+    with ThreadPoolExecutor(4) as pool:
+        outs = list(pool.map(lambda p: run_cli("--excel", p, "--out-dir", f"{p}.out", "--cache-dir", cache),
+                             inputs))
+    assert {o["cache"] for o in outs} == {"miss"}
+    assert len(sir._cache_load_manifest(str(cache))["entries"]) == 4
@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from helpers import bench, sir
+
+@pytest.mark.parametrize("seed", range(4))
+def test_matrix_and_series_match_reference(seed, capsys):
+    assert bench.check_normalize(150, seed) == 0, capsys.readouterr().err
+
+def test_known_column_with_dominant_leader():
+    col = pd.Series([0.0, -3.0, 1.0, 5.0, 100.0])
+    got = sir.normalize_0_100_pos_floor_cap(col, 1.0, 98.0, 10.0).to_numpy()
+    ref = bench._reference_normalize(col.to_numpy(), 1.0, 98.0, 10.0)
+    assert np.array_equal(got, ref)
+    assert got[0] == got[1] == 0.0 and got[4] == got.max()
@@ -0,0 +1,43 @@
+import os
+
+import pandas as pd
+import pytest
+
+from helpers import read_bytes, run_cli, sir
+
+SCORES = sir._RESULT_COLS[1:]
+
+@pytest.fixture
+def result(synthetic_csv):
+    return sir.run_pipeline(synthetic_csv(30), metrics=False).result
+
+def _render(result, out_dir, **kw):
+    return sir.render_bar_charts(result, output_dir=str(out_dir), bar_width=6.0, bar_height=3.0,
+                                 plot_prefix="SIR_", columns=list(SCORES), **kw)
+
+@pytest.mark.parametrize("fmt", ["png", "svg"])
+def test_parallel_render_matches_serial(result, tmp_path, fmt):
+    serial = _render(result, tmp_path / "serial", fmt=fmt, jobs=1)
+    parallel = _render(result, tmp_path / "parallel", fmt=fmt, jobs=2)
+    names = sorted(os.path.basename(p) for p in serial)
+    assert names == sorted(f"SIR_{sir._safe_filename(c)}.{fmt}" for c in SCORES)
+    assert sorted(os.path.basename(p) for p in parallel) == names
+    assert sorted(os.listdir(tmp_path / "parallel")) == names  # sem temporários largados
+    if fmt == "png":
+        for s, p in zip(sorted(serial), sorted(parallel)):
+            assert read_bytes(s) == read_bytes(p)
+
+@pytest.mark.parametrize("fmt", ["png", "svg"])
+def test_combined_panel_is_one_file(result, tmp_path, fmt):
+    written = _render(result, tmp_path / "plots", fmt=fmt, combined=True)
+    assert written == [str(tmp_path / "plots" / f"SIR_painel.{fmt}")]
+    assert os.listdir(tmp_path / "plots") == [f"SIR_painel.{fmt}"] and os.path.getsize(written[0]) > 0
+
+def test_cli_plots_from_memory_without_reading_xlsx_back(synthetic_csv, tmp_path, monkeypatch):
+    def no_read_back(*a, **kw):
+        raise AssertionError("o XLSX de resultado não deve ser relido para plotar")
+    monkeypatch.setattr(pd, "read_excel", no_read_back)
+    out = run_cli("--excel", synthetic_csv(30), "--out-dir", tmp_path, "--out-xlsx", tmp_path / "r.xlsx",
+                  "--plots-dir", tmp_path / "plots", "--plot-jobs", 2)
+    assert os.path.exists(out["xlsx"])
+    assert sorted(os.listdir(tmp_path / "plots")) == sorted(f"SIR_{sir._safe_filename(c)}.png" for c in SCORES)
@@ -0,0 +1,38 @@
+import json
+import os
+
+from helpers import run_cli
+
+STAGE_KEYS = {"name", "wall_ms", "rss_mb", "peak_rss_mb", "cache"}
+PROFILE_KEYS = {"version", "input", "started_at", "total_ms", "peak_rss_mb", "cache", "stages"}
+
+def _profile(out):
+    assert out["profile"] == out["resultado"].replace("__Resultado.csv", "__Profile.json")
+    with open(out["profile"], encoding="utf-8") as fh:
+        prof = json.load(fh)
+    assert set(prof) == PROFILE_KEYS  # mesmo shape do SirProfile em src/libs/sir/profile.ts
+    for st in prof["stages"]:
+        assert STAGE_KEYS <= set(st) and st["wall_ms"] >= 0
+    return prof, {st["name"]: st for st in prof["stages"]}
+
+def test_profile_covers_every_stage(synthetic_csv, tmp_path):
+    src = synthetic_csv(80)
+    out = run_cli("--excel", src, "--out-dir", tmp_path, "--profile", "--plots-dir", tmp_path / "plots")
+    prof, stages = _profile(out)
+    assert prof["input"] == os.path.abspath(src) and prof["cache"] == "off"  # plots: sem cache
+    assert {"read", "canonicalize_columns", "clean_numeric", "compute_dimensions", "normalize",
+            "weighted_score", "write_result", "export_metrics", "plots"} <= set(stages)
+    assert stages["read"]["rows"] == 80 and stages["read"]["cols"] > 1
+    assert stages["plots"]["files"] > 0
+    if prof["peak_rss_mb"] is not None:
+        assert prof["peak_rss_mb"] >= max(st["peak_rss_mb"] or 0 for st in stages.values())
+    assert prof["total_ms"] >= sum(st["wall_ms"] for st in stages.values())
+
+def test_profile_reports_cache_hit_on_rerun(synthetic_csv, tmp_path):
+    argv = ("--excel", synthetic_csv(80), "--out-dir", tmp_path, "--profile")
+    first, stages = _profile(run_cli(*argv))
+    assert first["cache"] == "miss" and stages["cache_lookup"]["cache"] == "miss"
+    assert stages["read"]["cache"] == "miss"
+    second, stages = _profile(run_cli(*argv))
+    assert second["cache"] == "hit" and stages["cache_lookup"]["cache"] == "hit"
+    assert "read" not in stages  # hit não relê a planilha
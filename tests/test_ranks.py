@@ -0,0 +1,32 @@
+import os
+import shutil
+
+import pandas as pd
+
+from helpers import assert_same_outputs, run_cli, sir
+
+def test_ranks_and_deltas_against_prev_wave(synthetic_csv, tmp_path):
+    prev = run_cli("--excel", synthetic_csv(120, seed=1), "--out-dir", tmp_path / "P1", "--no-cache")
+    cur = run_cli("--excel", synthetic_csv(120, seed=2), "--out-dir", tmp_path / "P2", "--no-cache",
+                  "--ranks", "--prev-resultado", prev["resultado"])
+    ranks = pd.read_csv(cur["ranks"])
+    result = pd.read_csv(cur["resultado"])
+    final = ranks[ranks["score"] == "sir_final_0_100"].set_index("name")
+    assert len(final) == len(result)
+    best = result.loc[result["sir_final_0_100"].idxmax(), "name"]
+    assert final.loc[best, "rank"] == 1
+    old = pd.read_csv(prev["resultado"]).set_index("name")["sir_final_0_100"]
+    assert (final["prev_value"] == old.loc[final.index]).all()
+    assert ((final["value"] - final["prev_value"]).round(1) == final["delta"].round(1)).all()
+    assert "delta_pct" in pd.read_csv(cur["metric_deltas"]).columns
+
+def test_find_wave_outputs_ignores_per_sheet_files(golden, tmp_path):
+    out_dir = tmp_path / "cli" / "P1" / "pendulo"
+    main = run_cli("--excel", golden["excel"], "--out-dir", out_dir, "--no-cache")
+    book = tmp_path / os.path.basename(golden["excel"])
+    shutil.copy(golden["excel"], book)
+    run_cli("--excel", book, "--sheet", "all", "--out-dir", out_dir, "--jobs", 1)
+    assert len(list(out_dir.glob("*__Resultado.csv"))) > 1  # principal + por sheet
+    resultado, metrics = sir.find_wave_outputs(str(tmp_path), "cli", "P1")
+    assert (resultado, metrics) == (main["resultado"], main["metrics"])
+    assert_same_outputs(main, golden)
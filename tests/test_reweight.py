@@ -0,0 +1,15 @@
+from helpers import assert_same_outputs, run_cli, sir
+
+WEIGHTS = ("--w-presenca", 5, "--w-pop", 40, "--w-ativ", 10, "--w-eng", 30, "--w-dif", 15)
+
+def _reweight(npz, out_csv, *extra):
+    return sir.run_reweight(sir.parse_args([str(a) for a in ("--reweight", npz, "--out-csv", out_csv, *extra)]))
+
+def test_reweight_matches_full_rerun(golden, cli_matches, tmp_path):
+    full = cli_matches(golden["excel"], *WEIGHTS, against=golden, roles=("metrics",))
+    base = cli_matches(golden["excel"], against=golden)
+    assert_same_outputs(_reweight(base["dimensions"], tmp_path / "rew.csv", *WEIGHTS), full, ("resultado",))
+
+def test_reweight_with_same_weights_is_identity(synthetic_csv, tmp_path):
+    base = run_cli("--excel", synthetic_csv(200), "--out-dir", tmp_path, "--no-cache")
+    assert_same_outputs(_reweight(base["dimensions"], tmp_path / "rew.csv"), base, ("resultado",))
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from helpers import bench, sir
+
+TRICKY = ["12%", "0,34%", " 45 % ", "1.234.567", "1.234,5", "1,5", "1.5", "12 345", " 1,2",
+          "", " ", "-", "n/d", "abc", "nan", None, np.nan, 7, 3.25, "-2,5", "1.234.567,891", "1e3"]
+
+def _per_column(df):
+    """Sanitização original: _clean_numeric_series_one_decimal coluna a coluna."""
+    out = df.copy()
+    for col in out.columns:
+        if col != "name" and (sir._NUMERIC_COL_REGEX.match(col) or pd.api.types.is_numeric_dtype(out[col])):
+            out[col] = sir._clean_numeric_series_one_decimal(out[col], is_percent=sir._is_percent_col(col))
+    return out
+
+@pytest.mark.parametrize("seed", range(4))
+def test_batched_matches_per_column_on_synthetic_sheets(seed):
+    df = sir.canonicalize_columns(bench.make_synthetic_sheet(400, seed=seed))[0]
+    pd.testing.assert_frame_equal(sir.clean_numeric_dataframe_one_decimal(df), _per_column(df))
+
+def test_batched_matches_per_column_on_tricky_cells():
+    rng = np.random.default_rng(0)
+    cells = np.array(TRICKY, dtype=object)
+    df = pd.DataFrame({
+        "name": [f"p{i}" for i in range(60)],
+        "fans_facebook": rng.choice(cells, 60),
+        "engagement_instagram": rng.choice(cells, 60),  # percentual
+        "likes_tiktok": rng.choice(cells, 60),
+        "obs": rng.choice(cells, 60),                  # fora do regex: intocada
+        "views_youtube": rng.normal(1e4, 5e3, 60),
+        "engagement_facebook": rng.uniform(0, 60, 60),
+    })
+    pd.testing.assert_frame_equal(sir.clean_numeric_dataframe_one_decimal(df), _per_column(df))
+
+@pytest.mark.parametrize("dtype", ["Int64", "Float64", "Int32", "int64", "float64", "bool"])
+def test_numeric_dtypes_end_as_float64(dtype):
+    vals = {"bool": [True, False, True], "int64": [1, 2, 3]}.get(dtype, [1, None, 3])
+    col = pd.array(vals, dtype=dtype)
+    df = pd.DataFrame({"name": list("abc"), "fans_facebook": col, "engagement_tiktok": col})
+    got = sir.clean_numeric_dataframe_one_decimal(df)
+    pd.testing.assert_frame_equal(got, _per_column(df))
+    assert (got.dtypes.drop("name") == np.float64).all()
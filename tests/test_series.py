@@ -0,0 +1,31 @@
+import json
+import shutil
+
+from helpers import assert_same_outputs, sir
+
+def _series(raw, out):
+    return sir.run_series(sir.parse_args(["--series", str(raw), "--batch-out-root", str(out)]))
+
+def test_series_scores_only_changed_waves(golden, tmp_path):
+    raw, out = tmp_path / "raw", tmp_path / "processed"
+    for wave in ("P1", "P2"):
+        (raw / "cli" / wave).mkdir(parents=True)
+        shutil.copy(golden["excel"], raw / "cli" / wave)
+
+    first = _series(raw, out)["cli"]
+    assert first["scored"] == ["P1", "P2"] and not first["failed"]
+    index = sir.load_series_index(str(out), "cli")
+    assert sorted(index["waves"]) == ["P1", "P2"]
+    for wave in ("P1", "P2"):
+        resultado, metrics = sir.find_wave_outputs(str(out), "cli", wave)
+        assert_same_outputs({"resultado": resultado, "metrics": metrics}, golden)
+
+    assert _series(raw, out)["cli"] == {"scored": [], "skipped": ["P1", "P2"], "failed": {}}
+
+    (raw / "cli" / "P3").mkdir()
+    shutil.copy(golden["excel"], raw / "cli" / "P3")
+    third = _series(raw, out)["cli"]
+    assert third["scored"] == ["P3"] and third["skipped"] == ["P1", "P2"]
+    with open(out / "cli" / "P3" / "overview.json", encoding="utf-8") as fh:
+        overview = json.load(fh)
+    assert overview["series"]
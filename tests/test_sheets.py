@@ -0,0 +1,16 @@
+import pandas as pd
+
+from helpers import assert_same_outputs, run_cli
+
+def test_all_sheets_match_single_sheet_runs(golden, cli_matches, tmp_path):
+    book = tmp_path / "book.xlsx"
+    df = pd.read_excel(golden["excel"])
+    with pd.ExcelWriter(book) as xw:
+        df.to_excel(xw, sheet_name="Onda A", index=False)
+        df.iloc[::-1].to_excel(xw, sheet_name="Onda B", index=False)
+
+    for jobs in (1, 2):
+        out = run_cli("--excel", book, "--sheet", "all", "--out-dir", tmp_path / f"j{jobs}", "--jobs", jobs)
+        assert sorted(out["sheets"]) == ["Onda A", "Onda B"]
+        assert_same_outputs(out["sheets"]["Onda A"], golden)
+        cli_matches(book, "--sheet", "Onda B", against=out["sheets"]["Onda B"])
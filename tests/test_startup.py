@@ -0,0 +1,37 @@
+import json
+import os
+import subprocess
+import sys
+
+from helpers import ROOT
+
+SCRIPT = os.path.join(ROOT, "etl", "sir_excel_pipeline_v6.py")
+
+def _run(code, *argv):
+    proc = subprocess.run([sys.executable, "-c", code, SCRIPT, *map(str, argv)],
+                          capture_output=True, text=True, timeout=300)
+    assert proc.returncode == 0, proc.stderr
+    return proc
+
+def test_csv_path_does_not_import_plotting_or_xlsx_deps(synthetic_csv, tmp_path):
+    code = (
+        "import json, runpy, sys\n"
+        "sys.argv = sys.argv[1:]\n"
+        "runpy.run_path(sys.argv[0], run_name='__main__')\n"
+        "print(json.dumps({m: m in sys.modules for m in ('matplotlib', 'openpyxl')}))\n"
+    )
+    src = synthetic_csv(50)
+    for extra in ((), ("--emit-json", "--client", "c", "--wave", "P1"), ("--profile", "--ranks")):
+        out = _run(code, "--excel", src, "--out-dir", tmp_path / "c" / "P1" / "pendulo", *extra)
+        assert json.loads(out.stdout.splitlines()[-1]) == {"matplotlib": False, "openpyxl": False}, extra
+
+def test_timings_report_shows_budget(synthetic_csv, tmp_path):
+    code = "import runpy, sys\nsys.argv = sys.argv[1:]\nrunpy.run_path(sys.argv[0], run_name='__main__')\n"
+    out = _run(code, "--excel", synthetic_csv(50), "--out-dir", tmp_path, "--timings", "--no-cache")
+    report = [l for l in out.stderr.splitlines() if l.startswith("[TIMINGS]")]
+    assert any("orçamento cold-start: 1500 ms" in l for l in report), out.stderr
+    assert any("matplotlib=False openpyxl=False" in l for l in report)
+
+def test_budget_is_documented_in_help():
+    out = subprocess.run([sys.executable, SCRIPT, "--help"], capture_output=True, text=True, timeout=120)
+    assert "1500 ms" in " ".join(out.stdout.split())
@@ -0,0 +1,5 @@
+import pytest
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_stream_matches_full_read(synthetic_csv, cli_matches, seed):
+    cli_matches(synthetic_csv(437, seed=seed), "--stream", "--chunk-rows", 50)
@@ -0,0 +1,23 @@
+import numpy as np
+
+from helpers import run_cli, sir
+
+def test_grid_covers_simplex():
+    grid = sir.grid_weight_vectors(0.1)
+    assert grid.shape == (1001, 5)
+    assert np.allclose(grid.sum(axis=1), 1.0)
+    assert len(np.unique(grid, axis=0)) == len(grid)
+
+def test_sweep_with_base_vector_only_matches_final_rank(synthetic_csv, tmp_path):
+    out = run_cli("--excel", synthetic_csv(200), "--out-dir", tmp_path, "--no-cache")
+    dims, _meta = sir.load_dimensions_artifact(out["dimensions"])
+    base = sir._DEFAULTS.weights
+    w = np.array([[base[k] for k in sir._WEIGHT_KEYS]])
+    table = sir.weight_sweep(dims, [w / w.sum()], base_weights=base)
+    assert table.attrs["n_vectors"] == 1
+    assert (table["rank_min"] == table["rank_base"]).all()
+    assert (table["rank_max"] == table["rank_base"]).all()
+
+    final = sir.weighted_final_score_0_100(dims, base)
+    best = final.loc[final["sir_final_0_100"].idxmax(), "name"]
+    assert table.iloc[0]["name"] == best and table.iloc[0]["p_first"] == 1.0
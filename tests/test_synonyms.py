@@ -0,0 +1,66 @@
+import itertools
+import re
+
+import pandas as pd
+
+from helpers import bench, sir
+
+def _ordered_scan(col):
+    """Regra original: primeira regra de _expand_synonyms() que casa vence."""
+    for pat, dest in sir._expand_synonyms():
+        if pat.match(col):
+            return dest
+    return None
+
+def _expand(pattern):
+    """^likes_(PLAT)$ -> likes_facebook, ...; alternâncias (a|b) viram cada opção."""
+    body = pattern.strip("^$")
+    parts = re.split(r"(\([^)]*\))", body)
+    options = [p[1:-1].split("|") if p.startswith("(") else [p] for p in parts]
+    for combo in itertools.product(*options):
+        name = "".join(combo)
+        if "PLAT" in name:
+            yield from (name.replace("PLAT", plat) for plat in sir._CANON_PLATFORMS)
+        else:
+            yield name
+
+def _decorated(name):
+    yield name
+    yield name.upper()
+    yield name.title()
+    yield f"{name} "
+    yield f"{name}\n"
+    yield f" {name}"
+    yield name.replace("k", "K")   # sinal Kelvin: re.I casa com 'k'
+    yield name.replace("e", "é", 1)
+    yield f"{name}_x"
+
+def _candidates():
+    seen = set()
+    for canon, synos in sir._SYNONYMS.items():
+        for pattern in [canon, *synos]:
+            for name in _expand(pattern):
+                for col in _decorated(name):
+                    if col not in seen:
+                        seen.add(col)
+                        yield col
+    yield from ["nome", "NOME", "Page", "account ", "perfil", "name", "", "foo", "ﬁans_facebook"]
+
+def test_index_matches_ordered_regex_scan():
+    cols = list(_candidates())
+    assert len(cols) > 500
+    mismatches = [(c, sir._match_synonym(c), _ordered_scan(c)) for c in cols
+                  if sir._match_synonym(c) != _ordered_scan(c)]
+    assert not mismatches, mismatches[:10]
+    assert any(_ordered_scan(c) for c in cols if not c.isascii())  # o caminho não-ASCII foi exercitado
+
+def test_canonicalize_memoizes_by_header_signature():
+    df = bench.make_synthetic_sheet(20, seed=3)
+    sir._synonym_colmap.cache_clear()
+    first = sir.canonicalize_columns(df)
+    hits = sir._synonym_colmap.cache_info().hits
+    second = sir.canonicalize_columns(df.copy())
+    assert sir._synonym_colmap.cache_info().hits == hits + 1
+    assert first[1] == second[1] and first[2] == second[2]
+    pd.testing.assert_frame_equal(first[0], second[0])
+    assert first[1] == {c: _ordered_scan(c) for c in df.columns if _ordered_scan(c) is not None}
@@ -0,0 +1,41 @@
+import os
+import shutil
+
+from helpers import sir
+
+def _watch(raw, out, polls=40, jobs=1):
+    args = sir.parse_args(["--watch", str(raw), "--batch-out-root", str(out), "--jobs", str(jobs),
+                           "--watch-interval", "0.05", "--watch-debounce", "0"])
+    return sir.run_watch(args, max_polls=polls)
+
+def test_watch_rescores_only_changed_waves(synthetic_csv, tmp_path):
+    raw, out = tmp_path / "raw", tmp_path / "processed"
+    for wave, seed in (("P1", 1), ("P2", 2)):
+        (raw / "cli" / wave).mkdir(parents=True)
+        shutil.copy(synthetic_csv(40, seed=seed), raw / "cli" / wave / "metrics.csv")
+
+    assert _watch(raw, out) == {"scored": 2, "skipped": 0, "failed": 0}
+    assert sorted(sir.load_series_index(str(out), "cli")["waves"]) == ["P1", "P2"]
+
+    p1 = raw / "cli" / "P1" / "metrics.csv"
+    os.utime(p1, ns=(p1.stat().st_atime_ns, p1.stat().st_mtime_ns + 10**9))  # só o mtime
+    shutil.copy(synthetic_csv(40, seed=3), raw / "cli" / "P2" / "metrics.csv")
+    assert _watch(raw, out) == {"scored": 1, "skipped": 1, "failed": 0}
+    assert os.path.exists(out / "cli" / "P2" / "overview.json")
+
+def test_parallel_waves_of_one_client_refresh_after_both(synthetic_csv, tmp_path, capsys):
+    raw, out = tmp_path / "raw", tmp_path / "processed"
+    for wave, seed in (("P1", 1), ("P2", 2), ("P3", 3)):
+        (raw / "cli" / wave).mkdir(parents=True)
+        shutil.copy(synthetic_csv(300, seed=seed), raw / "cli" / wave / "metrics.csv")
+    assert _watch(raw, out, jobs=2) == {"scored": 3, "skipped": 0, "failed": 0}
+
+    for wave, seed in (("P1", 4), ("P2", 5)):  # duas ondas do mesmo cliente mudam juntas
+        shutil.copy(synthetic_csv(300, seed=seed), raw / "cli" / wave / "metrics.csv")
+    capsys.readouterr()
+    assert _watch(raw, out, jobs=2) == {"scored": 2, "skipped": 1, "failed": 0}
+    lines = capsys.readouterr().out.splitlines()
+    scored = [i for i, l in enumerate(lines) if "pontuada em" in l]
+    refreshed = [i for i, l in enumerate(lines) if "dependente(s) atualizado(s)" in l]
+    assert len(scored) == 2 and len(refreshed) == 1 and refreshed[0] > max(scored)
+    assert sir._refresh_wave_payloads(str(out), "cli") == 0  # nada ficou para trás
@@ -0,0 +1,23 @@
+import io
+import json
+
+from helpers import assert_same_outputs, sir
+
+def _serve(*lines):
+    out = io.StringIO()
+    sir.serve(stdin=io.StringIO("".join(f"{l}\n" for l in lines)), stdout=out)
+    return [json.loads(l) for l in out.getvalue().splitlines()]
+
+def test_serve_job_matches_cli(golden, tmp_path):
+    job = {"id": "j1", "args": ["--excel", golden["excel"], "--out-dir", str(tmp_path), "--no-cache"]}
+    ready, resp = _serve(json.dumps(job))
+    assert ready["ready"] is True
+    assert resp["id"] == "j1" and resp["ok"] is True
+    assert_same_outputs(resp, golden)
+
+def test_serve_reports_errors_and_keeps_running(tmp_path, synthetic_csv):
+    good = {"id": "ok", "args": ["--excel", synthetic_csv(20), "--out-dir", str(tmp_path), "--no-cache"]}
+    replies = _serve("{nope", json.dumps({"id": "n", "args": ["--serve"]}), json.dumps(good))[1:]
+    assert replies[0]["ok"] is False and "JSON" in replies[0]["error"]
+    assert replies[1]["id"] == "n" and replies[1]["ok"] is False
+    assert replies[2]["id"] == "ok" and replies[2]["ok"] is True